@@ -0,0 +1,199 @@
+"""
+Бенчмарки основных операций на синтетических репозиториях.
+
+Для каждого размера (по умолчанию 1k, 10k и 100k файлов) генерируется детерминированный
+репозиторий (см. synthetic_repo.py, кэшируется между запусками) и замеряются:
+
+    scan      - utils.generate_file_tree
+    read      - utils.get_file_contents
+    generate  - commands.write_documentation (ядро generate_documentation без сохранения конфигов)
+    unpack    - commands.unpack
+    tree      - commands.show_directory_tree (вывод в /dev/null)
+
+Время - минимум и медиана из --repeat запусков, память - пик tracemalloc в отдельном запуске.
+Результаты сравниваются с сохраненной базой; превышение на --tolerance считается регрессией
+и дает код выхода 1:
+
+    python benchmarks/run.py --sizes 1000,10000
+    python benchmarks/run.py --save-baseline     # обновить benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import synthetic_repo  # noqa: E402
+from program import commands, utils  # noqa: E402
+from startup import git_revision  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+CACHE_DIR = Path(tempfile.gettempdir()) / "ofp-benchmarks"
+
+
+def _noop():
+    pass
+
+
+def prepare_scan(ctx: dict):
+    return lambda: utils.generate_file_tree(ctx["repo"], ctx["config"]), _noop
+
+
+def prepare_read(ctx: dict):
+    _, files = utils.generate_file_tree(ctx["repo"], ctx["config"])
+    return lambda: utils.get_file_contents(files), _noop
+
+
+def prepare_generate(ctx: dict):
+    return lambda: commands.write_documentation(str(ctx["repo"]), str(ctx["doc"]), ctx["config"]), _noop
+
+
+def prepare_unpack(ctx: dict):
+    if not ctx["doc"].exists():
+        commands.write_documentation(str(ctx["repo"]), str(ctx["doc"]), ctx["config"])
+    target = ctx["work"] / "unpacked"
+    shutil.rmtree(target, ignore_errors=True)
+
+    def run():
+        success, message = commands.unpack(str(ctx["doc"]), str(target))
+        if not success:
+            raise RuntimeError(message)
+
+    return run, lambda: shutil.rmtree(target, ignore_errors=True)
+
+
+def prepare_tree(ctx: dict):
+    def run():
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            commands.show_directory_tree(str(ctx["repo"]))
+
+    return run, _noop
+
+
+BENCHMARKS = {
+    "scan": prepare_scan,
+    "read": prepare_read,
+    "generate": prepare_generate,
+    "unpack": prepare_unpack,
+    "tree": prepare_tree,
+}
+
+
+def measure(prepare, ctx: dict, repeat: int, memory: bool) -> dict:
+    """Замеряет одну операцию: время каждого запуска и пик памяти отдельным запуском"""
+    timings = []
+    for _ in range(repeat):
+        run, cleanup = prepare(ctx)
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+        cleanup()
+
+    result = {"seconds": round(min(timings), 4), "median_seconds": round(statistics.median(timings), 4)}
+    if memory:
+        run, cleanup = prepare(ctx)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+        finally:
+            tracemalloc.stop()
+            cleanup()
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Список регрессий относительно базы (время или память выросли больше чем на tolerance)"""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if metric in current and base.get(metric) and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {base[metric]} -> {current[metric]} "
+                                   f"(x{current[metric] / base[metric]:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks on synthetic repositories")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated file counts")
+    parser.add_argument("--only", help="comma-separated benchmark names: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--depth", type=int, default=synthetic_repo.DEFAULTS["depth"])
+    parser.add_argument("--median-size", type=int, default=synthetic_repo.DEFAULTS["median_size"])
+    parser.add_argument("--binary-ratio", type=float, default=synthetic_repo.DEFAULTS["binary_ratio"])
+    parser.add_argument("--ignored-ratio", type=float, default=synthetic_repo.DEFAULTS["ignored_ratio"])
+    parser.add_argument("--seed", type=int, default=synthetic_repo.DEFAULTS["seed"])
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR), help="where generated repositories are kept")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = {}
+    for size in (int(value) for value in args.sizes.split(",")):
+        started = time.perf_counter()
+        repo, info = synthetic_repo.cached_repo(
+            args.cache_dir, files=size, depth=args.depth, median_size=args.median_size,
+            binary_ratio=args.binary_ratio, ignored_ratio=args.ignored_ratio, seed=args.seed)
+        print(f"\n{size} files, {info['total_bytes'] / 1024 / 1024:.1f} MB "
+              f"(+{info['ignored_files']} ignored)  {repo}  [{time.perf_counter() - started:.1f}s]")
+
+        with tempfile.TemporaryDirectory(prefix="ofp-bench-") as work:
+            ctx = {"repo": repo, "config": utils.load_project_config(str(repo)),
+                   "work": Path(work), "doc": Path(work) / "project_documentation.md"}
+            for name in names:
+                result = measure(BENCHMARKS[name], ctx, args.repeat, not args.no_memory)
+                results[f"{size}/{name}"] = result
+                memory = f"   peak {result['peak_mb']:8.2f} MB" if "peak_mb" in result else ""
+                print(f"{name:>10}: min {result['seconds']:8.3f} s   median {result['median_seconds']:8.3f} s{memory}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        stored = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        stored.setdefault("results", {}).update(results)
+        stored["meta"] = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": git_revision(),
+                          "python": sys.version.split()[0], "platform": sys.platform, "repeat": args.repeat}
+        baseline_path.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nbaseline saved: {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\nno baseline at {baseline_path} (use --save-baseline)")
+        return
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    meta = baseline.get("meta", {})
+    print(f"\nbaseline: {meta.get('revision', '?')} ({meta.get('time', '?')}), tolerance {args.tolerance:.0%}")
+    for line in regressions:
+        print(f"  REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print("  no regressions")
+
+
+if __name__ == "__main__":
+    main()
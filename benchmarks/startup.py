@@ -0,0 +1,96 @@
+"""
+Замер времени запуска CLI.
+
+Запускает простые команды (по умолчанию `version` и `pwd`) в отдельных процессах
+и выводит медиану/минимум. С --record результат дописывается в историю (JSON Lines),
+чтобы отслеживать время старта между версиями:
+
+    python benchmarks/startup.py --runs 20 --record benchmarks/startup_history.jsonl
+    python benchmarks/startup.py --importtime   # самые дорогие импорты
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MAIN = ROOT / "main.py"
+DEFAULT_COMMANDS = ["version", "pwd"]
+
+
+def time_command(command: list[str], runs: int) -> list[float]:
+    """Запускает команду runs раз и возвращает время каждого запуска в миллисекундах"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, str(MAIN), *command], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def baseline(runs: int) -> list[float]:
+    """Время запуска голого интерпретатора - нижняя граница для любой команды"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=False)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def top_imports(command: list[str], limit: int = 15) -> list[tuple[int, str]]:
+    """Возвращает самые дорогие импорты команды по данным -X importtime (мкс, модуль)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(MAIN), *command],
+                          capture_output=True, text=True, check=False)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def git_revision() -> str:
+    """Текущая ревизия репозитория (или пустая строка вне git)"""
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                          capture_output=True, text=True, check=False)
+    return proc.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("commands", nargs="*", default=DEFAULT_COMMANDS)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--record", help="append results to this JSON Lines file")
+    parser.add_argument("--importtime", action="store_true", help="show the most expensive imports")
+    args = parser.parse_args()
+
+    results = {"python": baseline(args.runs)}
+    for command in args.commands:
+        results[command] = time_command(command.split(), args.runs)
+
+    summary = {name: {"median_ms": round(statistics.median(values), 2), "min_ms": round(min(values), 2)}
+               for name, values in results.items()}
+    for name, stats in summary.items():
+        print(f"{name:>12}: median {stats['median_ms']:8.2f} ms   min {stats['min_ms']:8.2f} ms")
+
+    if args.importtime:
+        for command in args.commands:
+            print(f"\n-X importtime: {command}")
+            for cumulative, name in top_imports(command.split()):
+                print(f"{cumulative / 1000:8.2f} ms  {name}")
+
+    if args.record:
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": git_revision(),
+                  "python": sys.version.split()[0], "runs": args.runs, "results": summary}
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
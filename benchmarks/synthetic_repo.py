@@ -0,0 +1,156 @@
+"""
+Детерминированный генератор синтетических репозиториев для бенчмарков.
+
+Одинаковые параметры и seed всегда дают одинаковое дерево: те же пути, размеры
+и содержимое. Поэтому замеры разных версий можно сравнивать между собой.
+
+    python benchmarks/synthetic_repo.py /tmp/repo --files 10000 --depth 4 --binary-ratio 0.05
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+from pathlib import Path
+
+TEXT_EXTENSIONS = [".py", ".py", ".py", ".js", ".ts", ".md", ".json", ".txt", ".html", ".css", ".yaml"]
+BINARY_EXTENSIONS = [".png", ".bin", ".zip", ".so"]
+# Папки, которые конфигурация по умолчанию пропускает целиком
+IGNORED_DIRS = ["node_modules", ".git", "__pycache__", ".venv"]
+MARKER = ".synthetic-repo.json"
+
+_WORDS = ("def class return import from self value result config path items index data "
+          "for while if else try except with open read write print len range list dict").split()
+
+
+def _text_corpus(rng: random.Random, size: int) -> str:
+    """Общий текстовый корпус, из которого нарезается содержимое файлов"""
+    lines = []
+    total = 0
+    while total < size:
+        indent = "    " * rng.randint(0, 3)
+        line = indent + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 10)))
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def _file_size(rng: random.Random, median: int, max_size: int) -> int:
+    """Размер файла из логнормального распределения: много маленьких, редкие крупные"""
+    return max(1, min(max_size, int(rng.lognormvariate(math.log(median), 1.0))))
+
+
+def _directories(rng: random.Random, count: int, depth: int) -> list[str]:
+    """Относительные пути папок глубиной не больше depth"""
+    dirs = [""]
+    while len(dirs) < count:
+        parent = rng.choice(dirs)
+        if parent and parent.count("/") + 1 >= depth:
+            continue
+        name = f"{rng.choice(_WORDS)}_{len(dirs)}"
+        dirs.append(f"{parent}/{name}" if parent else name)
+    return dirs
+
+
+def params_key(params: dict) -> str:
+    """Короткий ключ набора параметров (для кэширования сгенерированных деревьев)"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+DEFAULTS = {"files": 1000, "depth": 4, "median_size": 2048, "max_size": 1024 * 1024,
+            "binary_ratio": 0.05, "ignored_ratio": 0.2, "seed": 0}
+
+
+def generate_repo(root, files: int = 1000, depth: int = 4, median_size: int = 2048,
+                  max_size: int = 1024 * 1024, binary_ratio: float = 0.05,
+                  ignored_ratio: float = 0.2, seed: int = 0) -> dict:
+    """
+    Создает синтетический репозиторий в root и возвращает его параметры и статистику.
+
+    files - число файлов, которые попадут в документацию; depth - максимальная
+    вложенность папок; размеры распределены логнормально с медианой median_size;
+    binary_ratio - доля бинарных файлов; ignored_ratio - сколько файлов (от files)
+    дополнительно положить в игнорируемые папки (node_modules, .git, ...).
+    """
+    params = {"files": files, "depth": depth, "median_size": median_size, "max_size": max_size,
+              "binary_ratio": binary_ratio, "ignored_ratio": ignored_ratio, "seed": seed}
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    corpus = _text_corpus(rng, min(max_size, 256 * 1024) * 2)
+    binary = rng.randbytes(min(max_size, 256 * 1024) * 2)
+    dirs = _directories(rng, max(1, files // 20), depth)
+    for rel_dir in dirs[1:]:
+        (root / rel_dir).mkdir(parents=True, exist_ok=True)
+
+    total_bytes = 0
+    binary_files = 0
+    for number in range(files):
+        rel_dir = rng.choice(dirs)
+        size = _file_size(rng, median_size, max_size)
+        if rng.random() < binary_ratio:
+            extension = rng.choice(BINARY_EXTENSIONS)
+            start = rng.randrange(len(binary) - size) if size < len(binary) else 0
+            data = (binary * (size // len(binary) + 1))[start:start + size]
+            binary_files += 1
+        else:
+            extension = rng.choice(TEXT_EXTENSIONS)
+            start = rng.randrange(len(corpus) - size) if size < len(corpus) else 0
+            data = (corpus * (size // len(corpus) + 1))[start:start + size].encode()
+        name = f"file_{number}{extension}"
+        with open(root / rel_dir / name if rel_dir else root / name, "wb") as f:
+            f.write(data)
+        total_bytes += len(data)
+
+    ignored_files = int(files * ignored_ratio)
+    for number in range(ignored_files):
+        folder = root / rng.choice(IGNORED_DIRS) / f"pkg_{number % 50}"
+        folder.mkdir(parents=True, exist_ok=True)
+        size = _file_size(rng, median_size, max_size)
+        start = rng.randrange(len(corpus) - size) if size < len(corpus) else 0
+        (folder / f"module_{number}.js").write_text(corpus[start:start + size], encoding="utf-8")
+
+    info = {"params": params, "directories": len(dirs), "total_bytes": total_bytes,
+            "binary_files": binary_files, "ignored_files": ignored_files}
+    # Маркер пишется последним: по нему видно, что генерация завершилась
+    (root / MARKER).write_text(json.dumps(info, indent=2), encoding="utf-8")
+    return info
+
+
+def cached_repo(cache_dir, **params) -> tuple[Path, dict]:
+    """Возвращает путь к репозиторию с такими параметрами, создавая его только при отсутствии"""
+    full_params = {**DEFAULTS, **params}
+    root = Path(cache_dir) / f"repo-{full_params['files']}-{params_key(full_params)}"
+    marker = root / MARKER
+    if marker.exists():
+        return root, json.loads(marker.read_text(encoding="utf-8"))
+    if root.exists():
+        shutil.rmtree(root)
+    return root, generate_repo(root, **full_params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic repository")
+    parser.add_argument("root")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--median-size", type=int, default=2048, help="median file size in bytes")
+    parser.add_argument("--max-size", type=int, default=1024 * 1024, help="largest file size in bytes")
+    parser.add_argument("--binary-ratio", type=float, default=0.05)
+    parser.add_argument("--ignored-ratio", type=float, default=0.2,
+                        help="extra files in ignored folders, relative to --files")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.root) and os.listdir(args.root):
+        parser.error(f"{args.root} is not empty")
+    info = generate_repo(args.root, args.files, args.depth, args.median_size, args.max_size,
+                         args.binary_ratio, args.ignored_ratio, args.seed)
+    print(json.dumps(info, indent=2))
+
+
+if __name__ == "__main__":
+    main()
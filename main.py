@@ -1,32 +1,124 @@
 import os
 import sys
-from pathlib import Path
-from colorama import init
-import signal
 import program.config_utils as cfg
-import installer
-import program.utils as utils
-import program.commands as commands
 from program.translator import translator
 
-init(autoreset=True)
+# Остальные модули (colorama, commands, utils, installer) импортируются только теми
+# командами, которым они нужны: version и pwd не должны платить за их загрузку
+LATEST_LANGUAGE = cfg.load_latest_language()
+translator.set_language(LATEST_LANGUAGE)
 
-translator.set_language(utils.load_latest_config().get('language', 'en'))
+FAST_COMMANDS = ("version", "pwd")
+# Имена подкоманд: такой первый аргумент не считается путем к проекту
+SUBCOMMANDS = ("unpack", "open", "conf", "reset", "redo", "update", "uninstall", "version", "info", "pwd",
+               "tui", "lang", "batch", "cat", "status", "diff", "index", "grep", "stats", "snapshot", "serve",
+               "tree", "init", "help", "помощь")
+
+
+def daemon_request():
+    """
+    Запрос к демону ofp serve для текущих аргументов или None, если команду выполняем сами:
+    демон обслуживает `ofp <dir>`, redo, tree и cat без дополнительных опций
+    """
+    args = [arg for arg in sys.argv[1:] if arg not in ('-ru', '-en')]
+    if not args or any(arg.startswith('-') for arg in args):
+        return None
+    command = args[0]
+    if (command, len(args)) in (("redo", 1), ("tree", 1), ("tree", 2), ("cat", 3)):
+        request = {'command': command, 'args': args[1:]}
+    elif len(args) == 1 and command not in SUBCOMMANDS and os.path.isdir(command):
+        request = {'command': 'generate', 'args': args}
+    else:
+        return None
+
+    lang = 'ru' if '-ru' in sys.argv else 'en' if '-en' in sys.argv else LATEST_LANGUAGE
+    return {**request, 'cwd': os.getcwd(), 'lang': lang}
+
+
+def run_daemon_client():
+    """
+    Тонкий клиент: если запущен `ofp serve`, отправляет ему команду и печатает ответ.
+    Возвращает код выхода или None, если демона нет и команду нужно выполнить локально.
+    --no-daemon или переменная OFP_NO_DAEMON отключают обращение к демону.
+    """
+    if "--no-daemon" in sys.argv:
+        sys.argv.remove("--no-daemon")
+        return None
+    if os.environ.get('OFP_NO_DAEMON') or not os.path.exists(cfg.SOCKET_FILE):
+        return None
+    message = daemon_request()
+    if message is None:
+        return None
+
+    import json
+    import socket
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(cfg.SOCKET_FILE)
+    except (OSError, AttributeError):
+        # Сокет остался от остановленного демона
+        return None
+    with client:
+        client.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        with client.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        print(f"{cfg.COLORS['error']}{translator.translate('serve.connection_lost')}{cfg.RESET_COLOR}")
+        return 1
+    response = json.loads(line)
+    sys.stdout.write(response['output'])
+    return 0 if response['ok'] else 1
 
 
 def handle_ctrl_c(signum, frame):
     """Обработка нажатия Ctrl+C"""
+    import program.utils as utils
     print(utils.color_text(f"\n\n{translator.translate('common.canceled')}", 'warning'))
     sys.exit(1)
 
 
-signal.signal(signal.SIGINT, handle_ctrl_c)
+def run_fast_command() -> bool:
+    """Выполняет простые команды (version, pwd) без загрузки тяжелых модулей"""
+    args = [arg for arg in sys.argv[1:] if arg not in ('-ru', '-en')]
+    if len(args) != 1 or args[0] not in FAST_COMMANDS:
+        return False
 
+    if '-ru' in sys.argv:
+        translator.set_language('ru')
+    elif '-en' in sys.argv:
+        translator.set_language('en')
+    if sys.platform == 'win32':
+        from colorama import init
+        init(autoreset=True)
+
+    if args[0] == "version":
+        text = translator.translate('common.version') + ": " + cfg.VERSION
+        color = cfg.COLORS['highlight']
+    else:
+        text = f"{translator.translate('commands.current_working_directory', default='Current working directory')}: {os.path.dirname(os.path.abspath(__file__))}"
+        color = cfg.COLORS['info']
+    print(f"{color}{text}{cfg.RESET_COLOR}")
+    return True
+
+
+def pop_option(name: str, default=None):
+    """Извлекает из sys.argv опцию вида '--name значение' и возвращает значение"""
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name)
+    if index + 1 >= len(sys.argv):
+        sys.argv.pop(index)
+        return default
+    value = sys.argv[index + 1]
+    del sys.argv[index:index + 2]
+    return value
 
 
 def parse_args():
     """Разбирает аргументы командной строки с проверкой существования папки"""
-    lang = utils.load_latest_config().get('language', 'en')
+    import program.utils as utils
+    import program.commands as commands
+    lang = LATEST_LANGUAGE
     project_path = None
 
     if len(sys.argv) > 1:
@@ -39,56 +131,187 @@ def parse_args():
 
         translator.set_language(lang)
 
-        if any(x in sys.argv[1:] for x in ("-h", "--help", "help", "помощь")):
+        # Подкоманда - только первый аргумент: слова вроде update или reset дальше в строке
+        # (шаблон grep, путь секции, сообщение снимка) не должны запускать другие команды
+        command = sys.argv[1] if len(sys.argv) > 1 else ''
+        if command in ("-h", "--help", "help", "помощь") or (
+                command not in ("grep", "cat") and any(x in sys.argv[2:] for x in ("-h", "--help"))):
             commands.print_help(lang)
             sys.exit(0)
-        elif "uninstall" in sys.argv[1:]:
+        elif command == "uninstall":
+            import installer
             installer.uninstall()
             sys.exit(0)
-        elif "update" in sys.argv[1:]:
+        elif command == "update":
+            import installer
             print(utils.color_text(translator.translate('commands.cache_warning'), 'warning'))
             installer.update()
             sys.exit(0)
-        elif "open" in sys.argv[1:]:
+        elif command == "open":
             commands.open_output_file()
             sys.exit(0)
-        elif "conf" in sys.argv[1:]:
+        elif command == "conf":
             commands.open_config_file()
             sys.exit(0)
-        elif "reset" in sys.argv[1:]:
+        elif command == "reset":
             commands.handle_reset_command()
             sys.exit(0)
-        elif "redo" in sys.argv[1:]:
+        elif command == "redo":
             commands.redo_documentation()
             sys.exit(0)
-        elif "version" in sys.argv[1:]:
+        elif command == "version":
             version_text = translator.translate('common.version') + ": " + cfg.VERSION
             print(f"{utils.color_text(version_text, 'highlight')}")
             sys.exit(0)
-        elif "info" in sys.argv[1:]:
+        elif command == "info":
             print(commands.print_project_info())
             sys.exit(0)
-        elif "unpack" in sys.argv[1:]:
+        elif command == "unpack":
+            only = pop_option("--only")
+            archive_path = pop_option("--to-archive")
+            if archive_path:
+                if len(sys.argv) < 3:
+                    print(utils.color_text(translator.translate('commands.unpack_required_args'), 'error'))
+                    sys.exit(1)
+                doc_file = ' '.join(sys.argv[2:]).strip('"\'')
+                success, text = commands.unpack_to_archive(doc_file, archive_path, only)
+                # При выводе архива в stdout сообщения идут в stderr
+                print(text, file=sys.stderr if archive_path == '-' else sys.stdout)
+                sys.exit(0 if success else 1)
             if len(sys.argv) < 4:
                 print(utils.color_text(translator.translate('commands.unpack_required_args'), 'error'))
                 sys.exit(1)
             args = sys.argv[2:]
             doc_file = ' '.join(args[:-1]).strip('"\'')
             target_dir = args[-1].strip('"\'')
-            sec, text = commands.unpack(doc_file, target_dir)
+            success, text = commands.unpack(doc_file, target_dir, only)
             print(text)
+            sys.exit(0 if success else 1)
+        elif command == "cat":
+            if len(sys.argv) < 4:
+                print(utils.color_text(translator.translate('commands.cat_required_args'), 'error'))
+                sys.exit(1)
+            success, text = commands.cat_section(sys.argv[2].strip('"\''), sys.argv[3].strip('"\''))
+            if success:
+                sys.stdout.write(text)
+            else:
+                print(text)
+            sys.exit(0 if success else 1)
+        elif command == "batch":
+            workers = pop_option("--workers")
+            timeout = pop_option("--timeout")
+            report_path = pop_option("--report")
+            if len(sys.argv) < 3:
+                print(utils.color_text(translator.translate('commands.batch_required_args'), 'error'))
+                sys.exit(1)
+            if workers is not None and (not workers.isdigit() or int(workers) < 1):
+                print(utils.color_text(translator.translate('commands.batch_bad_workers'), 'error'))
+                sys.exit(1)
+            try:
+                timeout_value = float(timeout) if timeout is not None else None
+            except ValueError:
+                timeout_value = None
+            if timeout is not None and not (timeout_value and 0 < timeout_value < float('inf')):
+                print(utils.color_text(translator.translate('commands.batch_bad_timeout'), 'error'))
+                sys.exit(1)
+            success, text = commands.batch_generate(
+                sys.argv[2].strip('"\''),
+                workers=int(workers) if workers else None,
+                timeout=timeout_value,
+                report_path=report_path
+            )
+            print(text)
+            sys.exit(0 if success else 1)
+        elif command in ("status", "diff"):
+            doc_file = sys.argv[2].strip('"\'') if len(sys.argv) > 2 else None
+            project_dir = sys.argv[3].strip('"\'') if len(sys.argv) > 3 else None
+            if command == "status":
+                up_to_date, text = commands.project_status(doc_file, project_dir)
+            else:
+                up_to_date, text = commands.project_diff(doc_file, project_dir)
+            print(text)
+            sys.exit(0 if up_to_date else 1)
+        elif command == "index":
+            if len(sys.argv) < 3:
+                print(utils.color_text(translator.translate('commands.index_required_args'), 'error'))
+                sys.exit(1)
+            results = [commands.build_search_index(doc_file) for doc_file in sys.argv[2:]]
+            print("\n".join(text for _, text in results))
+            sys.exit(0 if all(success for success, _ in results) else 1)
+        elif command == "grep":
+            ignore_case = "-i" in sys.argv
+            if ignore_case:
+                sys.argv.remove("-i")
+            if len(sys.argv) < 3:
+                print(utils.color_text(translator.translate('commands.grep_required_args'), 'error'))
+                sys.exit(1)
+            doc_files = sys.argv[3:]
+            if not doc_files:
+                doc_path = commands.open_output_file(False)
+                if doc_path is None:
+                    sys.exit(1)
+                doc_files = [str(doc_path)]
+            found, text = commands.grep_documents(sys.argv[2], doc_files, ignore_case)
+            if text:
+                print(text)
+            sys.exit(0 if found else 1)
+        elif command == "stats":
+            top = pop_option("--top", "10")
+            with_lines = "--no-lines" not in sys.argv
+            if not with_lines:
+                sys.argv.remove("--no-lines")
+            if not top.isdigit() or int(top) < 1:
+                print(utils.color_text(translator.translate('commands.stats_bad_top'), 'error'))
+                sys.exit(1)
+            directory = sys.argv[2].strip('"\'') if len(sys.argv) > 2 else os.getcwd()
+            success, text = commands.project_stats(directory, int(top), with_lines)
+            print(text)
+            sys.exit(0 if success else 1)
+        elif command == "snapshot":
+            store_dir = pop_option("--store")
+            message = pop_option("-m", "")
+            args = [arg.strip('"\'') for arg in sys.argv[2:]]
+            if args[:1] == ["list"]:
+                success, text = commands.snapshot_list(args[1] if len(args) > 1 else os.getcwd(), store_dir)
+            elif args[:1] == ["build"]:
+                if len(args) < 3:
+                    print(utils.color_text(translator.translate('snapshot.required_args'), 'error'))
+                    sys.exit(1)
+                success, text = commands.snapshot_build(args[1], args[2], args[3] if len(args) > 3 else None, store_dir)
+            elif len(args) > 1:
+                print(utils.color_text(translator.translate('snapshot.required_args'), 'error'))
+                sys.exit(1)
+            else:
+                success, text = commands.snapshot_save(args[0] if args else os.getcwd(), store_dir, message)
+            print(text)
+            sys.exit(0 if success else 1)
+        elif command == "serve":
+            import program.server as server
+            if sys.argv[2:3] == ["stop"]:
+                success, text = server.stop()
+            elif sys.argv[2:3] == ["status"]:
+                success, text = server.status()
+            else:
+                max_memory = pop_option("--max-memory", str(server.DEFAULT_MAX_MEMORY // (1024 * 1024)))
+                if not max_memory.isdigit() or int(max_memory) < 1:
+                    print(utils.color_text(translator.translate('serve.bad_memory'), 'error'))
+                    sys.exit(1)
+                success, text = server.serve(int(max_memory) * 1024 * 1024)
+            print(text)
+            sys.exit(0 if success else 1)
+        elif command == "pwd":
+            print(utils.color_text(f"{translator.translate('commands.current_working_directory', default='Current working directory')}: {os.path.dirname(os.path.abspath(__file__))}", 'info'))
             sys.exit(0)
-        elif "pwd" in sys.argv[1:]:
-            print(utils.color_text(f"{translator.translate('commands.current_working_directory', default='Current working directory')}: {Path(__file__).parent}", 'info'))
-            sys.exit(0)
-        elif "tree" in sys.argv[1:]:
+        elif command == "tree":
             if len(sys.argv) > 2:
                 target_path = sys.argv[2]
             else:
                 target_path = os.getcwd()
-            print(commands.show_directory_tree(target_path))
-            sys.exit(0)
-        elif "init" in sys.argv[1:]:
+            message = commands.show_directory_tree(target_path)
+            if message:
+                print(message)
+            sys.exit(1 if message else 0)
+        elif command == "init":
             open_after_creation = "--open" in sys.argv
             remake_config = "--remake" in sys.argv
 
@@ -105,11 +328,11 @@ def parse_args():
             success, message = commands.init_config(target_path, open_after_creation, remake_config)
             print(utils.color_text(message, 'success' if success else 'error'))
             sys.exit(0)
-        elif "tui" in sys.argv[1:]:
+        elif command == "tui":
             from program.tui import run_tui
             run_tui()
             sys.exit(0)
-        elif "lang" in sys.argv[1:]:
+        elif command == "lang":
             if len(sys.argv) > 2 and sys.argv[2] in ['en', 'ru']:
                 success, message = commands.change_language(sys.argv[2])
                 print(utils.color_text(message, 'success' if success else 'error'))
@@ -127,8 +350,7 @@ def parse_args():
         if len(sys.argv) > 1 and sys.argv[1] == ".":
             project_path = os.getcwd()
         elif len(sys.argv) > 1 and not sys.argv[1].startswith('-'):
-            if sys.argv[1] not in ["unpack", "open", "conf", "reset", "redo", "update", "uninstall",
-                                   "version", "info", "pwd", "tui", "lang"]:
+            if sys.argv[1] not in SUBCOMMANDS:
                 potential_path = sys.argv[1]
                 if not os.path.exists(potential_path):
                     print(utils.color_text(translator.translate('commands.path_not_exists', path=potential_path), 'error'))
@@ -145,18 +367,84 @@ def parse_args():
 
 
 
+def start_profiling():
+    """
+    Включает профилирование, если передан --profile (или --profile-report/--profile-prof).
+    Возвращает (путь JSON-отчета, путь .prof) или None.
+    """
+    report_path = pop_option("--profile-report")
+    prof_path = pop_option("--profile-prof")
+    enabled = "--profile" in sys.argv
+    if enabled:
+        sys.argv.remove("--profile")
+    if not (enabled or report_path or prof_path):
+        return None
+
+    import program.profiling as profiling
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('-')]
+    command = args[0] if args and args[0] in ("redo", "unpack") else "generate"
+    profiling.start(command, cprofile_path=prof_path)
+    return report_path, prof_path
+
+
+def finish_profiling(report_path, prof_path):
+    """Выключает профилирование, печатает сводку в stderr и сохраняет отчеты"""
+    import program.profiling as profiling
+    import program.utils as utils
+
+    profile = profiling.stop()
+    if profile is None:
+        return
+    print(utils.color_text(f"\n{translator.translate('profiling.summary_title')}", 'info'), file=sys.stderr)
+    print(profiling.format_report(profile.report()), file=sys.stderr)
+    if report_path:
+        profiling.write_report(profile, report_path)
+        print(utils.color_text(translator.translate('profiling.report_saved', path=report_path), 'path'), file=sys.stderr)
+    if prof_path:
+        print(utils.color_text(translator.translate('profiling.cprofile_saved', path=prof_path), 'path'), file=sys.stderr)
+
+
 def main():
-    cli_project_path = parse_args()
-    commands.print_header()
+    if run_fast_command():
+        sys.exit(0)
+    exit_code = run_daemon_client()
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    import signal
+    signal.signal(signal.SIGINT, handle_ctrl_c)
+    from pathlib import Path
+    import program.utils as utils
+    import program.commands as commands
+    import program.exporters as exporters
+
+    output_format = pop_option("--format", "markdown")
+    since = pop_option("--since")
+    pruned_tree = "--pruned-tree" in sys.argv
+    if pruned_tree:
+        sys.argv.remove("--pruned-tree")
+    profile_paths = start_profiling()
+    try:
+        cli_project_path = parse_args()
+        commands.print_header()
 
-    config = utils.load_config()
-    config = utils.edit_config(config, cli_project_path)
+        utils.migrate_config()
+        config = utils.load_config()
+        config = utils.edit_config(config, cli_project_path)
 
-    project_path = config.get('project_path', '')
-    output_path = config.get('output_path', 'project_documentation.md')
+        project_path = config.get('project_path', '')
+        output_path = config.get('output_path', 'project_documentation.md')
+        known_suffixes = {'.md'} | {suffix for suffix, _ in exporters.EXPORT_FORMATS.values()}
+        if Path(output_path).suffix in known_suffixes:
+            output_path = str(Path(output_path).with_suffix(exporters.export_extension(output_format)))
 
-    result = commands.generate_documentation(project_path, output_path, config)
-    print(result)
+        from program.progress import Progress, ConsoleProgress
+        result = commands.generate_documentation(project_path, output_path, config, output_format,
+                                                 Progress(ConsoleProgress()), since, pruned_tree)
+        print(result)
+    finally:
+        if profile_paths is not None:
+            finish_profiling(*profile_paths)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import os
+import stat
+import hashlib
+from pathlib import Path
+from typing import Iterator, Optional
+import program.config_utils as cfg
+import program.config as config_module
+import program.document as document
+import program.scanner as scanner
+
+# Программный интерфейс для встраивания ofp в другие сервисы:
+#
+#   from program.api import iter_sections
+#   for record in iter_sections("/path/to/project", {"ignore_folders": ["build"]}):
+#       ...
+#
+# В отличие от commands.generate_documentation здесь нет побочных эффектов: конфиг вызывающего
+# не меняется, конфиги и latest_config.json не пишутся, нет вывода в консоль, hook'ов,
+# профилирования и обращений к переводчику (сообщения ConfigError - без перевода). Правила
+# игнорирования компилируются на каждый вызов, а не через общие кэши модуля config.
+
+
+def resolve_options(project_path: str, options: Optional[dict] = None, project_config: bool = True) -> dict:
+    """
+    Итоговая конфигурация сканирования: умолчания, затем файл конфигурации проекта
+    (если project_config), затем options с теми же ключами, что в конфиге
+    (ignore_folders, ignore_files, ignore_paths, whitelist_paths, show_hidden, output_path).
+    Неверные значения - config.ConfigError. options не изменяется.
+    """
+    config = config_module.default_config()
+    if project_config:
+        config.update(config_module.read_config_file(Path(project_path) / cfg.CONFIG_FILE,
+                                                     use_cache=False, translate=False) or {})
+    if options:
+        config.update(config_module.validate_config(dict(options), 'options', translate=False))
+    config['project_path'] = project_path
+    return config
+
+
+def iter_sections(project_path: str, options: Optional[dict] = None, project_config: bool = True,
+                  include_tree: bool = True) -> Iterator[dict]:
+    """
+    Лениво отдает записи документации проекта в порядке документа.
+
+    Первая запись (если include_tree) - структура проекта:
+        {'type': 'tree', 'project': имя папки, 'tree': текст дерева, 'files': число файлов}
+    Затем по записи на файл:
+        {'type': 'file', 'path': относительный путь, 'extension', 'language', 'size', 'mode',
+         'sha256': хэш исходных байтов, 'content': текст файла (не UTF-8 - как latin-1, из .md -
+         только блоки кода), 'error': None или текст}
+
+    Сканирование выполняется до первой записи и держит в памяти только пути файлов;
+    содержимое читается по одному файлу, когда вызывающий запрашивает следующую запись,
+    поэтому память ограничена самым большим файлом. Прервать обход можно, просто
+    перестав итерировать. Файлы проекта и документа не создаются и не изменяются.
+    """
+    root_path = os.path.abspath(project_path)
+    if not os.path.isdir(root_path):
+        raise NotADirectoryError(root_path)
+
+    config = resolve_options(root_path, options, project_config)
+    rules = config_module.CompiledConfig(config_module.project_scan_config(config, Path(config['output_path'])))
+    tree, files = scanner.scan(root_path, rules)
+
+    if include_tree:
+        yield {'type': 'tree', 'project': os.path.basename(root_path), 'tree': tree, 'files': len(files)}
+
+    for file_info in files:
+        record = {
+            'type': 'file',
+            'path': file_info['rel_path'],
+            'extension': file_info['extension'],
+            'language': file_info['language'],
+            'size': 0,
+            'mode': None,
+            'sha256': None,
+            'content': None,
+            'error': None,
+        }
+        try:
+            with open(file_info['path'], 'rb') as f:
+                record['mode'] = stat.S_IMODE(os.fstat(f.fileno()).st_mode)
+                raw = f.read()
+        except OSError as e:
+            record['error'] = str(e)
+            yield record
+            continue
+        record['size'] = len(raw)
+        record['sha256'] = hashlib.sha256(raw).hexdigest()
+        record['content'] = document.content_from_bytes(raw, file_info['extension'])
+        del raw
+        yield record
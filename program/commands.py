@@ -1,11 +1,28 @@
 import program.utils as utils
 import os
 import sys
+import stat
+import io
+import hashlib
+import threading
 import json
-import subprocess
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import re
+import fnmatch
 import program.config_utils as cfg
+import program.exporters as exporters
+import program.document as document
+import program.search as search
+import program.scanner as scanner
+import program.profiling as profiling
+import program.stats as stats
+import program.config as config_module
+import program.hooks as hooks
+import program.vcs as vcs
+import program.snapshots as snapshots
+from program.progress import Progress, ConsoleProgress, GenerationCanceled
 from typing import Optional
 from program.translator import translator
 
@@ -82,8 +99,131 @@ def print_project_info() -> str:
 """
 
 
-def unpack(doc_file: str, target_dir: str) -> (bool, Optional[str]):
-    """Распаковывает проект из файла документации"""
+def cat_section(doc_file: str, rel_path: str, cache=None) -> (bool, str):
+    """
+    Возвращает содержимое одного файла из документации, используя индекс секций, если он есть.
+    cache - кэш демона ofp serve (server.WarmCache), хранящий разобранные индексы между запросами.
+    """
+    doc_path = Path(doc_file.strip('"\''))
+    if not doc_path.exists():
+        return False, utils.color_text(translator.translate("commands.file_not_found", path=doc_path), 'error')
+
+    index = cache.index(doc_path) if cache is not None else document.load_index(doc_path)
+    if index is None:
+        # Индекса нет - находим секцию потоковым разбором без загрузки всего документа
+        rel_path = rel_path.replace('\\', '/').strip('/')
+        with open(doc_path, 'rb') as f:
+            for section in document.DocumentReader(f).sections():
+                if section.path == rel_path:
+                    return True, document.decode_content(section.read_source())
+        return False, utils.color_text(translator.translate("commands.section_not_found", path=rel_path), 'error')
+
+    section = document.find_section(index, rel_path)
+    if section is None:
+        return False, utils.color_text(translator.translate("commands.section_not_found", path=rel_path), 'error')
+
+    with open(doc_path, 'rb') as f:
+        return True, document.decode_content(document.read_section_source(f, section))
+
+
+def unsafe_section_path(rel_path: str) -> bool:
+    """Путь секции абсолютный, пустой или содержит '..' - такой файл нельзя писать при распаковке"""
+    parts = rel_path.replace('\\', '/').split('/')
+    return (not rel_path or rel_path.startswith(('/', '\\')) or re.match(r'^[A-Za-z]:', rel_path) is not None
+            or any(part in ('', '.', '..') for part in parts))
+
+
+def contained_path(target_path: Path, rel_path: str) -> Path:
+    """Путь файла секции внутри target_path; ValueError, если он выходит за ее пределы"""
+    root = target_path.resolve()
+    file_path = (root / rel_path).resolve()
+    if unsafe_section_path(rel_path) or root not in file_path.parents:
+        raise ValueError(translator.translate("commands.unsafe_path"))
+    return file_path
+
+
+class VerifiedWriter:
+    """
+    Записывает файлы распаковки на пуле потоков и проверяет их контрольные суммы
+    (хэш исходных байтов из заголовка секции). Пути секций не выходят за пределы
+    target_path, из прав доступа берутся только биты 0o777. Секции lossy (из .md
+    остались только блоки кода) восстанавливаются с предупреждением, без проверки хэша.
+    Число одновременно удерживаемых в памяти секций ограничено.
+    """
+
+    def __init__(self, target_path: Path, workers: Optional[int] = None):
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.target_path = target_path
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.lock = threading.Lock()
+        self.errors = []
+        self.mismatches = []
+        self.lossy = []
+        self.written = 0
+
+    def submit(self, rel_path: str, data: bytes, sha256: Optional[str] = None, mode: Optional[int] = None,
+               lossy: bool = False):
+        """Ставит файл в очередь на запись"""
+        self.slots.acquire()
+        future = self.executor.submit(self._write, rel_path, data, sha256, mode, lossy)
+        future.add_done_callback(lambda _: self.slots.release())
+
+    def _write(self, rel_path: str, data: bytes, sha256: Optional[str], mode: Optional[int], lossy: bool):
+        try:
+            file_path = contained_path(self.target_path, rel_path)
+            with profiling.phase('verify'):
+                if lossy:
+                    with self.lock:
+                        self.lossy.append(rel_path)
+                elif sha256 and hashlib.sha256(data).hexdigest() != sha256:
+                    with self.lock:
+                        self.mismatches.append(rel_path)
+            with profiling.phase('write'):
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    f.write(data)
+                if mode is not None and sys.platform != 'win32':
+                    os.chmod(file_path, mode & 0o777)
+            profiling.count('files_written')
+            profiling.count('bytes_written', len(data))
+            with self.lock:
+                self.written += 1
+        except Exception as e:
+            with self.lock:
+                self.errors.append((rel_path, str(e)))
+
+    def close(self) -> str:
+        """Дожидается записи всех файлов и возвращает отчет о проблемах"""
+        self.executor.shutdown(wait=True)
+        res = ""
+        for rel_path, error in sorted(self.errors):
+            res += utils.color_text(translator.translate("commands.file_creation_error", file=rel_path, error=error), 'warning') + "\n"
+        for rel_path in sorted(self.lossy):
+            res += utils.color_text(translator.translate("commands.lossy_section", file=rel_path), 'warning') + "\n"
+        for rel_path in sorted(self.mismatches):
+            res += utils.color_text(translator.translate("commands.checksum_mismatch", file=rel_path), 'error') + "\n"
+        if self.mismatches:
+            res += utils.color_text(translator.translate("commands.checksum_summary", count=len(self.mismatches)), 'error') + "\n"
+        return res
+
+
+def unpack_indexed(doc_path: Path, writer: VerifiedWriter, index: dict, only: str):
+    """Распаковывает секции, подходящие под маску, читая только их по индексу"""
+    with open(doc_path, 'rb') as doc:
+        for section in index['sections']:
+            if fnmatch.fnmatch(section['path'], only):
+                with profiling.phase('read'):
+                    data = document.read_section_source(doc, section)
+                profiling.count('bytes_read', len(data))
+                writer.submit(section['path'], data, section.get('sha256'), section.get('mode'), section.get('lossy', False))
+
+
+def unpack(doc_file: str, target_dir: str, only: Optional[str] = None) -> (bool, Optional[str]):
+    """
+    Распаковывает проект из файла документации; only - маска путей для выборочной распаковки.
+    Файлы пишутся параллельно, хэши секций проверяются, расхождения выводятся в конце.
+    """
 
     res = ""
     try:
@@ -97,51 +237,165 @@ def unpack(doc_file: str, target_dir: str) -> (bool, Optional[str]):
             return False, utils.color_text(translator.translate("commands.target_not_empty", path=target_path), 'error')
 
         target_path.mkdir(parents=True, exist_ok=True)
+        writer = VerifiedWriter(target_path)
 
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        structure_match = re.search(
-            r'# (?:Структура проекта|Project Structure):.*?\n```.*?\n(.*?)\n```',
-            content,
-            re.DOTALL
-        )
-
-        if not structure_match:
-            return False, utils.color_text(translator.translate("commands.doc_section_not_found"), 'error')
-
-        first_line = structure_match.group(1).split('\n')[0].strip()
-        root_folder_name = first_line.split('/')[0].rstrip('\\/')
-
-        files_section = re.finditer(
-            r'## (.*?)\n```(?:.*?)\n(.*?)\n```\n(?:---)?',
-            content,
-            re.DOTALL
-        )
+        try:
+            index = document.load_index(doc_path) if only else None
+            if index is not None:
+                unpack_indexed(doc_path, writer, index, only)
+            else:
+                with open(doc_path, 'rb') as doc:
+                    reader = document.DocumentReader(doc)
+                    if not reader.read_structure():
+                        writer.close()
+                        return False, utils.color_text(translator.translate("commands.doc_section_not_found"), 'error')
+
+                    for section in reader.sections():
+                        if only and not fnmatch.fnmatch(section.path, only):
+                            continue
+                        with profiling.phase('read'):
+                            data = section.read_source()
+                        profiling.count('bytes_read', len(data))
+                        writer.submit(section.path, data, section.sha256, section.mode, section.lossy)
+        except ValueError as e:
+            # Обрезанный или поврежденный документ: сообщаем после записи уже прочитанных файлов
+            res += writer.close()
+            res += utils.color_text(translator.translate("commands.doc_damaged", error=str(e)), 'error')
+            return False, res
+
+        res += writer.close()
+        if writer.mismatches or writer.errors:
+            return False, res
 
-        for match in files_section:
-            rel_path = match.group(1).strip()
-            file_content = match.group(2).strip()
+        res += utils.color_text(translator.translate("commands.unpack_success", path=target_path), 'success') + "\n"
+        return True, res
+    except Exception as e:
+        res += utils.color_text(translator.translate("commands.unpack_error", error=str(e)), 'error')
+        return False, res
 
-            if rel_path.startswith(root_folder_name + '/'):
-                rel_path = rel_path[len(root_folder_name) + 1:]
 
-            rel_path = rel_path.replace('│', '').strip()
+class _ChunkStream:
+    """Файлоподобная обертка над кусками секции для потоковой записи в tar"""
+
+    def __init__(self, chunks, digest):
+        self._chunks = chunks
+        self._digest = digest
+        self._buffer = b''
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._digest.update(chunk)
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def archive_mode(archive_path: str) -> tuple[str, str]:
+    """Определяет тип архива и режим tarfile по имени файла; '-' - tar.gz в stdout"""
+    name = archive_path.lower()
+    if name == '-':
+        return 'tar', 'w|gz'
+    if name.endswith('.zip'):
+        return 'zip', 'w'
+    for suffixes, mode in ((('.tar.gz', '.tgz'), 'w|gz'), (('.tar.bz2', '.tbz2'), 'w|bz2'),
+                           (('.tar.xz', '.txz'), 'w|xz'), (('.tar',), 'w|')):
+        if name.endswith(suffixes):
+            return 'tar', mode
+    raise ValueError(translator.translate("commands.archive_unknown_type", path=archive_path))
+
+
+def unpack_to_archive(doc_file: str, archive_path: str, only: Optional[str] = None) -> (bool, str):
+    """
+    Распаковывает проект из документации сразу в tar/zip архив без промежуточных файлов.
+    В памяти держится не больше одной секции; archive_path '-' пишет tar.gz в stdout.
+    """
+    import tarfile
+    import zipfile
 
-            try:
-                file_path = target_path / rel_path
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(file_content)
-            except Exception as e:
-                 res += utils.color_text(translator.translate("commands.file_creation_error", file=rel_path, error=str(e)), 'warning') + "\n"
+    res = ""
+    doc_path = Path(doc_file.strip('"\''))
+    if not doc_path.exists():
+        return False, utils.color_text(translator.translate("commands.file_not_found", path=doc_path), 'error')
 
-        res += utils.color_text(translator.translate("commands.unpack_success", path=target_path), 'success') + "\n"
-        return True, res
+    try:
+        kind, mode = archive_mode(archive_path)
+    except ValueError as e:
+        return False, utils.color_text(str(e), 'error')
+
+    to_stdout = archive_path == '-'
+    partial_path = None if to_stdout else Path(archive_path).with_name(Path(archive_path).name + '.part')
+    target = sys.stdout.buffer if to_stdout else open(partial_path, 'wb')
+    mismatches = []
+    lossy = []
+    count = 0
+    try:
+        archive = tarfile.open(fileobj=target, mode=mode) if kind == 'tar' else zipfile.ZipFile(target, mode, zipfile.ZIP_DEFLATED)
+        with archive, open(doc_path, 'rb') as doc:
+            reader = document.DocumentReader(doc)
+            if not reader.read_structure():
+                raise ValueError(translator.translate("commands.doc_section_not_found"))
+
+            now = time.time()
+            for section in reader.sections():
+                if only and not fnmatch.fnmatch(section.path, only):
+                    continue
+
+                if unsafe_section_path(section.path):
+                    raise ValueError(f"{section.path}: {translator.translate('commands.unsafe_path')}")
+                digest = hashlib.sha256()
+                file_mode = section.mode & 0o777 if section.mode is not None else 0o644
+                if kind == 'zip':
+                    info = zipfile.ZipInfo(section.path, time.localtime(now)[:6])
+                    info.external_attr = (stat.S_IFREG | file_mode) << 16
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with archive.open(info, 'w', force_zip64=True) as entry:
+                        for chunk in section.source_chunks():
+                            digest.update(chunk)
+                            entry.write(chunk)
+                else:
+                    info = tarfile.TarInfo(section.path)
+                    info.mode = file_mode
+                    info.mtime = now
+                    if section.size is not None and not section.lossy:
+                        info.size = section.size
+                        archive.addfile(info, _ChunkStream(section.source_chunks(), digest))
+                    else:
+                        data = section.read_source()
+                        digest.update(data)
+                        info.size = len(data)
+                        archive.addfile(info, io.BytesIO(data))
+
+                if section.lossy:
+                    lossy.append(section.path)
+                elif section.sha256 and digest.hexdigest() != section.sha256:
+                    mismatches.append(section.path)
+                count += 1
     except Exception as e:
-        res += utils.color_text(translator.translate("commands.unpack_error", error=str(e)), 'error')
+        if not to_stdout:
+            target.close()
+            partial_path.unlink(missing_ok=True)
+        return False, utils.color_text(translator.translate("commands.unpack_error", error=str(e)), 'error')
+
+    if not to_stdout:
+        target.close()
+        os.replace(partial_path, archive_path)
+
+    for rel_path in lossy:
+        res += utils.color_text(translator.translate("commands.lossy_section", file=rel_path), 'warning') + "\n"
+    for rel_path in mismatches:
+        res += utils.color_text(translator.translate("commands.checksum_mismatch", file=rel_path), 'error') + "\n"
+    if mismatches:
+        res += utils.color_text(translator.translate("commands.checksum_summary", count=len(mismatches)), 'error') + "\n"
         return False, res
 
+    res += utils.color_text(translator.translate("commands.archive_success", count=count, path=archive_path), 'success') + "\n"
+    return True, res
+
 
 def open_output_file(isOpen: bool = True) -> Optional[Path]:
     """Открывает выходной файл в приложении по умолчанию"""
@@ -167,6 +421,7 @@ def open_output_file(isOpen: bool = True) -> Optional[Path]:
     if not isOpen:
         return output_path
 
+    import subprocess
     try:
         if sys.platform == 'win32':
             os.startfile(output_path)
@@ -192,6 +447,7 @@ def open_config_file() -> Optional[Path]:
                 print(utils.color_text("Error: Config file not found in standard or latest paths", 'error'))
                 return None
 
+    import subprocess
     try:
         if sys.platform == 'win32':
             os.startfile(config_path)
@@ -251,8 +507,8 @@ def reset_output():
         print(utils.color_text(f"Error resetting output file: {str(e)}", 'error'))
 
 
-def redo_documentation():
-    """Повторно генерирует документацию с проверкой latest_paths.json"""
+def redo_documentation(cache=None):
+    """Повторно генерирует документацию с проверкой latest_paths.json (cache - см. write_documentation)"""
     config_path = utils.get_config_path()
     config = None
 
@@ -283,20 +539,6 @@ def redo_documentation():
         print(utils.color_text(f"Using parent directory of config file as project path: {config['project_path']}", 'info'))
 
     try:
-        root_path = os.path.normpath(config['project_path'])
-        root_name = os.path.basename(root_path)
-
-        print(utils.color_text("\nScanning project structure...", 'info'))
-        print(utils.color_text("\nScanning project structure...", 'info'))
-        tree, files = utils.generate_file_tree(root_path, config)
-
-        print(utils.color_text("\nGenerating documentation...", 'info'))
-        md_content = (
-            f"# Project Structure: {root_name}\n\n"
-            f"```\n{root_name}/\n{tree}\n```\n\n"
-            f"# Files Content\n\n{utils.get_file_contents(files)}"
-        )
-
         output_path = Path(config['output_path'])
         if not output_path.parent.exists():
             latest_paths = utils.load_latest_paths()
@@ -304,11 +546,9 @@ def redo_documentation():
                 output_path = Path(latest_paths['output_path'])
                 print(utils.color_text(f"Using output path from latest paths: {output_path}", 'info'))
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
-
+        print(utils.color_text("\nGenerating documentation...", 'info'))
+        files = write_documentation(config['project_path'], str(output_path), config,
+                                    progress=Progress(ConsoleProgress()), cache=cache)
 
         print(utils.color_text("\nDocumentation regenerated successfully!", 'success'))
         print(utils.color_text(f"Output file: {output_path}", 'path'))
@@ -388,10 +628,14 @@ def init_config(dir_path: str = None, open_file: bool = False, remake: bool = Fa
         print(utils.color_text(error_msg, 'error'))
         return False, error_msg
     
-def generate_documentation(project_path: str, output_path: str, config: Optional[dict] = None) -> str:
+def generate_documentation(project_path: str, output_path: str, config: Optional[dict] = None,
+                           output_format: str = 'markdown', progress: Optional[Progress] = None,
+                           since: Optional[str] = None, pruned_tree: bool = False, cache=None) -> str:
     """
     Генерирует документацию проекта и сохраняет в указанный файл
     Возвращает строку с результатом операции
+    since - ревизия git: в документ попадают только файлы, измененные с нее
+    cache - кэш демона ofp serve (см. write_documentation)
     """
     from pathlib import Path
     import os
@@ -406,30 +650,23 @@ def generate_documentation(project_path: str, output_path: str, config: Optional
     if not os.path.isdir(project_path):
         return utils.color_text(translator.translate("commands.dir_not_exists", path=project_path), 'error')
 
-    try:
-        root_path = os.path.normpath(project_path)
-        root_name = os.path.basename(root_path)
+    if output_format != 'markdown' and output_format not in exporters.EXPORT_FORMATS:
+        return utils.color_text(translator.translate("commands.unknown_format", format=output_format), 'error')
+
+    changed = None
+    if since:
+        try:
+            changed = vcs.changed_files(project_path, since)
+        except vcs.GitError as e:
+            return utils.color_text(translator.translate("commands.since_failed", rev=since, error=str(e)), 'error')
 
+    try:
         config['project_path'] = project_path
         config['output_path'] = output_path
 
-        tree, files = utils.generate_file_tree(root_path, config)
-
-        # Получаем заголовки из переводчика
-        structure_title = translator.translate('doc.structure_title')
-        files_content_title = translator.translate('doc.files_content_title')
-
-        md_content = (
-            f"# {structure_title}: {root_name}\n\n"
-            f"```\n{root_name}/\n{tree}\n```\n\n"
-            f"# {files_content_title}\n\n{utils.get_file_contents(files)}"
-        )
-
+        files = write_documentation(project_path, output_path, config, output_format, progress,
+                                    changed=changed, pruned_tree=pruned_tree, cache=cache)
         output_path_obj = Path(output_path)
-        output_path_obj.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(output_path_obj, 'w', encoding='utf-8') as f:
-            f.write(md_content)
 
         utils.save_config(config)
         utils.save_latest_paths(str(output_path_obj), utils.load_latest_config())
@@ -439,12 +676,209 @@ def generate_documentation(project_path: str, output_path: str, config: Optional
             f"{utils.color_text(translator.translate('commands.output_file', path=output_path), 'path')}\n"
             f"{utils.color_text(translator.translate('commands.files_processed', count=len(files)), 'info')}"
         )
+        if changed is not None:
+            result += "\n" + utils.color_text(translator.translate(
+                'commands.since_summary', rev=since, changed=len(changed), documented=len(files)), 'info')
         return result
 
+    except GenerationCanceled:
+        return utils.color_text(translator.translate('commands.generation_canceled'), 'warning')
     except Exception as e:
         return utils.color_text(f"\n{translator.translate('common.error')}: {str(e)}", 'error')
 
 
+def scan_project(root_path: str, config: dict, output_path: Path, progress: Optional[Progress] = None,
+                 on_ignored=None, on_dir=None, changed: Optional[dict[str, str]] = None, pruned_tree: bool = False,
+                 dirs: Optional[dict] = None):
+    """
+    Сканирует проект, исключая сам документ и его индекс.
+    changed (путь -> статус git) оставляет только эти файлы: в полном дереве они помечены
+    статусом, а с pruned_tree дерево строится из одних измененных путей без обхода папок.
+    dirs (только для полного обхода) получает mtime и содержимое каждой папки, см. scanner.scan.
+    """
+    scan_config = config_module.project_scan_config(config, output_path)
+    if changed is None:
+        return utils.generate_file_tree(root_path, scan_config, progress, on_ignored, on_dir, dirs)
+    if pruned_tree:
+        return scanner.scan_paths(root_path, scan_config, changed, changed, on_ignored, on_dir)
+    tree, files = utils.generate_file_tree(root_path, scan_config, progress, on_ignored, on_dir)
+    return (scanner.mark_tree(tree, files, changed),
+            [file_info for file_info in files if file_info['rel_path'] in changed])
+
+
+def manifest_dirs(scanned_dirs: dict) -> dict[str, int]:
+    """
+    mtime обойденных папок для манифеста ('.' - корень). Слишком свежий mtime записывается
+    как 0: папку могли изменить после чтения в пределах той же отметки времени.
+    """
+    recent = time.time_ns() - cfg.RACY_NS
+    return {(rel_dir.rstrip('/') or '.'): (mtime_ns if mtime_ns is not None and mtime_ns < recent else 0)
+            for rel_dir, (mtime_ns, _) in scanned_dirs.items()}
+
+
+def _remove_quietly(*paths: Path):
+    """Удаляет файлы, если они есть, не обращая внимания на ошибки"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _skip_reporter(config: dict, output_path: Path, run_hooks: hooks.RunHooks):
+    """Функция для сканера, сообщающая hook'у on_file_skipped причину пропуска"""
+    rules = config_module.compile_config(config_module.project_scan_config(config, output_path))
+
+    def report(name: str, rel_path: str, is_dir: bool):
+        run_hooks.on_file_skipped(rel_path, rules.ignore_reason(name, rel_path, is_dir) or 'hook')
+
+    return report
+
+
+def write_documentation(project_path: str, output_path: str, config: dict,
+                        output_format: str = 'markdown', progress: Optional[Progress] = None,
+                        run_hooks: Optional[hooks.RunHooks] = None, changed: Optional[dict[str, str]] = None,
+                        pruned_tree: bool = False, cache=None) -> list[dict[str, str]]:
+    """
+    Сканирует проект и записывает документацию без сохранения конфигов.
+    Файл сначала пишется во временный *.part и подменяется целиком,
+    поэтому прерванная (или отмененная через progress) запись не оставляет частичного результата.
+    Рядом с Markdown-документом сохраняется индекс секций (*.idx).
+    run_hooks - обработчики событий; по умолчанию собираются из конфига и entry points.
+    changed и pruned_tree ограничивают документ измененными файлами (см. scan_project).
+    cache - теплый кэш демона ofp serve (server.WarmCache): результат сканирования, готовые
+    секции неизмененных файлов и признак того, что документ уже соответствует проекту.
+    """
+    started = time.perf_counter()
+    root_path = os.path.normpath(project_path)
+    root_name = os.path.basename(root_path)
+    if run_hooks is None:
+        run_hooks = hooks.load(config)
+    if cache is not None and run_hooks.active():
+        # Обработчикам событий нужен настоящий обход и чтение файлов
+        cache = None
+
+    output_path_obj = Path(output_path)
+    index_path = document.index_path_for(output_path_obj)
+    if progress is not None:
+        progress.start('scan')
+    on_ignored = _skip_reporter(config, output_path_obj, run_hooks) if run_hooks.on_file_skipped else None
+    scan = cache.scan_project if cache is not None else scan_project
+    scanned_dirs = {} if changed is None else None
+    tree, files = scan(root_path, config, output_path_obj, progress, on_ignored, run_hooks.on_dir_enter,
+                       changed, pruned_tree, scanned_dirs)
+
+    stats = []
+    with profiling.phase('stat'):
+        for file_info in files:
+            try:
+                stats.append(os.stat(file_info['path']))
+            except OSError:
+                stats.append(None)
+    profiling.count('stats', len(files))
+    if cache is not None and output_format == 'markdown' and cache.output_current(output_path_obj, tree, files, stats):
+        # Ни структура, ни файлы не менялись с прошлой записи этого документа
+        if progress is not None:
+            progress.finish()
+        return files
+    if progress is not None:
+        progress.start('write', len(files), sum(file_stat.st_size for file_stat in stats if file_stat))
+
+    output_path_obj.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = output_path_obj.with_name(output_path_obj.name + '.part')
+    partial_index_path = index_path.with_name(index_path.name + '.part')
+
+    try:
+        if output_format in exporters.EXPORT_FORMATS:
+            exporters.export_documentation(root_path, tree, files, partial_path, output_format, progress)
+            os.replace(partial_path, output_path_obj)
+            if progress is not None:
+                progress.finish()
+            if run_hooks.on_run_done is not None:
+                run_hooks.on_run_done(_run_stats(root_path, output_path_obj, output_format, files, stats, started))
+            return files
+
+        writer = document.DocumentWriter(partial_path, root_name)
+        try:
+            manifest = [(file_info['rel_path'], file_stat.st_size if file_stat else 0, file_stat.st_mtime_ns if file_stat else 0)
+                        for file_info, file_stat in zip(files, stats)]
+            dirs, rules = None, None
+            if scanned_dirs is not None:
+                dirs = manifest_dirs(scanned_dirs)
+                rules = config_module.rules_fingerprint(config_module.project_scan_config(config, output_path_obj))
+            writer.write_header(translator.translate('doc.structure_title'),
+                                translator.translate('doc.files_content_title'), tree, manifest, dirs, rules)
+            for file_info, file_stat in zip(files, stats):
+                if progress is not None:
+                    progress.advance(file_info['rel_path'])
+                cached = cache.section(file_info['path'], file_stat) if cache is not None and file_stat else None
+                if cached is not None:
+                    digest, content, source = cached
+                    size = file_stat.st_size
+                else:
+                    read_started = time.perf_counter() if run_hooks.on_file_read is not None else 0.0
+                    raw, content, source = utils.read_file_data(file_info)
+                    if raw is None:
+                        if run_hooks.on_file_skipped is not None:
+                            run_hooks.on_file_skipped(file_info['rel_path'], 'read_error')
+                    elif run_hooks.on_file_read is not None:
+                        run_hooks.on_file_read(file_info['rel_path'], len(raw), time.perf_counter() - read_started)
+                    digest = None
+                    if raw is not None:
+                        with profiling.phase('hash'):
+                            digest = hashlib.sha256(raw).hexdigest()
+                        if cache is not None and file_stat:
+                            cache.store_section(file_info['path'], file_stat, digest, content, source)
+                    size = len(raw) if raw is not None else 0
+                if digest is not None:
+                    writer.set_file_hash(file_info['rel_path'], digest)
+                mode = stat.S_IMODE(file_stat.st_mode) if file_stat else None
+                with profiling.phase('write'):
+                    writer.write_section(file_info['rel_path'], file_info['language'], content, mode,
+                                         {**source, 'sha256': digest} if digest is not None else None)
+                if run_hooks.on_section_written is not None:
+                    run_hooks.on_section_written(file_info['rel_path'], dict(writer.sections[-1]))
+                if progress is not None:
+                    progress.done(size)
+            writer.write_footer()
+        finally:
+            writer.close()
+
+        with profiling.phase('index'):
+            writer.write_index(partial_index_path, output_path_obj)
+        profiling.count('bytes_written', os.path.getsize(partial_path))
+        if progress is not None:
+            progress.check_cancel()
+    except BaseException:
+        _remove_quietly(partial_path, partial_index_path)
+        raise
+
+    os.replace(partial_path, output_path_obj)
+    os.replace(partial_index_path, index_path)
+    if cache is not None:
+        cache.remember_output(output_path_obj, tree, files, stats)
+    if progress is not None:
+        progress.finish()
+    if run_hooks.on_run_done is not None:
+        run_hooks.on_run_done(_run_stats(root_path, output_path_obj, output_format, files, stats, started))
+
+    return files
+
+
+def _run_stats(root_path: str, output_path: Path, output_format: str, files: list, stats: list,
+               started: float) -> dict:
+    """Итоги генерации для hook'а on_run_done"""
+    return {
+        'project_path': root_path,
+        'output_path': str(output_path),
+        'format': output_format,
+        'files': len(files),
+        'bytes': sum(file_stat.st_size for file_stat in stats if file_stat),
+        'output_bytes': os.path.getsize(output_path),
+        'seconds': time.perf_counter() - started,
+    }
+
+
 def ansi_to_textual(text: str) -> str:
     """Конвертирует ANSI-цвета в Textual-разметку"""
     color_map = {
@@ -479,87 +913,603 @@ def change_language(lang: str):
         return False, translator.translate("commands.language_change_error", error=str(e))
 
 
+def tree_view_config() -> dict:
+    """Правила игнорирования для просмотра дерева: умолчания, перекрытые конфигом пользователя"""
+    config = {
+        'ignore_folders': ['.git', '__pycache__', '.venv', 'node_modules'],
+        'ignore_files': ['*.pyc', '*.pyo', '*.pyd', '*.so', '*.dll', '*.exe'],
+        'ignore_paths': [],
+        'show_hidden': False,
+        'whitelist_paths': []
+    }
+
+    user_config = utils.load_config()
+    if user_config:
+        for key in ['ignore_folders', 'ignore_files', 'ignore_paths', 'show_hidden', 'whitelist_paths']:
+            if key in user_config:
+                config[key] = user_config[key]
+    return config
+
+
 def show_directory_tree(directory_path: str) -> str:
-    """Отображает древовидную структуру директории в консоли"""
+    """
+    Печатает древовидную структуру директории по мере обхода.
+    Возвращает сообщение об ошибке или пустую строку.
+    """
     print(utils.color_text(translator.translate('commands.generating_tree', path=directory_path, default=f"Generating directory tree for: {directory_path}"), 'info'))
+    if not os.path.exists(directory_path):
+        return utils.color_text(translator.translate("commands.path_not_exists", path=directory_path), 'error')
+    if not os.path.isdir(directory_path):
+        return utils.color_text(translator.translate("commands.not_directory", path=directory_path), 'error')
+
+    directory_path = os.path.abspath(directory_path)
+    write = sys.stdout.write
     try:
-        if not os.path.exists(directory_path):
-            return utils.color_text(translator.translate("commands.path_not_exists", path=directory_path), 'error')
-        if not os.path.isdir(directory_path):
-            return utils.color_text(translator.translate("commands.not_directory", path=directory_path), 'error')
-            
-        directory_path = os.path.abspath(directory_path)
-        root_name = os.path.basename(directory_path)
-        
-        config = {
-            'ignore_folders': ['.git', '__pycache__', '.venv', 'node_modules'],
-            'ignore_files': ['*.pyc', '*.pyo', '*.pyd', '*.so', '*.dll', '*.exe'],
-            'ignore_paths': [],
-            'show_hidden': False,
-            'whitelist_paths': []
-        }
-        
-        user_config = utils.load_config()
-        if user_config:
-            for key in ['ignore_folders', 'ignore_files', 'ignore_paths', 'show_hidden', 'whitelist_paths']:
-                if key in user_config:
-                    config[key] = user_config[key]
-        
-        def build_tree(path, prefix=''):
-            files = []
-            dirs = []
-            
-            try:
-                for item in sorted(os.listdir(path)):
-                    full_path = os.path.join(path, item)
-                    rel_path = os.path.relpath(full_path, directory_path)
-                    
-                    if not config['show_hidden'] and item.startswith('.'):
-                        continue
-                    if any(re.match(pattern.replace('*', '.*'), item) for pattern in config['ignore_files']) and not os.path.isdir(full_path):
-                        continue
-                    if item in config['ignore_folders'] and os.path.isdir(full_path):
-                        continue
-                    if any(re.match(pattern.replace('*', '.*'), rel_path) for pattern in config['ignore_paths']):
-                        continue
-                    
-                    if config['whitelist_paths'] and not any(re.match(pattern.replace('*', '.*'), rel_path) for pattern in config['whitelist_paths']):
-                        if not any(rel_path.startswith(os.path.normpath(p)) for p in config['whitelist_paths']):
-                            continue
-                            
-                    if os.path.isdir(full_path):
-                        dirs.append(item)
-                    else:
-                        files.append(item)
-            except PermissionError:
-                return "├── [Permission denied]\n"
-            except Exception as e:
-                return f"├── [Error: {str(e)}]\n"
-            
-            tree = ""
-            count = len(dirs) + len(files)
-            idx = 0
-            
-            for i, d in enumerate(dirs):
-                idx += 1
-                is_last = (idx == count)
-                current_prefix = "└── " if is_last else "├── "
-                next_prefix = "    " if is_last else "│   "
-                full_path = os.path.join(path, d)
-                tree += f"{prefix}{current_prefix}{d}/\n"
-                tree += build_tree(full_path, prefix + next_prefix)
-        
-            for i, f in enumerate(files):
-                idx += 1
-                is_last = (idx == count)
-                tree += f"{prefix}{'└── ' if is_last else '├── '}{f}\n"
-            
-            return tree
-        
-        tree = build_tree(directory_path)
-        result = f"\n{root_name}/\n{tree}"
-        return utils.color_text(result, 'highlight')
+        write(utils.color_text(f"\n{os.path.basename(directory_path)}/", 'highlight') + "\n")
+        for line in scanner.iter_tree(directory_path, tree_view_config()):
+            write(utils.color_text(line, 'highlight') + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Вывод обрезан (например, `ofp tree | head`) - молча выходим
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
     except Exception as e:
         import traceback
         trace = traceback.format_exc()
         return utils.color_text(f"\n{translator.translate('common.error')}: {str(e)}\n{trace}", 'error')
+    return ''
+
+
+def load_batch_manifest(manifest_path: str) -> list[dict]:
+    """
+    Читает манифест пакетной генерации.
+    Манифест - JSON-список заданий или объект с ключом "jobs". Задание - строка
+    с путем к проекту или объект {"project", "output", "format", "config", "timeout"}.
+    Относительные пути считаются от папки манифеста.
+    """
+    manifest_file = Path(manifest_path)
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if isinstance(manifest, dict):
+        manifest = manifest.get('jobs', [])
+    if not isinstance(manifest, list):
+        raise ValueError(translator.translate('commands.batch_manifest_invalid'))
+
+    base_dir = manifest_file.parent
+    jobs = []
+    for entry in manifest:
+        if isinstance(entry, str):
+            entry = {'project': entry}
+        if not isinstance(entry, dict) or not entry.get('project'):
+            raise ValueError(translator.translate('commands.batch_manifest_invalid'))
+
+        project_path = os.path.abspath(base_dir / entry['project'])
+        output_format = entry.get('format', 'markdown')
+        if output_format != 'markdown' and output_format not in exporters.EXPORT_FORMATS:
+            raise ValueError(translator.translate("commands.unknown_format", format=output_format))
+        output_path = entry.get('output') or str(
+            Path(project_path) / f"project_documentation{exporters.export_extension(output_format)}")
+        jobs.append({
+            'project': project_path,
+            'output': os.path.abspath(base_dir / output_path),
+            'format': output_format,
+            'config': entry.get('config') or {},
+            'timeout': entry.get('timeout'),
+        })
+    return jobs
+
+
+def _run_batch_job(job: dict, lang: str, conn) -> None:
+    """Выполняет одно задание пакетной генерации в отдельном процессе"""
+    translator.set_language(lang)
+    started = time.perf_counter()
+    result = {'project': job['project'], 'output': job['output'], 'status': 'ok', 'files': 0, 'error': None}
+    try:
+        if not os.path.isdir(job['project']):
+            raise FileNotFoundError(translator.translate("commands.dir_not_exists", path=job['project']))
+
+        config = utils.load_project_config(job['project'], job['config'])
+        config['output_path'] = job['output']
+        output_name = Path(job['output']).name
+        if output_name not in config['ignore_files']:
+            config['ignore_files'].append(output_name)
+
+        result['files'] = len(write_documentation(job['project'], job['output'], config, job['format']))
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    conn.send(result)
+    conn.close()
+
+
+def batch_generate(manifest_path: str, workers: Optional[int] = None, timeout: Optional[float] = None,
+                   report_path: Optional[str] = None) -> tuple[bool, str]:
+    """
+    Генерирует документацию для всех проектов из манифеста на пуле процессов.
+    Каждое задание выполняется в собственном процессе со своим конфигом,
+    latest_config.json и конфиги проектов не изменяются.
+    """
+    import multiprocessing
+    import multiprocessing.connection
+
+    try:
+        jobs = load_batch_manifest(manifest_path)
+    except Exception as e:
+        return False, utils.color_text(translator.translate('commands.batch_manifest_error', error=str(e)), 'error')
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    ctx = multiprocessing.get_context()
+    pending = list(enumerate(jobs))
+    pending.reverse()
+    running = {}
+    results = [None] * len(jobs)
+    started_all = time.perf_counter()
+
+    while pending or running:
+        while pending and len(running) < workers:
+            index, job = pending.pop()
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            process = ctx.Process(target=_run_batch_job, args=(job, translator.current_lang, child_conn), daemon=True)
+            process.start()
+            child_conn.close()
+            job_timeout = job['timeout'] if job['timeout'] is not None else timeout
+            deadline = time.perf_counter() + job_timeout if job_timeout else None
+            running[parent_conn] = (index, job, process, deadline, time.perf_counter())
+
+        for conn in multiprocessing.connection.wait(list(running), timeout=0.1):
+            index, job, process, _, job_started = running.pop(conn)
+            try:
+                results[index] = conn.recv()
+            except EOFError:
+                results[index] = {'project': job['project'], 'output': job['output'], 'status': 'failed',
+                                  'files': 0, 'error': f"exit code {process.exitcode}",
+                                  'seconds': round(time.perf_counter() - job_started, 3)}
+            conn.close()
+            process.join()
+
+        now = time.perf_counter()
+        for conn, (index, job, process, deadline, job_started) in list(running.items()):
+            if deadline is None or now < deadline:
+                continue
+            process.terminate()
+            process.join()
+            conn.close()
+            del running[conn]
+            index_path = document.index_path_for(job['output'])
+            for partial_path in (Path(job['output']).with_name(Path(job['output']).name + '.part'),
+                                 index_path.with_name(index_path.name + '.part')):
+                if partial_path.exists():
+                    partial_path.unlink()
+            results[index] = {'project': job['project'], 'output': job['output'], 'status': 'timeout',
+                              'files': 0, 'error': None, 'seconds': round(now - job_started, 3)}
+
+    total_seconds = round(time.perf_counter() - started_all, 3)
+    lines = []
+    for result in results:
+        color = 'success' if result['status'] == 'ok' else 'error'
+        line = translator.translate('commands.batch_job_line', status=result['status'], project=result['project'],
+                                    output=result['output'], files=result['files'], seconds=result['seconds'])
+        if result['error']:
+            line += f": {result['error']}"
+        lines.append(utils.color_text(line, color))
+
+    succeeded = sum(1 for result in results if result['status'] == 'ok')
+    lines.append(utils.color_text(translator.translate('commands.batch_summary', ok=succeeded, total=len(results),
+                                                       seconds=total_seconds), 'info'))
+
+    if report_path:
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump({'jobs': results, 'succeeded': succeeded, 'total': len(results),
+                           'seconds': total_seconds}, f, indent=2, ensure_ascii=False)
+            lines.append(utils.color_text(translator.translate('commands.batch_report_saved', path=report_path), 'path'))
+        except Exception as e:
+            lines.append(utils.color_text(translator.translate('commands.batch_report_error', error=str(e)), 'error'))
+
+    return succeeded == len(results), "\n".join(lines)
+
+
+def _hash_file(path: str) -> Optional[str]:
+    """Считает sha256 файла потоково"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(document.CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _resolve_doc_and_project(doc_file: Optional[str], project_dir: Optional[str]) -> tuple[Optional[Path], Optional[str]]:
+    """Определяет документ и папку проекта: по аргументам, иначе по конфигу"""
+    doc_path = Path(doc_file.strip('"\'')) if doc_file else open_output_file(False)
+    if doc_path is None:
+        return None, None
+    if project_dir:
+        return doc_path, os.path.abspath(project_dir)
+    return doc_path, utils.load_config().get('project_path') or str(doc_path.resolve().parent)
+
+
+def _scan_with_manifest(root_path: str, scan_config: dict, manifest: dict) -> Optional[tuple[list, int]]:
+    """
+    Находит файлы проекта, сверяясь с папками манифеста: папка с прежним mtime не читается,
+    ее содержимое берется из манифеста; папка с другим mtime перечитывается, новая обходится
+    целиком. Возвращает (файлы, число непрочитанных папок) или None, если в манифесте нет
+    mtime папок или правила игнорирования с тех пор изменились.
+    """
+    dir_mtimes = manifest['dir_mtimes']
+    if not dir_mtimes or manifest['rules'] != config_module.rules_fingerprint(scan_config):
+        return None
+
+    # Содержимое папок по манифесту: папка -> [(имя, это папка)]
+    children = {}
+    for rel_path in manifest['files']:
+        parent, _, name = rel_path.rpartition('/')
+        children.setdefault(parent or '.', []).append((name, False))
+    for directory in dir_mtimes:
+        if directory != '.':
+            parent, _, name = directory.rpartition('/')
+            children.setdefault(parent or '.', []).append((name, True))
+
+    files = []
+    skipped = 0
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        recorded = dir_mtimes.get(rel_dir.rstrip('/') or '.')
+        if recorded is None:
+            files.extend(scanner.scan_subtree(root_path, rel_dir, scan_config))
+            continue
+        try:
+            if recorded and os.stat(os.path.join(root_path, rel_dir)).st_mtime_ns == recorded:
+                entries = children.get(rel_dir.rstrip('/') or '.', [])
+                skipped += 1
+            else:
+                entries = scanner.dir_entries(root_path, rel_dir, scan_config)
+        except OSError:
+            # Папки больше нет - ее файлы окажутся среди удаленных
+            continue
+        for name, is_dir in entries:
+            rel_path = f"{rel_dir}{name}"
+            if is_dir:
+                pending.append(f"{rel_path}/")
+            else:
+                file_ext = os.path.splitext(name)[1]
+                files.append({'path': os.path.join(root_path, rel_path), 'rel_path': rel_path,
+                              'extension': file_ext, 'language': scanner.get_language(file_ext)})
+    return files, skipped
+
+
+def compare_with_manifest(doc_path: Path, project_path: str) -> dict:
+    """
+    Сравнивает проект с манифестом документа. Папки, mtime которых не изменился, не
+    перечитываются (см. _scan_with_manifest). Затем сверяются размер и mtime файлов,
+    хэш считается (параллельно) только для файлов с тем же размером, но другим mtime.
+    """
+    manifest = document.read_manifest(doc_path)
+    if manifest is None:
+        raise ValueError(translator.translate("commands.manifest_not_found", path=doc_path))
+
+    root_path = os.path.normpath(project_path)
+    config = utils.load_project_config(project_path)
+    scan_config = config_module.project_scan_config(config, doc_path)
+    scanned = _scan_with_manifest(root_path, scan_config, manifest)
+    if scanned is None:
+        _, files = scan_project(root_path, config, doc_path)
+        dirs_skipped = 0
+    else:
+        files, dirs_skipped = scanned
+    profiling.count('dirs_skipped', dirs_skipped)
+
+    known = manifest['files']
+    current = {}
+    changed = []
+    to_hash = []
+    for file_info in files:
+        rel_path = file_info['rel_path']
+        current[rel_path] = file_info['path']
+        entry = known.get(rel_path)
+        if entry is None:
+            continue
+        try:
+            file_stat = os.stat(file_info['path'])
+        except OSError:
+            changed.append(rel_path)
+            continue
+        if file_stat.st_size != entry['size']:
+            changed.append(rel_path)
+        elif file_stat.st_mtime_ns != entry['mtime_ns']:
+            to_hash.append(rel_path)
+
+    if to_hash:
+        with ThreadPoolExecutor() as executor:
+            digests = executor.map(_hash_file, [current[rel_path] for rel_path in to_hash])
+            for rel_path, digest in zip(to_hash, digests):
+                if digest != known[rel_path]['sha256']:
+                    changed.append(rel_path)
+
+    return {
+        'added': sorted(set(current) - set(known)),
+        'removed': sorted(set(known) - set(current)),
+        'changed': sorted(changed),
+        'hashed': len(to_hash),
+        'dirs_skipped': dirs_skipped,
+        'files': current,
+    }
+
+
+def project_status(doc_file: Optional[str] = None, project_dir: Optional[str] = None) -> tuple[bool, str]:
+    """Показывает, какие файлы проекта изменились с момента генерации документации"""
+    doc_path, project_path = _resolve_doc_and_project(doc_file, project_dir)
+    if doc_path is None or not doc_path.exists():
+        return False, utils.color_text(translator.translate("commands.file_not_found", path=doc_path), 'error')
+
+    try:
+        result = compare_with_manifest(doc_path, project_path)
+    except Exception as e:
+        return False, utils.color_text(f"{translator.translate('common.error')}: {str(e)}", 'error')
+
+    lines = []
+    for mark, key, color in (('M', 'changed', 'warning'), ('A', 'added', 'success'), ('D', 'removed', 'error')):
+        lines.extend(utils.color_text(f"{mark} {rel_path}", color) for rel_path in result[key])
+
+    if not (result['changed'] or result['added'] or result['removed']):
+        lines.append(utils.color_text(translator.translate("commands.status_up_to_date", path=doc_path), 'success'))
+        return True, "\n".join(lines)
+
+    lines.append(utils.color_text(translator.translate(
+        "commands.status_summary", changed=len(result['changed']), added=len(result['added']),
+        removed=len(result['removed'])), 'info'))
+    return False, "\n".join(lines)
+
+
+def _read_doc_sections(doc_path: Path, rel_paths: set) -> dict[str, str]:
+    """Читает из документа содержимое только нужных секций"""
+    contents = {}
+    index = document.load_index(doc_path)
+    with open(doc_path, 'rb') as f:
+        if index is not None:
+            for section in index['sections']:
+                if section['path'] in rel_paths:
+                    contents[section['path']] = document.decode_content(document.read_section_source(f, section))
+        else:
+            for section in document.DocumentReader(f).sections():
+                if section.path in rel_paths:
+                    contents[section.path] = document.decode_content(section.read_source())
+    return contents
+
+
+def project_diff(doc_file: Optional[str] = None, project_dir: Optional[str] = None) -> tuple[bool, str]:
+    """Показывает построчные отличия проекта от документации без ее перегенерации"""
+    import difflib
+
+    doc_path, project_path = _resolve_doc_and_project(doc_file, project_dir)
+    if doc_path is None or not doc_path.exists():
+        return False, utils.color_text(translator.translate("commands.file_not_found", path=doc_path), 'error')
+
+    try:
+        result = compare_with_manifest(doc_path, project_path)
+        old_contents = _read_doc_sections(doc_path, set(result['changed']) | set(result['removed']))
+    except Exception as e:
+        return False, utils.color_text(f"{translator.translate('common.error')}: {str(e)}", 'error')
+
+    lines = []
+    for rel_path in sorted(result['changed'] + result['added'] + result['removed']):
+        old_text = old_contents.get(rel_path, '')
+        new_text = ''
+        if rel_path in result['files']:
+            extension = os.path.splitext(rel_path)[1]
+            new_text = utils.read_file_content({'path': result['files'][rel_path], 'extension': extension})
+        from_name = f"a/{rel_path}" if rel_path not in result['added'] else "/dev/null"
+        to_name = f"b/{rel_path}" if rel_path not in result['removed'] else "/dev/null"
+        for line in difflib.unified_diff(old_text.splitlines(), new_text.splitlines(), from_name, to_name, lineterm=''):
+            if line.startswith(('+++', '---')):
+                lines.append(utils.color_text(line, 'highlight'))
+            elif line.startswith('+'):
+                lines.append(utils.color_text(line, 'success'))
+            elif line.startswith('-'):
+                lines.append(utils.color_text(line, 'error'))
+            elif line.startswith('@@'):
+                lines.append(utils.color_text(line, 'info'))
+            else:
+                lines.append(line)
+
+    if not lines:
+        return True, utils.color_text(translator.translate("commands.status_up_to_date", path=doc_path), 'success')
+    return False, "\n".join(lines)
+
+
+def build_search_index(doc_file: str) -> tuple[bool, str]:
+    """Строит триграммный индекс документа для быстрого ofp grep"""
+    doc_path = Path(doc_file.strip('"\''))
+    if not doc_path.exists():
+        return False, utils.color_text(translator.translate("commands.file_not_found", path=doc_path), 'error')
+    try:
+        sections, trigrams = search.build_trigram_index(doc_path)
+    except Exception as e:
+        return False, utils.color_text(f"{translator.translate('common.error')}: {str(e)}", 'error')
+    return True, utils.color_text(translator.translate(
+        "commands.search_index_saved", path=search.trigram_path_for(doc_path), sections=sections, trigrams=trigrams
+    ), 'success')
+
+
+def grep_documents(pattern: str, doc_files: list[str], ignore_case: bool = False) -> tuple[bool, str]:
+    """
+    Ищет регулярное выражение в секциях документов и выводит совпадения как путь:строка.
+    При наличии триграммного индекса regex выполняется только по секциям-кандидатам.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        regex = re.compile(pattern, flags)
+    except re.error as e:
+        return False, utils.color_text(translator.translate("commands.grep_bad_pattern", error=str(e)), 'error')
+    literals = search.required_literals(pattern, flags)
+
+    lines = []
+    errors = []
+    for doc_file in doc_files:
+        doc_path = Path(doc_file.strip('"\''))
+        prefix = f"{utils.color_text(str(doc_path), 'highlight')}:" if len(doc_files) > 1 else ''
+        try:
+            for rel_path, number, line in search.grep_document(doc_path, regex, literals):
+                text = regex.sub(lambda match: utils.color_text(match.group(0), 'error'), line)
+                lines.append(f"{prefix}{utils.color_text(rel_path, 'path')}:{utils.color_text(str(number), 'info')}:{text}")
+        except Exception as e:
+            errors.append(utils.color_text(f"{doc_path}: {str(e)}", 'error'))
+
+    return bool(lines), "\n".join(lines + errors)
+
+
+def project_stats(directory_path: str, top: int = 10, with_lines: bool = True) -> tuple[bool, str]:
+    """
+    Отчет о составе проекта: где файлы и байты, что и каким правилом отброшено,
+    сколько примерно займет документация. Использует только сканер и stat
+    (и чтение содержимого для подсчета строк), поэтому намного быстрее генерации.
+    """
+    if not os.path.isdir(directory_path):
+        return False, utils.color_text(translator.translate("commands.dir_not_exists", path=directory_path), 'error')
+
+    started = time.perf_counter()
+    root_path = os.path.abspath(directory_path)
+    config = utils.load_project_config(root_path)
+    scan_config = config_module.project_scan_config(config, Path(config['output_path']))
+    rules = config_module.compile_config(scan_config)
+    ignored = {}
+
+    def count_ignored(name: str, rel_path: str, is_dir: bool):
+        reason = rules.ignore_reason(name, rel_path, is_dir)
+        ignored[reason] = ignored.get(reason, 0) + 1
+
+    tree, files = utils.generate_file_tree(root_path, scan_config, on_ignored=count_ignored)
+    result = stats.collect_stats(os.path.basename(root_path), tree, files, with_lines, top)
+    elapsed = time.perf_counter() - started
+
+    def row(name, files_count, size, lines) -> str:
+        return f"  {name:<24}{files_count:>8}{size:>12}{'' if lines is None else lines:>12}".rstrip()
+
+    columns = (translator.translate('stats.column_files'), translator.translate('stats.column_size'),
+               translator.translate('stats.column_lines') if with_lines else None)
+    out = [
+        utils.color_text(translator.translate('stats.title', path=root_path), 'highlight'),
+        utils.color_text(translator.translate(
+            'stats.summary', files=result['files'], size=utils.format_size(result['bytes']),
+            lines=result['lines'] if with_lines else '-', time=f"{elapsed:.2f}"), 'info'),
+    ]
+    for key, title in (('languages', 'stats.by_language'), ('extensions', 'stats.by_extension')):
+        out.append(utils.color_text(f"\n{translator.translate(title)}", 'info'))
+        out.append(utils.color_text(row('', *columns), 'path'))
+        for item in result[key][:top]:
+            out.append(row(item['name'], item['files'], utils.format_size(item['bytes']),
+                           item['lines'] if with_lines else None))
+
+    for key, title in (('largest_files', 'stats.largest_files'), ('largest_dirs', 'stats.largest_dirs')):
+        out.append(utils.color_text(f"\n{translator.translate(title)}", 'info'))
+        out.extend(f"  {utils.format_size(item['bytes']):>10}  {item['path']}" for item in result[key])
+
+    out.append(utils.color_text(f"\n{translator.translate('stats.ignored')}", 'info'))
+    for reason, count in sorted(ignored.items(), key=lambda item: (-item[1], item[0])):
+        out.append(f"  {count:>8}  {reason}")
+    if not ignored:
+        out.append(f"  {translator.translate('stats.nothing_ignored')}")
+
+    out.append(utils.color_text(
+        f"\n{translator.translate('stats.projected', size=utils.format_size(result['projected_bytes']))}", 'success'))
+    if result['errors']:
+        out.append(utils.color_text(translator.translate('stats.unreadable', count=result['errors']), 'warning'))
+    return True, "\n".join(out)
+
+
+def _snapshot_store(project_path: str, store_dir: Optional[str]) -> snapshots.SnapshotStore:
+    """Хранилище снимков: --store или папка .ofp-snapshots в проекте"""
+    return snapshots.SnapshotStore(store_dir or os.path.join(project_path, snapshots.STORE_DIR_NAME))
+
+
+def snapshot_save(project_dir: str, store_dir: Optional[str] = None, message: str = '') -> tuple[bool, str]:
+    """Сканирует проект и сохраняет его снимок в хранилище"""
+    if not os.path.isdir(project_dir):
+        return False, utils.color_text(translator.translate("commands.dir_not_exists", path=project_dir), 'error')
+
+    project_path = os.path.abspath(project_dir)
+    config = utils.load_project_config(project_path)
+    scan_config = config_module.project_scan_config(config, Path(config['output_path']))
+    store = _snapshot_store(project_path, store_dir)
+    try:
+        tree, files = utils.generate_file_tree(project_path, scan_config)
+        manifest = store.save(project_path, tree, files, message)
+    except (OSError, snapshots.SnapshotError) as e:
+        return False, utils.color_text(translator.translate("snapshot.save_failed", error=str(e)), 'error')
+
+    stats = manifest['stats']
+    return True, "\n".join([
+        utils.color_text(translator.translate("snapshot.saved", id=manifest['id']), 'success'),
+        utils.color_text(translator.translate(
+            "snapshot.save_stats", files=stats['files'], size=utils.format_size(stats['bytes']),
+            unchanged=stats['unchanged'], new_blobs=stats['new_blobs'],
+            stored=utils.format_size(stats['stored_bytes'])), 'info'),
+        utils.color_text(translator.translate("snapshot.store", path=store.root), 'path'),
+    ])
+
+
+def snapshot_list(project_dir: str, store_dir: Optional[str] = None) -> tuple[bool, str]:
+    """Выводит снимки проекта из хранилища"""
+    project_path = os.path.abspath(project_dir)
+    store = _snapshot_store(project_path, store_dir)
+    manifests = store.snapshots(project_path)
+    if not manifests:
+        return False, utils.color_text(translator.translate("snapshot.none", path=store.root), 'warning')
+
+    lines = []
+    for manifest in manifests:
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(manifest['created']))
+        line = (f"{utils.color_text(manifest['id'], 'highlight')}  {created}  "
+                f"{manifest['file_count']:>6} {translator.translate('snapshot.files')}  "
+                f"{utils.format_size(manifest['bytes']):>10}")
+        if manifest.get('message'):
+            line += f"  {manifest['message']}"
+        lines.append(line)
+    return True, "\n".join(lines)
+
+
+def snapshot_build(ref: str, output_path: str, project_dir: Optional[str] = None,
+                   store_dir: Optional[str] = None) -> tuple[bool, str]:
+    """Собирает полную Markdown-документацию из снимка (id, префикс id или latest)"""
+    project_path = os.path.abspath(project_dir or os.getcwd())
+    store = _snapshot_store(project_path, store_dir)
+    try:
+        # В общем хранилище (--store) снимок ищется среди всех проектов
+        manifest = store.find(ref, None if store_dir else project_path)
+        tree = store.tree(manifest)
+        entries = store.files(manifest)
+    except snapshots.SnapshotError as e:
+        return False, utils.color_text(translator.translate("snapshot.not_found", ref=ref, error=str(e)), 'error')
+
+    output_path_obj = Path(output_path)
+    output_path_obj.parent.mkdir(parents=True, exist_ok=True)
+    index_path = document.index_path_for(output_path_obj)
+    partial_path = output_path_obj.with_name(output_path_obj.name + '.part')
+    partial_index_path = index_path.with_name(index_path.name + '.part')
+    try:
+        writer = document.DocumentWriter(partial_path, manifest['project'])
+        try:
+            writer.write_header(translator.translate('doc.structure_title'),
+                                translator.translate('doc.files_content_title'), tree,
+                                [(entry['path'], entry['size'], entry['mtime_ns']) for entry in entries])
+            for entry in entries:
+                raw = store.get_blob(entry['sha256'])
+                writer.set_file_hash(entry['path'], entry['sha256'])
+                content, source = document.section_content(raw, os.path.splitext(entry['path'])[1])
+                writer.write_section(entry['path'], entry['language'], content, entry['mode'],
+                                     {**source, 'sha256': entry['sha256']})
+            writer.write_footer()
+        finally:
+            writer.close()
+        writer.write_index(partial_index_path, output_path_obj)
+    except (OSError, snapshots.SnapshotError) as e:
+        _remove_quietly(partial_path, partial_index_path)
+        return False, utils.color_text(translator.translate("snapshot.build_failed", error=str(e)), 'error')
+
+    os.replace(partial_path, output_path_obj)
+    os.replace(partial_index_path, index_path)
+    return True, utils.color_text(translator.translate("snapshot.built", id=manifest['id'], path=output_path_obj), 'success')
@@ -0,0 +1,238 @@
+import os
+import re
+import copy
+import json
+import hashlib
+import fnmatch
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import program.config_utils as cfg
+from program.translator import translator
+
+# Схема конфигурации: ключ -> ожидаемый тип значения (для списков - тип элементов)
+CONFIG_SCHEMA = {
+    'project_path': str,
+    'output_path': str,
+    'ignore_folders': [str],
+    'ignore_files': [str],
+    'ignore_paths': [str],
+    'whitelist_paths': [str],
+    'show_hidden': bool,
+    'language': str,
+    'hooks': [str],
+}
+
+# Предел записей в кэшах модуля: долгоживущий процесс (демон) обходит много проектов,
+# и без предела кэши росли бы вне его ограничения памяти. Вытесняются давно не использованные.
+CACHE_LIMIT = 64
+
+# Кэш прочитанных файлов: путь -> (mtime_ns, размер, проверенные данные)
+_file_cache: 'OrderedDict[str, tuple[int, int, dict]]' = OrderedDict()
+
+
+def _cache_get(cache: OrderedDict, key):
+    """Значение из LRU-кэша (или None); найденная запись становится самой свежей"""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: OrderedDict, key, value):
+    """Кладет значение в LRU-кэш и вытесняет старейшие записи сверх CACHE_LIMIT"""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > CACHE_LIMIT:
+        cache.popitem(last=False)
+    return value
+
+
+def clear_caches():
+    """Очищает кэши прочитанных и скомпилированных конфигов"""
+    _file_cache.clear()
+    _compiled_cache.clear()
+
+
+# Тексты ошибок без перевода: программный API не обращается к переводчику,
+# который при первой загрузке языка пишет кэш каталога на диск
+_UNTRANSLATED = {
+    'config.not_an_object': "Config {path} must be a JSON object",
+    'config.invalid_value': "Config {path}: '{option}' must be {expected}",
+    'config.invalid_json': "Config {path} is not valid JSON: {error}",
+}
+
+
+class ConfigError(ValueError):
+    """Ошибка чтения или проверки файла конфигурации"""
+
+
+def _error(key: str, translate: bool, **params) -> ConfigError:
+    return ConfigError(translator.translate(key, **params) if translate else _UNTRANSLATED[key].format(**params))
+
+
+def validate_config(data, source: str = '', translate: bool = True) -> dict:
+    """Проверяет словарь конфигурации по схеме и возвращает его (translate=False - сообщения без перевода)"""
+    if not isinstance(data, dict):
+        raise _error('config.not_an_object', translate, path=source)
+    for key, expected in CONFIG_SCHEMA.items():
+        if key not in data:
+            continue
+        value = data[key]
+        if isinstance(expected, list):
+            valid = isinstance(value, list) and all(isinstance(item, expected[0]) for item in value)
+            type_name = f"list[{expected[0].__name__}]"
+        else:
+            valid = isinstance(value, expected)
+            type_name = expected.__name__
+        if not valid:
+            raise _error('config.invalid_value', translate, path=source, option=key, expected=type_name)
+    return data
+
+
+def _parse_config_file(path: str, translate: bool) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise _error('config.invalid_json', translate, path=path, error=str(e))
+    return validate_config(data, path, translate)
+
+
+def read_config_file(path, use_cache: bool = True, translate: bool = True) -> Optional[dict]:
+    """
+    Читает и проверяет файл конфигурации. Файл разбирается заново только при
+    изменении mtime или размера; возвращается копия, которую можно менять.
+    use_cache=False читает файл напрямую, не заглядывая в кэш процесса и не пополняя его.
+    """
+    path = os.path.abspath(str(path))
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        if use_cache:
+            _file_cache.pop(path, None)
+        return None
+    if not use_cache:
+        return _parse_config_file(path, translate)
+
+    cached = _cache_get(_file_cache, path)
+    if cached is None or cached[0] != file_stat.st_mtime_ns or cached[1] != file_stat.st_size:
+        cached = _cache_put(_file_cache, path,
+                            (file_stat.st_mtime_ns, file_stat.st_size, _parse_config_file(path, translate)))
+    return copy.deepcopy(cached[2])
+
+
+def default_config() -> dict:
+    """Возвращает независимую копию конфигурации по умолчанию"""
+    return copy.deepcopy(cfg.DEFAULT_CONFIG)
+
+
+def project_scan_config(config: dict, output_path: Path) -> dict:
+    """Конфигурация сканирования, исключающая сам документ, его индекс, триграммы и хранилище снимков"""
+    name = Path(output_path).name
+    return {**config, 'ignore_files': config['ignore_files'] + [name, name + cfg.INDEX_SUFFIX, name + cfg.TRIGRAM_SUFFIX],
+            'ignore_folders': config['ignore_folders'] + [cfg.SNAPSHOT_DIR_NAME]}
+
+
+def _compile_patterns(patterns) -> Optional[re.Pattern]:
+    """Собирает glob-шаблоны в одно регулярное выражение (с учетом регистра ОС, как fnmatch)"""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f"(?:{fnmatch.translate(os.path.normcase(p))})" for p in patterns))
+
+
+class CompiledConfig:
+    """Конфигурация сканирования с заранее подготовленными правилами игнорирования"""
+
+    __slots__ = ('project_path', 'output_path', 'show_hidden', 'ignore_folders', 'ignore_names',
+                 'ignore_files_re', 'ignore_paths_re', 'whitelist', 'file_patterns', 'path_patterns')
+
+    def __init__(self, config: dict):
+        self.project_path = config.get('project_path', '')
+        self.output_path = config.get('output_path', '')
+        self.show_hidden = bool(config.get('show_hidden', False))
+        self.ignore_folders = frozenset(config.get('ignore_folders', ()))
+
+        # Шаблоны без спецсимволов сравниваются по множеству, остальные - одним regex
+        literal = [p for p in config.get('ignore_files', ()) if not any(c in p for c in '*?[')]
+        wildcard = [p for p in config.get('ignore_files', ()) if any(c in p for c in '*?[')]
+        self.ignore_names = frozenset(os.path.normcase(p) for p in literal)
+        self.ignore_files_re = _compile_patterns(wildcard)
+        self.ignore_paths_re = _compile_patterns(config.get('ignore_paths', ()))
+        self.file_patterns = tuple(config.get('ignore_files', ()))
+        self.path_patterns = tuple(config.get('ignore_paths', ()))
+        self.whitelist = tuple(p.replace('\\', '/').rstrip('/') + '/' for p in config.get('whitelist_paths', ()))
+
+    def ignores(self, name: str, rel_path: str, is_dir: bool) -> bool:
+        """Проверяет, нужно ли игнорировать файл/папку (rel_path - с прямыми слешами)"""
+        if self.whitelist and not any(rel_path.startswith(p) or p.startswith(rel_path + '/') for p in self.whitelist):
+            return True
+
+        if not self.show_hidden and name.startswith('.'):
+            return True
+
+        if self.ignore_paths_re is not None and self.ignore_paths_re.match(os.path.normcase(rel_path)):
+            return True
+
+        if is_dir:
+            return not self.ignore_folders.isdisjoint(rel_path.split('/'))
+
+        name = os.path.normcase(name)
+        if name in self.ignore_names:
+            return True
+        return self.ignore_files_re is not None and self.ignore_files_re.match(name) is not None
+
+    def ignore_reason(self, name: str, rel_path: str, is_dir: bool) -> Optional[str]:
+        """
+        Правило, из-за которого элемент игнорируется (например 'ignore_files: *.md'), или None.
+        Повторяет проверки ignores, но медленнее: шаблон ищется перебором.
+        """
+        if not self.ignores(name, rel_path, is_dir):
+            return None
+        if self.whitelist and not any(rel_path.startswith(p) or p.startswith(rel_path + '/') for p in self.whitelist):
+            return 'whitelist_paths'
+        if not self.show_hidden and name.startswith('.'):
+            return 'show_hidden'
+        for pattern in self.path_patterns:
+            if fnmatch.fnmatch(rel_path, pattern):
+                return f"ignore_paths: {pattern}"
+        if is_dir:
+            folder = next(part for part in rel_path.split('/') if part in self.ignore_folders)
+            return f"ignore_folders: {folder}"
+        for pattern in self.file_patterns:
+            if fnmatch.fnmatch(name, pattern):
+                return f"ignore_files: {pattern}"
+        return 'ignore_files'
+
+
+_compiled_cache: 'OrderedDict[tuple, CompiledConfig]' = OrderedDict()
+
+
+def config_key(config: dict) -> tuple:
+    """Ключ правил сканирования: конфиги с одинаковым ключом дают одинаковый результат обхода"""
+    return (
+        config.get('project_path', ''), config.get('output_path', ''), bool(config.get('show_hidden', False)),
+        tuple(config.get('ignore_folders', ())), tuple(config.get('ignore_files', ())),
+        tuple(config.get('ignore_paths', ())), tuple(config.get('whitelist_paths', ())),
+    )
+
+
+def rules_fingerprint(config: dict) -> str:
+    """
+    Хэш правил игнорирования (без путей проекта и документа) - для манифеста документа.
+    Порядок и повторы шаблонов на результат обхода не влияют и в хэш не входят.
+    """
+    show_hidden, *patterns = config_key(config)[2:]
+    rules = [show_hidden] + [sorted(set(items)) for items in patterns]
+    return hashlib.sha256(json.dumps(rules, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def compile_config(config) -> CompiledConfig:
+    """Возвращает CompiledConfig для словаря; одинаковые правила компилируются один раз"""
+    if isinstance(config, CompiledConfig):
+        return config
+    key = config_key(config)
+    compiled = _cache_get(_compiled_cache, key)
+    if compiled is None:
+        compiled = _cache_put(_compiled_cache, key, CompiledConfig(config))
+    return compiled
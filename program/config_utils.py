@@ -1,18 +1,27 @@
-from pathlib import Path
-from colorama import Fore
+import os
 
 PREFIX = "../data"
 VERSION_FILE=f'{PREFIX}/version'
 
 PROGRAM_NAME = "ofp"
 CONFIG_FILE = "project_documenter_config.json"
-LATEST_CONFIG_FILE = str(Path(__file__).parent / f"{PREFIX}/latest_config.json")
+PROGRAM_DIR = os.path.dirname(os.path.abspath(__file__))
+LATEST_CONFIG_FILE = os.path.join(PROGRAM_DIR, f"{PREFIX}/latest_config.json")
+# Файлы и папки, которые ofp создает рядом с документом и в проекте
+INDEX_SUFFIX = ".idx"
+TRIGRAM_SUFFIX = ".tri"
+SNAPSHOT_DIR_NAME = ".ofp-snapshots"
+# mtime ближе этого к моменту проверки не считается надежным: папку или файл могли
+# изменить еще раз в пределах той же отметки времени файловой системы
+RACY_NS = 2_000_000_000
+# Сокет демона ofp serve (можно переопределить переменной окружения OFP_SOCKET)
+SOCKET_FILE = os.environ.get('OFP_SOCKET') or os.path.normpath(os.path.join(PROGRAM_DIR, f"{PREFIX}/ofp.sock"))
 
 
 def get_version():
     """Получает версию из файла version или возвращает v0.0.0 при ошибке"""
     try:
-        with open(Path(__file__).parent / VERSION_FILE  , 'r') as f:
+        with open(os.path.join(PROGRAM_DIR, VERSION_FILE), 'r') as f:
             version = f.read().strip()
             if version and version[0].isdigit():
                 return f"v{version.split()[0]}"
@@ -23,14 +32,16 @@ def get_version():
 
 VERSION = get_version()
 
+# ANSI-коды цветов (те же, что colorama.Fore), чтобы не импортировать colorama на старте
 COLORS = {
-    'error': Fore.RED,
-    'success': Fore.GREEN,
-    'warning': Fore.YELLOW,
-    'info': Fore.CYAN,
-    'path': Fore.BLUE,
-    'highlight': Fore.MAGENTA
+    'error': '\033[31m',
+    'success': '\033[32m',
+    'warning': '\033[33m',
+    'info': '\033[36m',
+    'path': '\033[34m',
+    'highlight': '\033[35m'
 }
+RESET_COLOR = '\033[0m'
 
 LANGUAGE_MAPPING = {
     '.py': 'python',
@@ -92,4 +103,13 @@ DEFAULT_CONFIG = {
 
 DEFAULT_LATEST_CONFIG = {
     'language': 'en'
-}
\ No newline at end of file
+}
+
+def load_latest_language() -> str:
+    """Быстро читает язык из последних настроек без загрузки остальных модулей"""
+    try:
+        with open(LATEST_CONFIG_FILE, 'r', encoding='utf-8') as f:
+            import json
+            return json.load(f).get('language', DEFAULT_LATEST_CONFIG['language'])
+    except (OSError, ValueError, AttributeError):
+        return DEFAULT_LATEST_CONFIG['language']
@@ -0,0 +1,677 @@
+import os
+import re
+import json
+import base64
+import hashlib
+from pathlib import Path
+from typing import Optional
+import program.config_utils as cfg
+
+INDEX_SUFFIX = cfg.INDEX_SUFFIX
+INDEX_VERSION = 2
+
+# Формат 2: у каждой секции в заголовке записана длина содержимого в байтах,
+# а ограждение блока кода длиннее любой последовательности ` в содержимом.
+# sha256 - хэш исходного файла; файл не в UTF-8 хранится в base64 (encoding=base64, size=длина
+# исходных байтов), а секция .md, от которой остались только блоки кода, помечена lossy=1
+FORMAT_VERSION = 2
+FORMAT_MARKER = f"<!-- ofp-format: {FORMAT_VERSION} -->"
+CHUNK_SIZE = 1024 * 1024
+
+# Строки манифеста: f <sha256> <размер> <mtime_ns> <путь> - файл; d <sha256> <путь> или
+# D <sha256> <mtime_ns> <путь> - папка (хэш Меркла и mtime на момент обхода, 0 - неизвестен);
+# r <sha256> - отпечаток правил игнорирования, с которыми обходился проект
+EMPTY_HASH = '0' * 64
+MANIFEST_START = "<!-- ofp-manifest"
+MANIFEST_END = "-->"
+
+_BACKTICK_RUN = re.compile(r'`+')
+_SECTION_ATTRS = re.compile(rb'^## (.*) <!-- ofp: (.*?) -->$')
+
+
+def make_fence(content: str) -> str:
+    """Подбирает ограждение блока кода длиннее любой последовательности ` в тексте"""
+    longest = max((len(run) for run in _BACKTICK_RUN.findall(content)), default=0)
+    return '`' * max(3, longest + 1)
+
+
+def extract_code_blocks(content: str) -> str:
+    """Извлекает блоки кода из Markdown"""
+    lines = content.split('\n')
+    result = []
+    in_block = False
+    lang = ''
+    block = []
+
+    for line in lines:
+        if line.startswith('```') and not in_block:
+            in_block = True
+            lang = line[3:].strip()
+        elif line.startswith('```') and in_block:
+            in_block = False
+            if lang:
+                result.append(f"```{lang}")
+                result.extend(block)
+                result.append("```\n")
+            block = []
+            lang = ''
+        elif in_block:
+            block.append(line)
+        else:
+            result.append(line)
+
+    return '\n'.join(result)
+
+
+def decode_content(raw: bytes) -> str:
+    """Декодирует содержимое файла как utf-8, а при ошибке как latin-1"""
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def content_from_bytes(raw: bytes, extension: str) -> str:
+    """Превращает байты файла в текст для документации"""
+    try:
+        content = raw.decode('utf-8')
+        if extension == '.md':
+            content = extract_code_blocks(content)
+    except UnicodeDecodeError:
+        content = raw.decode('latin-1')
+    return content
+
+
+def section_content(raw: bytes, extension: str) -> tuple[str, dict]:
+    """
+    Текст секции для байтов файла и атрибуты, нужные для точного восстановления:
+    файл не в UTF-8 кодируется в base64, у .md с извлеченными блоками кода - признак lossy
+    """
+    try:
+        content = raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return base64.encodebytes(raw).decode('ascii'), {'size': len(raw), 'encoding': 'base64'}
+    if extension == '.md':
+        extracted = extract_code_blocks(content)
+        if extracted != content:
+            return extracted, {'size': len(raw), 'lossy': 1}
+    return content, {}
+
+
+def decode_base64_chunks(chunks):
+    """Потоково декодирует base64, разбитый на строки и куски произвольной длины"""
+    pending = b''
+    for chunk in chunks:
+        pending += b''.join(chunk.split())
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            yield base64.b64decode(pending[:usable], validate=True)
+            pending = pending[usable:]
+    if pending:
+        raise ValueError("base64 content is truncated")
+
+
+def parse_section_header(line: bytes) -> tuple[bytes, dict]:
+    """Разбирает заголовок секции: путь и атрибуты формата 2 (bytes=...)"""
+    match = _SECTION_ATTRS.match(line)
+    if not match:
+        return line[3:], {}
+    attrs = dict(item.split(b'=', 1) for item in match.group(2).split() if b'=' in item)
+    return match.group(1), {key.decode('ascii'): value.decode('ascii') for key, value in attrs.items()}
+
+
+def parent_dirs(rel_path: str):
+    """Перечисляет родительские папки пути вплоть до корня '.'"""
+    parts = rel_path.split('/')[:-1]
+    for depth in range(len(parts), 0, -1):
+        yield '/'.join(parts[:depth])
+    yield '.'
+
+
+def merkle_dirs(file_hashes: dict[str, str]) -> dict[str, str]:
+    """
+    Сворачивает хэши файлов в хэши папок в стиле дерева Меркла:
+    хэш папки - sha256 от отсортированного списка ее детей с их хэшами
+    """
+    children = {}
+    for rel_path, digest in file_hashes.items():
+        child, kind = rel_path, 'f'
+        for directory in parent_dirs(rel_path):
+            children.setdefault(directory, {})[child.rsplit('/', 1)[-1]] = (kind, child)
+            child, kind = directory, 'd'
+
+    dir_hashes = {}
+
+    def digest_of(directory: str) -> str:
+        if directory not in dir_hashes:
+            lines = []
+            for name, (kind, child) in sorted(children[directory].items()):
+                child_hash = file_hashes[child] if kind == 'f' else digest_of(child)
+                lines.append(f"{kind} {child_hash} {name}")
+            dir_hashes[directory] = hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+        return dir_hashes[directory]
+
+    for directory in children:
+        digest_of(directory)
+    return dir_hashes
+
+
+def read_manifest(doc_path) -> Optional[dict]:
+    """Читает манифест из заголовка документации, не трогая остальной файл"""
+    with open(doc_path, 'r', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line == MANIFEST_START:
+                break
+            if not line.startswith('<!-- ofp-format: '):
+                return None
+        else:
+            return None
+
+        manifest = {'files': {}, 'dirs': {}, 'dir_mtimes': {}, 'rules': None}
+        for line in f:
+            line = line.rstrip('\n')
+            if line == MANIFEST_END:
+                return manifest
+            kind, rest = line.split(' ', 1)
+            if kind == 'f':
+                digest, size, mtime_ns, rel_path = rest.split(' ', 3)
+                manifest['files'][rel_path] = {'sha256': digest, 'size': int(size), 'mtime_ns': int(mtime_ns)}
+            elif kind == 'd':
+                digest, rel_path = rest.split(' ', 1)
+                manifest['dirs'][rel_path] = digest
+            elif kind == 'D':
+                digest, mtime_ns, rel_path = rest.split(' ', 2)
+                manifest['dirs'][rel_path] = digest
+                manifest['dir_mtimes'][rel_path] = int(mtime_ns)
+            elif kind == 'r':
+                manifest['rules'] = rest
+    return None
+
+
+def index_path_for(doc_path) -> Path:
+    """Возвращает путь к индексу секций рядом с файлом документации"""
+    doc_path = Path(doc_path)
+    return doc_path.with_name(doc_path.name + INDEX_SUFFIX)
+
+
+class DocumentWriter:
+    """
+    Потоково пишет Markdown-документацию и запоминает байтовые смещения секций.
+    Пишет в бинарном режиме, чтобы смещения совпадали с байтами на диске.
+    """
+
+    def __init__(self, output_path, root_name: str):
+        self.output_path = Path(output_path)
+        self.root_name = root_name
+        self.sections = []
+        self._file = open(self.output_path, 'wb')
+        self._offset = 0
+        self._hash_offsets = {}
+        self._file_hashes = {}
+
+    def _write(self, text: str) -> int:
+        data = text.encode('utf-8')
+        self._file.write(data)
+        self._offset += len(data)
+        return len(data)
+
+    def _write_manifest(self, entries: list[tuple[str, int, int]], dirs: Optional[dict[str, int]] = None,
+                        rules: Optional[str] = None):
+        """
+        Записывает манифест (путь, размер, mtime) с пустыми хэшами фиксированной длины.
+        Хэши становятся известны по мере записи секций и вписываются на место в write_footer.
+        dirs - mtime всех обойденных папок ('.' - корень), в том числе пустых; rules - отпечаток правил.
+        """
+        self._write(f"{MANIFEST_START}\n")
+        if rules is not None:
+            self._write(f"r {rules}\n")
+        directories = set(dirs or ())
+        for rel_path, size, mtime_ns in entries:
+            self._hash_offsets[('f', rel_path)] = self._offset + 2
+            self._write(f"f {EMPTY_HASH} {size} {mtime_ns} {rel_path}\n")
+            directories.update(parent_dirs(rel_path))
+        for directory in sorted(directories):
+            self._hash_offsets[('d', directory)] = self._offset + 2
+            if dirs is not None:
+                self._write(f"D {EMPTY_HASH} {dirs.get(directory, 0)} {directory}\n")
+            else:
+                self._write(f"d {EMPTY_HASH} {directory}\n")
+        self._write(f"{MANIFEST_END}\n")
+
+    def set_file_hash(self, rel_path: str, digest: str):
+        """Запоминает хэш исходного файла для манифеста"""
+        self._file_hashes[rel_path] = digest
+
+    def _patch_manifest(self):
+        hashes = {('f', rel_path): digest for rel_path, digest in self._file_hashes.items()}
+        hashes.update({('d', directory): digest for directory, digest in merkle_dirs(self._file_hashes).items()})
+        for key, digest in hashes.items():
+            if key in self._hash_offsets:
+                self._file.seek(self._hash_offsets[key])
+                self._file.write(digest.encode('ascii'))
+        self._file.seek(self._offset)
+
+    def write_header(self, structure_title: str, files_content_title: str, tree: str,
+                     manifest: Optional[list[tuple[str, int, int]]] = None, dirs: Optional[dict[str, int]] = None,
+                     rules: Optional[str] = None):
+        """Записывает заголовок: метку формата, манифест файлов и папок и структуру проекта"""
+        fence = make_fence(tree)
+        self._write(f"{FORMAT_MARKER}\n")
+        if manifest is not None:
+            self._write_manifest(manifest, dirs, rules)
+        self._write(
+            f"# {structure_title}: {self.root_name}\n\n"
+            f"{fence}\n{self.root_name}/\n{tree}\n{fence}\n\n"
+            f"# {files_content_title}\n\n"
+        )
+
+    def write_section(self, rel_path: str, language: str, content: str, mode: Optional[int] = None,
+                      source: Optional[dict] = None):
+        """
+        Записывает секцию одного файла с длиной, хэшем и правами доступа и запоминает ее положение.
+        source - хэш исходных байтов (sha256) и атрибуты из section_content; без него
+        хэшируется само содержимое секции.
+        """
+        if self.sections:
+            self._write("\n")
+        data = content.encode('utf-8')
+        source = dict(source or {})
+        digest = source.pop('sha256', None) or hashlib.sha256(data).hexdigest()
+        fence = make_fence(content)
+        attrs = f"bytes={len(data)} sha256={digest}"
+        for key in ('size', 'encoding', 'lossy'):
+            if key in source:
+                attrs += f" {key}={source[key]}"
+        if mode is not None:
+            attrs += f" mode={mode:o}"
+        offset = self._offset
+        self._write(f"## {rel_path} <!-- ofp: {attrs} -->\n\n{fence}{language}\n")
+        content_offset = self._offset
+        self._file.write(data)
+        self._offset += len(data)
+        content_length = len(data)
+        self._write(f"\n{fence}\n\n---\n\n")
+        self.sections.append({
+            'path': rel_path,
+            'language': language,
+            'offset': offset,
+            'length': self._offset - offset,
+            'content_offset': content_offset,
+            'content_length': content_length,
+            'sha256': digest,
+            'mode': mode,
+            'size': int(source.get('size', content_length)),
+            'encoding': source.get('encoding'),
+            'lossy': bool(source.get('lossy')),
+        })
+
+    def write_footer(self):
+        """Записывает завершающую метку с числом секций - по ней обнаруживается обрезанный документ"""
+        self._write(f"<!-- ofp-end: sections={len(self.sections)} -->\n")
+        if self._hash_offsets:
+            self._patch_manifest()
+
+    def close(self):
+        """Закрывает файл документации"""
+        self._file.close()
+
+    def write_index(self, index_path, doc_path=None):
+        """Сохраняет индекс секций; doc_path - итоговое имя документа, если оно отличается"""
+        stat = os.stat(self.output_path)
+        index = {
+            'version': INDEX_VERSION,
+            'doc': Path(doc_path or self.output_path).name,
+            'doc_size': stat.st_size,
+            'doc_mtime_ns': stat.st_mtime_ns,
+            'sections': self.sections,
+        }
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_index(doc_path) -> Optional[dict]:
+    """Загружает индекс секций, если он есть и соответствует документу"""
+    index_path = index_path_for(doc_path)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        stat = os.stat(doc_path)
+    except (OSError, ValueError):
+        return None
+
+    if index.get('version') != INDEX_VERSION:
+        return None
+    if index.get('doc_size') != stat.st_size or index.get('doc_mtime_ns') != stat.st_mtime_ns:
+        return None
+    return index
+
+
+def find_section(index: dict, rel_path: str) -> Optional[dict]:
+    """Ищет секцию по относительному пути"""
+    rel_path = rel_path.replace('\\', '/').strip('/')
+    for section in index['sections']:
+        if section['path'] == rel_path:
+            return section
+    return None
+
+
+def read_section_bytes(doc_file, section: dict) -> bytes:
+    """Читает содержимое секции из открытого в бинарном режиме документа"""
+    doc_file.seek(section['content_offset'])
+    return doc_file.read(section['content_length'])
+
+
+def read_section_source(doc_file, section: dict) -> bytes:
+    """Байты исходного файла из секции индекса: содержимое base64 декодируется"""
+    data = read_section_bytes(doc_file, section)
+    if section.get('encoding') == 'base64':
+        return base64.b64decode(b''.join(data.split()), validate=True)
+    return data
+
+
+STRUCTURE_TITLES = (b"Project Structure", "Структура проекта".encode('utf-8'))
+
+
+class _LineSource:
+    """Построчное чтение бинарного файла с учетом смещений и возвратом строк"""
+
+    def __init__(self, f):
+        self._file = f
+        self._offset = f.tell()
+        self._pushed = []
+
+    def readline(self) -> tuple[bytes, int]:
+        if self._pushed:
+            return self._pushed.pop()
+        offset = self._offset
+        line = self._file.readline()
+        self._offset += len(line)
+        return line, offset
+
+    def push(self, line: bytes, offset: int):
+        self._pushed.append((line, offset))
+
+    def read(self, size: int) -> bytes:
+        data = self._file.read(size)
+        self._offset += len(data)
+        return data
+
+    def skip(self, size: int):
+        self._file.seek(size, os.SEEK_CUR)
+        self._offset += size
+
+
+def _framing(line: bytes) -> bytes:
+    """Строка без перевода строки - для сравнения служебных строк разметки"""
+    return line.rstrip(b'\r\n')
+
+
+def _strip_newline(line: bytes) -> bytes:
+    if line.endswith(b'\r\n'):
+        return line[:-2]
+    if line.endswith(b'\n'):
+        return line[:-1]
+    return line
+
+
+class Section:
+    """Секция файла в документации; содержимое читается потоково через chunks()"""
+
+    def __init__(self, path: str, language: str, offset: int, content_offset: int, chunks, skip=None,
+                 attrs: Optional[dict] = None):
+        self.path = path
+        self.language = language
+        self.attrs = attrs or {}
+        self.sha256 = self.attrs.get('sha256')
+        self.mode = int(self.attrs['mode'], 8) if 'mode' in self.attrs else None
+        self.encoding = self.attrs.get('encoding')
+        self.lossy = self.attrs.get('lossy') == '1'
+        self.offset = offset
+        self.content_offset = content_offset
+        self.content_length = 0
+        self.length = 0
+        self._chunks = chunks
+        self._skip = skip
+        self._started = False
+
+    def chunks(self):
+        """Отдает содержимое секции кусками; повторный вызов ничего не вернет"""
+        self._started = True
+        for chunk in self._chunks:
+            self.content_length += len(chunk)
+            yield chunk
+
+    def read(self) -> bytes:
+        """Читает все содержимое секции в память"""
+        return b''.join(self.chunks())
+
+    @property
+    def size(self) -> Optional[int]:
+        """Длина исходного файла (для формата 2) или None, если она неизвестна до чтения"""
+        if 'size' in self.attrs:
+            return int(self.attrs['size'])
+        return int(self.attrs['bytes']) if 'bytes' in self.attrs else None
+
+    def source_chunks(self):
+        """Отдает байты исходного файла кусками: содержимое base64 декодируется"""
+        if self.encoding == 'base64':
+            return decode_base64_chunks(self.chunks())
+        return self.chunks()
+
+    def read_source(self) -> bytes:
+        """Читает байты исходного файла в память"""
+        return b''.join(self.source_chunks())
+
+    def drain(self):
+        """Пропускает непрочитанное содержимое; для формата 2 - без чтения, по длине"""
+        if self._skip is not None and not self._started:
+            self._started = True
+            self._chunks = iter(())
+            self._skip()
+            return
+        for _ in self.chunks():
+            pass
+
+
+class DocumentReader:
+    """
+    Потоковый разбор документации конечным автоматом за один проход.
+    Память не зависит от размера документа: в буфере держится лишь несколько строк.
+    Поддерживаются заголовки на русском и английском языках.
+    """
+
+    def __init__(self, f):
+        self._lines = _LineSource(f)
+        self.root_name = None
+        self.format_version = 1
+        self._structure_found = None
+
+    def read_structure(self) -> bool:
+        """Ищет блок структуры проекта и запоминает имя корневой папки"""
+        if self._structure_found is None:
+            self._structure_found = self._read_structure()
+        return self._structure_found
+
+    def _read_structure(self) -> bool:
+        while True:
+            line, _ = self._lines.readline()
+            if not line:
+                return False
+            text = _framing(line)
+            if text.startswith(b'<!-- ofp-format: '):
+                self.format_version = int(text[17:].split()[0])
+            elif text.startswith(b'# ') and text[2:].split(b':')[0] in STRUCTURE_TITLES:
+                break
+
+        in_block = False
+        while True:
+            line, _ = self._lines.readline()
+            if not line:
+                return False
+            text = _framing(line)
+            if text.startswith(b'```'):
+                if in_block:
+                    return True
+                in_block = True
+            elif in_block and self.root_name is None:
+                self.root_name = text.decode('utf-8').strip().split('/')[0].rstrip('\\/')
+
+    def _is_terminator(self) -> tuple[bool, int]:
+        """
+        Проверяет, что после строки ``` идет окончание секции: пустая строка, ---,
+        пустая строка и дальше конец файла или следующая секция.
+        Возвращает признак и смещение конца секции; если это не окончание,
+        прочитанные строки возвращаются обратно.
+        """
+        taken = [self._lines.readline() for _ in range(3)]
+        (blank, _), (rule, _), (last, last_offset) = taken
+        if blank and _framing(blank) == b'' and _framing(rule) == b'---' and _framing(last) == b'':
+            end_offset = last_offset + len(last)
+            if not last:
+                return True, end_offset
+            following = [self._lines.readline()]
+            if not following[0][0]:
+                return True, end_offset
+            if _framing(following[0][0]) == b'':
+                following.append(self._lines.readline())
+                if not following[1][0] or following[1][0].startswith(b'## '):
+                    for item in reversed(following):
+                        self._lines.push(*item)
+                    return True, end_offset
+            taken.extend(following)
+
+        for item in reversed(taken):
+            self._lines.push(*item)
+        return False, 0
+
+    def _content(self, section: Section):
+        """Построчно отдает содержимое секции до ее закрывающей разметки"""
+        pending = None
+        while True:
+            line, offset = self._lines.readline()
+            if not line:
+                # Документ обрезан: отдаем то, что успели прочитать
+                if pending is not None:
+                    yield pending
+                section.length = offset - section.offset
+                return
+            if _framing(line) == b'```':
+                is_end, end_offset = self._is_terminator()
+                if is_end:
+                    if pending is not None:
+                        yield _strip_newline(pending)
+                    section.length = end_offset - section.offset
+                    return
+            if pending is not None:
+                yield pending
+            pending = line
+
+    def _sized_content(self, section: Section, size: int, fence: bytes):
+        """Отдает содержимое секции формата 2 ровно по длине из заголовка"""
+        remaining = size
+        while remaining:
+            chunk = self._lines.read(min(remaining, CHUNK_SIZE))
+            if not chunk:
+                raise ValueError(f"document is truncated in section {section.path}")
+            remaining -= len(chunk)
+            yield chunk
+        self._finish_sized(section, fence)
+
+    def _skip_sized(self, section: Section, size: int, fence: bytes):
+        self._lines.skip(size)
+        section.content_length = size
+        self._finish_sized(section, fence)
+
+    def _finish_sized(self, section: Section, fence: bytes):
+        """Проверяет закрывающую разметку секции формата 2"""
+        trailer = [self._lines.readline() for _ in range(5)]
+        expected = [b'\n', fence + b'\n', b'\n', b'---\n', b'\n']
+        if [line for line, _ in trailer] != expected:
+            raise ValueError(f"section framing is damaged: {section.path}")
+        section.length = trailer[-1][1] + 1 - section.offset
+
+    def sections(self):
+        """Генератор секций файлов; содержимое каждой нужно прочитать до перехода к следующей"""
+        if not self.read_structure():
+            raise ValueError("structure section not found")
+
+        count = 0
+        while True:
+            line, offset = self._lines.readline()
+            if not line:
+                if self.format_version >= 2:
+                    raise ValueError("document is truncated: end marker not found")
+                return
+            if line.startswith(b'<!-- ofp-end: '):
+                expected = int(_framing(line)[14:].split(b'=')[1].split()[0])
+                if expected != count:
+                    raise ValueError(f"document has {count} sections, expected {expected}")
+                return
+            if not line.startswith(b'## '):
+                continue
+
+            raw_path, attrs = parse_section_header(_framing(line))
+            rel_path = raw_path.decode('utf-8')
+            blank, blank_offset = self._lines.readline()
+            fence_line, fence_offset = self._lines.readline()
+            if _framing(blank) != b'' or not fence_line.startswith(b'```'):
+                self._lines.push(fence_line, fence_offset)
+                self._lines.push(blank, blank_offset)
+                continue
+
+            if self.format_version < 2:
+                # Старые документы могли содержать путь с именем корня и символы дерева;
+                # формат 2 пишет путь относительно корня как есть
+                rel_path = rel_path.replace('│', '').strip()
+                if self.root_name and rel_path.startswith(self.root_name + '/'):
+                    rel_path = rel_path[len(self.root_name) + 1:]
+
+            fence_text = _framing(fence_line)
+            fence = fence_text[:len(fence_text) - len(fence_text.lstrip(b'`'))]
+            section = Section(rel_path, fence_text[len(fence):].decode('utf-8').strip(), offset,
+                              fence_offset + len(fence_line), None, attrs=attrs)
+            if 'bytes' in attrs:
+                size = int(attrs['bytes'])
+                section._chunks = self._sized_content(section, size, fence)
+                section._skip = lambda section=section, size=size, fence=fence: self._skip_sized(section, size, fence)
+            else:
+                section._chunks = self._content(section)
+            count += 1
+            yield section
+            section.drain()
+
+
+def find_structure_offset(doc_file) -> int:
+    """Смещение заголовка структуры проекта (после манифеста); читает файл построчно"""
+    doc_file.seek(0)
+    offset = 0
+    for line in iter(doc_file.readline, b''):
+        text = _framing(line)
+        if text.startswith(b'# ') and text[2:].split(b':')[0] in STRUCTURE_TITLES:
+            return offset
+        offset += len(line)
+    return 0
+
+
+def build_index(doc_path) -> dict:
+    """Строит индекс секций разбором документа, если сохраненного индекса нет"""
+    with open(doc_path, 'rb') as f:
+        reader = DocumentReader(f)
+        sections = []
+        for section in reader.sections():
+            section.drain()
+            sections.append({
+                'path': section.path,
+                'language': section.language,
+                'offset': section.offset,
+                'length': section.length,
+                'content_offset': section.content_offset,
+                'content_length': section.content_length,
+                'sha256': section.sha256,
+                'mode': section.mode,
+                'size': section.size if section.size is not None else section.content_length,
+                'encoding': section.encoding,
+                'lossy': section.lossy,
+            })
+    return {'version': INDEX_VERSION, 'doc': Path(doc_path).name, 'sections': sections}
@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from program import utils
+
+SQLITE_SCHEMA = """
+CREATE TABLE project (
+    name TEXT NOT NULL,
+    tree TEXT NOT NULL
+);
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    extension TEXT NOT NULL,
+    language TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    content TEXT
+);
+CREATE INDEX files_extension ON files (extension);
+CREATE INDEX files_hash ON files (hash);
+"""
+
+
+def iter_file_records(files_info: list[dict[str, str]], progress=None):
+    """Читает файлы по одному и отдает записи для машинного экспорта"""
+    for file_info in files_info:
+        if progress is not None:
+            progress.advance(file_info['rel_path'])
+        try:
+            with open(file_info['path'], 'rb') as f:
+                raw = f.read()
+        except Exception as e:
+            if progress is not None:
+                progress.done(0)
+            yield {
+                'path': file_info['rel_path'],
+                'extension': file_info['extension'],
+                'language': file_info['language'],
+                'size': 0,
+                'hash': '',
+                'content': None,
+                'error': str(e)
+            }
+            continue
+
+        if progress is not None:
+            progress.done(len(raw))
+        yield {
+            'path': file_info['rel_path'],
+            'extension': file_info['extension'],
+            'language': file_info['language'],
+            'size': len(raw),
+            'hash': hashlib.sha256(raw).hexdigest(),
+            'content': utils.decode_content(raw)
+        }
+
+
+def write_jsonl(root_name: str, tree: str, files_info: list[dict[str, str]], output_path: Path, progress=None):
+    """Записывает снимок проекта в JSONL: первая строка - проект, далее по строке на файл"""
+    with open(output_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(json.dumps({'type': 'project', 'name': root_name, 'tree': tree}, ensure_ascii=False))
+        f.write('\n')
+        for record in iter_file_records(files_info, progress):
+            f.write(json.dumps({'type': 'file', **record}, ensure_ascii=False))
+            f.write('\n')
+
+
+def write_sqlite(root_name: str, tree: str, files_info: list[dict[str, str]], output_path: Path, progress=None):
+    """Записывает снимок проекта в базу SQLite с индексами по пути, расширению и хэшу"""
+    import sqlite3
+
+    if output_path.exists():
+        output_path.unlink()
+
+    connection = sqlite3.connect(output_path)
+    try:
+        connection.executescript(SQLITE_SCHEMA)
+        with connection:
+            connection.execute("INSERT INTO project (name, tree) VALUES (?, ?)", (root_name, tree))
+            connection.executemany(
+                "INSERT OR REPLACE INTO files (path, extension, language, size, hash, content) "
+                "VALUES (:path, :extension, :language, :size, :hash, :content)",
+                iter_file_records(files_info, progress)
+            )
+    finally:
+        connection.close()
+
+
+EXPORT_FORMATS = {
+    'jsonl': ('.jsonl', write_jsonl),
+    'sqlite': ('.sqlite', write_sqlite),
+}
+
+
+def export_extension(output_format: str) -> str:
+    """Возвращает расширение выходного файла для формата"""
+    if output_format in EXPORT_FORMATS:
+        return EXPORT_FORMATS[output_format][0]
+    return '.md'
+
+
+def export_documentation(root_path: str, tree: str, files_info: list[dict[str, str]], output_path: Path,
+                         output_format: str, progress=None):
+    """Записывает снимок проекта в машинно-читаемом формате"""
+    _, writer = EXPORT_FORMATS[output_format]
+    writer(os.path.basename(root_path), tree, files_info, output_path, progress)
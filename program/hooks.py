@@ -0,0 +1,123 @@
+import sys
+import importlib
+from typing import Callable, Optional
+from program.translator import translator
+
+# Поддерживаемые события:
+#   on_dir_enter(rel_dir)                  - перед обходом папки; False пропускает папку (кроме корня)
+#   on_file_skipped(rel_path, reason)      - файл или папка пропущены (правило конфига, hook, ошибка чтения)
+#   on_file_read(rel_path, size, seconds)  - файл прочитан
+#   on_section_written(rel_path, section)  - секция записана в документ (смещения, длина, sha256)
+#   on_run_done(stats)                     - генерация завершена
+HOOK_NAMES = ('on_dir_enter', 'on_file_skipped', 'on_file_read', 'on_section_written', 'on_run_done')
+ENTRY_POINT_GROUP = 'ofp.hooks'
+
+# Обработчики, зарегистрированные из кода через register()
+_registered: dict[str, list[Callable]] = {}
+_entry_point_plugins: Optional[list] = None
+
+
+def register(name: str, func: Callable):
+    """Регистрирует обработчик события для всех последующих запусков"""
+    if name not in HOOK_NAMES:
+        raise ValueError(translator.translate('hooks.unknown_hook', name=name))
+    _registered.setdefault(name, []).append(func)
+
+
+def unregister(name: str, func: Callable):
+    """Снимает обработчик, зарегистрированный через register()"""
+    handlers = _registered.get(name, [])
+    if func in handlers:
+        handlers.remove(func)
+
+
+def _warn(message: str):
+    from program import utils
+    print(utils.color_text(message, 'warning'), file=sys.stderr)
+
+
+def load_plugin(spec: str):
+    """
+    Загружает плагин по строке 'модуль' или 'модуль:атрибут'.
+    Класс создается без аргументов; обработчики - его атрибуты с именами из HOOK_NAMES.
+    """
+    module_name, _, attr = spec.partition(':')
+    plugin = importlib.import_module(module_name)
+    for part in filter(None, attr.split('.')):
+        plugin = getattr(plugin, part)
+    return plugin() if isinstance(plugin, type) else plugin
+
+
+def _entry_points() -> list:
+    """Плагины из entry points группы ofp.hooks (ищутся один раз за процесс)"""
+    global _entry_point_plugins
+    if _entry_point_plugins is None:
+        _entry_point_plugins = []
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                plugin = entry_point.load()
+                _entry_point_plugins.append(plugin() if isinstance(plugin, type) else plugin)
+            except Exception as e:
+                _warn(translator.translate('hooks.load_failed', plugin=entry_point.value, error=str(e)))
+    return _entry_point_plugins
+
+
+class RunHooks:
+    """
+    Обработчики событий одного запуска генерации. Атрибут с именем события - функция
+    рассылки или None, если обработчиков нет: вызывающий код проверяет его на None,
+    поэтому без плагинов накладные расходы сводятся к одному сравнению.
+    """
+
+    __slots__ = HOOK_NAMES + ('_handlers',)
+
+    def __init__(self, handlers: dict[str, list[Callable]]):
+        self._handlers = handlers
+        for name in HOOK_NAMES:
+            setattr(self, name, self._dispatcher(name) if handlers.get(name) else None)
+
+    def active(self) -> bool:
+        """Есть ли хотя бы один обработчик"""
+        return any(self._handlers.get(name) for name in HOOK_NAMES)
+
+    def _dispatcher(self, name: str) -> Callable:
+        handlers = self._handlers[name]
+
+        def dispatch(*args):
+            result = None
+            for handler in list(handlers):
+                try:
+                    if handler(*args) is False:
+                        result = False
+                except Exception as e:
+                    # Сломанный обработчик отключается, генерация продолжается
+                    handlers.remove(handler)
+                    _warn(translator.translate('hooks.handler_failed', hook=name,
+                                               handler=getattr(handler, '__qualname__', repr(handler)), error=str(e)))
+            return result
+
+        return dispatch
+
+
+def load(config: Optional[dict] = None) -> RunHooks:
+    """
+    Собирает обработчики для запуска: зарегистрированные через register(),
+    плагины из ключа конфига "hooks" (список 'модуль:атрибут') и entry points ofp.hooks.
+    Ключ "hooks" берется из конфига проекта, а модули импортируются как есть: генерация
+    по чужому конфигу выполняет указанный в нем код (см. readme).
+    """
+    handlers = {name: list(funcs) for name, funcs in _registered.items() if funcs}
+    plugins = list(_entry_points())
+    for spec in (config or {}).get('hooks', []):
+        try:
+            plugins.append(load_plugin(spec))
+        except Exception as e:
+            _warn(translator.translate('hooks.load_failed', plugin=spec, error=str(e)))
+
+    for plugin in plugins:
+        for name in HOOK_NAMES:
+            handler = getattr(plugin, name, None)
+            if callable(handler):
+                handlers.setdefault(name, []).append(handler)
+    return RunHooks(handlers)
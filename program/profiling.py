@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import threading
+from typing import Optional
+
+
+class _Phase:
+    """Накопитель времени одной фазы; используется как контекстный менеджер"""
+
+    __slots__ = ('name', 'wall', 'cpu', 'calls', '_local')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.calls = 0
+        # Фаза может выполняться сразу в нескольких потоках (запись при распаковке)
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._local.started = (time.perf_counter(), time.thread_time())
+        return self
+
+    def __exit__(self, *exc):
+        wall, cpu = self._local.started
+        self.wall += time.perf_counter() - wall
+        self.cpu += time.thread_time() - cpu
+        self.calls += 1
+        return False
+
+
+class _NullPhase:
+    """Фаза-заглушка, когда профилирование выключено"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class RunProfile:
+    """
+    Профиль одного запуска: время по фазам (сканирование, сопоставление с правилами,
+    чтение, преобразование, запись), счетчики системных операций и пики памяти.
+    Время фазы - сумма по всем ее вызовам во всех потоках, поэтому при параллельной
+    записи оно может превышать общее время запуска.
+    """
+
+    def __init__(self, command: str, trace_memory: bool = True, cprofile_path: Optional[str] = None):
+        self.command = command
+        self.phases: dict[str, _Phase] = {}
+        self.counters: dict[str, int] = {}
+        self.trace_memory = trace_memory
+        self.cprofile_path = cprofile_path
+        self._cprofile = None
+        self._lock = threading.Lock()
+        self.started = self.cpu_started = 0.0
+        self.wall = self.cpu = 0.0
+        self.tracemalloc_peak = None
+
+    def phase(self, name: str) -> _Phase:
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases.setdefault(name, _Phase(name))
+        return phase
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def start(self):
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cprofile_path:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    def stop(self):
+        self.wall = time.perf_counter() - self.started
+        self.cpu = time.process_time() - self.cpu_started
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            os.makedirs(os.path.dirname(os.path.abspath(self.cprofile_path)), exist_ok=True)
+            self._cprofile.dump_stats(self.cprofile_path)
+        if self.trace_memory:
+            import tracemalloc
+            self.tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def report(self) -> dict:
+        """Отчет о запуске в виде словаря для JSON"""
+        return {
+            'command': self.command,
+            'argv': sys.argv[1:],
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'wall_seconds': round(self.wall, 6),
+            'cpu_seconds': round(self.cpu, 6),
+            'phases': {
+                name: {'wall_seconds': round(phase.wall, 6), 'cpu_seconds': round(phase.cpu, 6), 'calls': phase.calls}
+                for name, phase in self.phases.items()
+            },
+            'counters': dict(sorted(self.counters.items())),
+            'peak_rss_bytes': peak_rss(),
+            'tracemalloc_peak_bytes': self.tracemalloc_peak,
+            'cprofile': self.cprofile_path,
+        }
+
+
+_active: Optional[RunProfile] = None
+
+
+def peak_rss() -> Optional[int]:
+    """Пиковый размер резидентной памяти процесса в байтах (None, если ОС не сообщает)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def active() -> Optional[RunProfile]:
+    """Текущий профиль запуска или None, если профилирование выключено"""
+    return _active
+
+
+def start(command: str, trace_memory: bool = True, cprofile_path: Optional[str] = None) -> RunProfile:
+    """Включает профилирование для текущего процесса"""
+    global _active
+    _active = RunProfile(command, trace_memory, cprofile_path)
+    _active.start()
+    return _active
+
+
+def stop() -> Optional[RunProfile]:
+    """Выключает профилирование и возвращает собранный профиль"""
+    global _active
+    profile, _active = _active, None
+    if profile is not None:
+        profile.stop()
+    return profile
+
+
+def phase(name: str):
+    """Контекст замера фазы; без активного профиля ничего не делает"""
+    return _NULL_PHASE if _active is None else _active.phase(name)
+
+
+def count(name: str, value: int = 1):
+    """Увеличивает счетчик активного профиля"""
+    if _active is not None:
+        _active.count(name, value)
+
+
+def write_report(profile: RunProfile, path: str):
+    """Сохраняет JSON-отчет о запуске"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile.report(), f, indent=2)
+        f.write('\n')
+
+
+def format_report(report: dict) -> str:
+    """Короткая таблица профиля для консоли"""
+    from program import utils
+
+    lines = [f"{'phase':<12}{'wall, s':>10}{'cpu, s':>10}{'calls':>10}"]
+    for name, values in report['phases'].items():
+        lines.append(f"{name:<12}{values['wall_seconds']:>10.3f}{values['cpu_seconds']:>10.3f}{values['calls']:>10}")
+    lines.append(f"{'total':<12}{report['wall_seconds']:>10.3f}{report['cpu_seconds']:>10.3f}")
+    for name, value in report['counters'].items():
+        lines.append(f"{name:<20}{utils.format_size(value) if name.startswith('bytes') else value}")
+    if report['peak_rss_bytes'] is not None:
+        lines.append(f"{'peak_rss':<20}{utils.format_size(report['peak_rss_bytes'])}")
+    if report['tracemalloc_peak_bytes'] is not None:
+        lines.append(f"{'tracemalloc_peak':<20}{utils.format_size(report['tracemalloc_peak_bytes'])}")
+    return '\n'.join(lines)
@@ -0,0 +1,177 @@
+import sys
+import time
+import shutil
+from typing import Callable, Optional
+from program.translator import translator
+
+
+class GenerationCanceled(Exception):
+    """Генерация остановлена по запросу пользователя"""
+
+
+class Progress:
+    """
+    Счетчики прогресса генерации (папки, файлы, байты, текущий путь, скорость).
+    callback вызывается не чаще раза в interval секунд и получает снимок состояния;
+    cancel_event (threading.Event) проверяется на каждом файле и папке.
+    """
+
+    __slots__ = ('callback', 'cancel_event', 'interval', 'phase', 'files_total', 'bytes_total',
+                 'dirs_done', 'files_done', 'bytes_done', 'current_path', 'started', 'phase_started',
+                 '_last_emit')
+
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None, cancel_event=None,
+                 interval: float = 0.1):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.interval = interval
+        self.phase = 'scan'
+        self.files_total = 0
+        self.bytes_total = 0
+        self.dirs_done = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.current_path = ''
+        self.started = self.phase_started = time.perf_counter()
+        self._last_emit = 0.0
+
+    def check_cancel(self):
+        """Прерывает работу исключением GenerationCanceled, если запрошена отмена"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise GenerationCanceled()
+
+    def start(self, phase: str, files_total: int = 0, bytes_total: int = 0):
+        """Начинает новую фазу (scan/write) и сразу сообщает о ней"""
+        self.check_cancel()
+        if self.callback is not None and (self.dirs_done or self.files_done):
+            # Итог предыдущей фазы, пока счетчики не сброшены
+            self.callback(self.snapshot(final=True))
+        self.phase = phase
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.dirs_done = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.current_path = ''
+        self.phase_started = time.perf_counter()
+        self.emit(force=True)
+
+    def scanned_dir(self, path: str, files: int):
+        """Отмечает просканированную папку и число найденных в ней файлов"""
+        self.dirs_done += 1
+        self.files_done += files
+        self.current_path = path
+        self.emit()
+
+    def advance(self, path: str):
+        """Отмечает начало обработки очередного файла"""
+        self.check_cancel()
+        self.current_path = path
+        self.emit()
+
+    def done(self, size: int):
+        """Отмечает обработанный файл и его размер"""
+        self.files_done += 1
+        self.bytes_done += size
+        self.emit()
+
+    def finish(self):
+        """Сообщает финальное состояние"""
+        self.phase = 'done'
+        self.emit(force=True)
+
+    def snapshot(self, final: bool = False) -> dict:
+        """Неизменяемый снимок состояния для передачи в другой поток; final - итог фазы"""
+        now = time.perf_counter()
+        phase_elapsed = now - self.phase_started
+        bytes_per_second = self.bytes_done / phase_elapsed if phase_elapsed > 0 else 0.0
+        eta = None
+        if self.phase == 'write' and bytes_per_second > 0:
+            eta = max(0.0, (self.bytes_total - self.bytes_done) / bytes_per_second)
+        return {
+            'phase': self.phase,
+            'dirs_done': self.dirs_done,
+            'files_done': self.files_done,
+            'files_total': self.files_total,
+            'bytes_done': self.bytes_done,
+            'bytes_total': self.bytes_total,
+            'path': self.current_path,
+            'elapsed': now - self.started,
+            'files_per_second': self.files_done / phase_elapsed if phase_elapsed > 0 else 0.0,
+            'bytes_per_second': bytes_per_second,
+            'eta': eta,
+            'final': final or self.phase == 'done',
+        }
+
+    def emit(self, force: bool = False):
+        """Вызывает callback, если прошло достаточно времени с прошлого вызова"""
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if force or now - self._last_emit >= self.interval:
+            self._last_emit = now
+            self.callback(self.snapshot())
+
+
+def format_duration(seconds: float) -> str:
+    """Форматирует длительность как M:SS или H:MM:SS"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+class ConsoleProgress:
+    """
+    Вывод прогресса в консоль: в терминале - одна обновляемая строка,
+    без терминала (CI, перенаправление) - отдельная строка раз в log_interval секунд
+    """
+
+    def __init__(self, stream=None, log_interval: float = 5.0):
+        self.stream = stream or sys.stdout
+        self.is_tty = self.stream.isatty()
+        self.log_interval = log_interval
+        self.last_log = 0.0
+        self.last_phase = None
+
+    def describe(self, snapshot: dict) -> str:
+        """Текст строки прогресса для снимка"""
+        from program import utils
+
+        if snapshot['phase'] == 'scan':
+            return translator.translate('progress.scanning', dirs=snapshot['dirs_done'], files=snapshot['files_done'])
+        text = translator.translate(
+            'progress.writing',
+            done=snapshot['files_done'], total=snapshot['files_total'],
+            size=utils.format_size(snapshot['bytes_done']), total_size=utils.format_size(snapshot['bytes_total']),
+            files_speed=f"{snapshot['files_per_second']:.0f}", speed=utils.format_size(snapshot['bytes_per_second'])
+        )
+        if snapshot['eta'] is not None:
+            text += f", {translator.translate('progress.eta', eta=format_duration(snapshot['eta']))}"
+        return text
+
+    def __call__(self, snapshot: dict):
+        phase = snapshot['phase']
+        if self.is_tty and phase == 'done':
+            self.stream.write('\r\033[K')
+            self.stream.flush()
+            return
+
+        text = self.describe(snapshot)
+        if self.is_tty:
+            line = f"{text}  {snapshot['path']}" if snapshot['path'] else text
+            width = shutil.get_terminal_size().columns - 1
+            self.stream.write(f"\r{line[:width]}\033[K")
+            self.stream.flush()
+            return
+
+        # Без терминала: строка раз в log_interval и итог каждой фазы (нулевое начало фазы не печатаем)
+        now = time.perf_counter()
+        if phase != self.last_phase and not snapshot['final']:
+            self.last_phase = phase
+            self.last_log = now
+            return
+        if snapshot['final'] or now - self.last_log >= self.log_interval:
+            self.last_log = now
+            self.stream.write(f"{text}\n")
+            self.stream.flush()
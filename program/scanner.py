@@ -0,0 +1,249 @@
+import os
+from typing import Callable, Iterator, Tuple, Optional
+import program.config_utils as cfg
+import program.profiling as profiling
+from program.config import compile_config, CompiledConfig
+from program.progress import Progress
+
+
+def get_language(extension: str) -> str:
+    """Определяет язык для подсветки синтаксиса"""
+    return cfg.LANGUAGE_MAPPING.get(extension.lower(), 'text')
+
+
+def _list_dir(current_path: str, rel_dir: str, rules: CompiledConfig,
+              on_ignored: Optional[Callable[[str, str, bool], None]] = None,
+              on_dir: Optional[Callable[[str], Optional[bool]]] = None) -> list[tuple[str, str, str, bool]]:
+    """
+    Читает папку одним os.scandir и возвращает отсортированные по имени неигнорируемые
+    элементы (имя, полный путь, относительный путь, это папка). Ошибки чтения - OSError.
+    Для пропущенных элементов вызывается on_ignored(имя, относительный путь, это папка);
+    подпапка, для которой on_dir(относительный путь) вернул False, тоже пропускается.
+    """
+    with profiling.phase('scan'):
+        with os.scandir(current_path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    profiling.count('dirs_listed')
+    profiling.count('entries_seen', len(entries))
+
+    result = []
+    with profiling.phase('match'):
+        for entry in entries:
+            name = entry.name
+            rel_path = f"{rel_dir}{name}"
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if rules.ignores(name, rel_path, is_dir) or (is_dir and on_dir is not None and on_dir(rel_path) is False):
+                if on_ignored is not None:
+                    on_ignored(name, rel_path, is_dir)
+            else:
+                result.append((name, entry.path, rel_path, is_dir))
+    return result
+
+
+def _listing(entries: list) -> tuple:
+    """Содержимое папки после фильтрации в виде для сравнения: (имя, это папка)"""
+    return tuple((name, is_dir) for name, _, _, is_dir in entries)
+
+
+def dir_entries(root_path: str, rel_dir: str, config) -> tuple:
+    """
+    Отфильтрованное правилами содержимое одной папки ((имя, это папка), ...), как его
+    видит scan. rel_dir - '' для корня или 'a/b/'. Ошибки чтения - OSError.
+    """
+    return _listing(_list_dir(os.path.join(root_path, rel_dir), rel_dir, compile_config(config)))
+
+
+def _scan_dir(root_path: str, current_path: str, rel_dir: str, rules: CompiledConfig, prefix: str,
+              tree: list, files_info: list, progress: Optional[Progress] = None, on_ignored=None, on_dir=None,
+              dirs: Optional[dict] = None):
+    """Рекурсивно обходит папку, дописывая строки дерева и файлы"""
+    if progress is not None:
+        progress.check_cancel()
+    try:
+        # mtime берется до чтения: изменение во время обхода не останется незамеченным
+        mtime_ns = os.stat(current_path).st_mtime_ns if dirs is not None else None
+        entries = _list_dir(current_path, rel_dir, rules, on_ignored, on_dir)
+    except OSError:
+        return
+    if dirs is not None:
+        dirs[rel_dir] = (mtime_ns, _listing(entries))
+
+    own_files = 0
+    pointers = ['├── '] * (len(entries) - 1) + ['└── ']
+    for pointer, (name, path, rel_path, is_dir) in zip(pointers, entries):
+        if is_dir:
+            tree.append(f"{prefix}{pointer}{name}/")
+            subtree = []
+            _scan_dir(root_path, path, f"{rel_path}/", rules,
+                      prefix + ('│   ' if pointer == '├── ' else '    '), subtree, files_info, progress,
+                      on_ignored, on_dir, dirs)
+            tree.append('\n'.join(subtree))
+        else:
+            tree.append(f"{prefix}{pointer}{name}")
+            own_files += 1
+            file_ext = os.path.splitext(name)[1]
+            files_info.append({
+                'path': path,
+                'rel_path': rel_path,
+                'extension': file_ext,
+                'language': get_language(file_ext)
+            })
+
+    if progress is not None:
+        progress.scanned_dir(rel_dir, own_files)
+
+
+def _tree_level(current_path: str, rel_dir: str, rules: CompiledConfig, dirs_first: bool) -> Iterator[tuple]:
+    """Элементы одной папки с указателями дерева (├── / └──)"""
+    entries = _list_dir(current_path, rel_dir, rules)
+    if dirs_first:
+        entries.sort(key=lambda entry: not entry[3])
+    pointers = ['├── '] * (len(entries) - 1) + ['└── ']
+    return zip(pointers, entries)
+
+
+def iter_tree(root_path: str, config, dirs_first: bool = True) -> Iterator[str]:
+    """
+    Отдает строки дерева папки по мере обхода, не дожидаясь конца сканирования.
+    Правила игнорирования те же, что и при генерации документации. Обход идет
+    по явному стеку, поэтому время линейно по числу элементов при любой глубине.
+    """
+    rules = compile_config(config)
+    stack = []
+
+    def enter(path: str, rel_dir: str, prefix: str) -> Iterator[str]:
+        try:
+            stack.append((prefix, _tree_level(path, rel_dir, rules, dirs_first)))
+        except PermissionError:
+            yield f"{prefix}└── [Permission denied]"
+        except OSError as e:
+            yield f"{prefix}└── [Error: {e.strerror or e}]"
+
+    yield from enter(root_path, '', '')
+    while stack:
+        prefix, level = stack[-1]
+        item = next(level, None)
+        if item is None:
+            stack.pop()
+            continue
+        pointer, (name, path, rel_path, is_dir) = item
+        if is_dir:
+            yield f"{prefix}{pointer}{name}/"
+            yield from enter(path, f"{rel_path}/", prefix + ('│   ' if pointer == '├── ' else '    '))
+        else:
+            yield f"{prefix}{pointer}{name}"
+
+
+def scan(root_path: str, config, progress: Optional[Progress] = None,
+         on_ignored: Optional[Callable[[str, str, bool], None]] = None,
+         on_dir: Optional[Callable[[str], Optional[bool]]] = None,
+         dirs: Optional[dict] = None) -> Tuple[str, list[dict[str, str]]]:
+    """
+    Сканирует проект: возвращает текст дерева и список файлов с путями и языками.
+    Если передан progress, отмена проверяется перед каждой папкой;
+    on_ignored получает каждый пропущенный элемент, on_dir - каждую папку перед обходом
+    (корень - как ''; False для подпапки исключает ее). В dirs записывается каждая
+    прочитанная папка: rel_dir -> (mtime до чтения, содержимое как в dir_entries).
+    """
+    if not os.path.isdir(root_path):
+        return '', []
+    tree = []
+    files_info = []
+    if on_dir is not None:
+        on_dir('')
+    _scan_dir(root_path, root_path, '', compile_config(config), '', tree, files_info, progress, on_ignored, on_dir,
+              dirs)
+    return '\n'.join(tree), files_info
+
+
+def scan_subtree(root_path: str, rel_dir: str, config, dirs: Optional[dict] = None) -> list[dict[str, str]]:
+    """Файлы одной подпапки rel_dir ('a/b/') с путями относительно корня проекта, как их нашел бы scan"""
+    files_info = []
+    _scan_dir(root_path, os.path.join(root_path, rel_dir), rel_dir, compile_config(config), '', [], files_info,
+              dirs=dirs)
+    return files_info
+
+
+def mark_tree(tree: str, files_info: list[dict[str, str]], marks: dict[str, str]) -> str:
+    """
+    Дописывает к строкам файлов дерева метки вида '  [M]'. Строки файлов в дереве идут
+    в том же порядке, что и files_info (оба строятся одним обходом), а строки папок
+    оканчиваются на '/', поэтому сопоставление делается одним проходом.
+    """
+    files = iter(files_info)
+    lines = tree.split('\n')
+    for number, line in enumerate(lines):
+        if not line or line.endswith('/'):
+            continue
+        mark = marks.get(next(files)['rel_path'])
+        if mark:
+            lines[number] = f"{line}  [{mark}]"
+    return '\n'.join(lines)
+
+
+def _render_paths(node: dict, prefix: str, marks: dict[str, str], tree: list, files_info: list):
+    """Рисует дерево из вложенных словарей (лист - кортеж с описанием файла), собирая файлы в порядке дерева"""
+    names = sorted(node)
+    pointers = ['├── '] * (len(names) - 1) + ['└── ']
+    for pointer, name in zip(pointers, names):
+        child = node[name]
+        if isinstance(child, tuple):
+            file_info = child[0]
+            mark = marks.get(file_info['rel_path'])
+            tree.append(f"{prefix}{pointer}{name}  [{mark}]" if mark else f"{prefix}{pointer}{name}")
+            files_info.append(file_info)
+        else:
+            tree.append(f"{prefix}{pointer}{name}/")
+            _render_paths(child, prefix + ('│   ' if pointer == '├── ' else '    '), marks, tree, files_info)
+
+
+def scan_paths(root_path: str, config, rel_paths, marks: Optional[dict[str, str]] = None,
+               on_ignored: Optional[Callable[[str, str, bool], None]] = None,
+               on_dir: Optional[Callable[[str], Optional[bool]]] = None) -> Tuple[str, list[dict[str, str]]]:
+    """
+    Как scan, но только для заданных путей (относительных, через '/'), без обхода папок:
+    к каждому пути и его папкам применяются те же правила игнорирования и on_dir.
+    Дерево содержит только эти файлы и их папки; отсутствующие на диске пути пропускаются.
+    """
+    rules = compile_config(config)
+    allowed_dirs = {'': True}
+    if on_dir is not None:
+        on_dir('')
+    root = {}
+    for rel_path in sorted(set(rel_paths)):
+        parts = rel_path.split('/')
+        rel_dir = ''
+        for part in parts[:-1]:
+            parent, rel_dir = rel_dir, f"{rel_dir}{part}/"
+            if rel_dir not in allowed_dirs:
+                ignored = allowed_dirs[parent] and (rules.ignores(part, rel_dir[:-1], True) or
+                                                    (on_dir is not None and on_dir(rel_dir[:-1]) is False))
+                if ignored and on_ignored is not None:
+                    on_ignored(part, rel_dir[:-1], True)
+                allowed_dirs[rel_dir] = allowed_dirs[parent] and not ignored
+        path = os.path.join(root_path, *parts)
+        if not allowed_dirs[rel_dir] or not os.path.isfile(path):
+            continue
+        if rules.ignores(parts[-1], rel_path, False):
+            if on_ignored is not None:
+                on_ignored(parts[-1], rel_path, False)
+            continue
+
+        node = root
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        file_ext = os.path.splitext(parts[-1])[1]
+        node[parts[-1]] = ({
+            'path': path,
+            'rel_path': rel_path,
+            'extension': file_ext,
+            'language': get_language(file_ext)
+        },)
+
+    tree = []
+    files_info = []
+    _render_paths(root, '', marks or {}, tree, files_info)
+    return '\n'.join(tree), files_info
@@ -0,0 +1,209 @@
+import os
+import re
+import json
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Optional
+import program.config_utils as cfg
+import program.document as document
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+TRIGRAM_SUFFIX = cfg.TRIGRAM_SUFFIX
+TRIGRAM_MAGIC = b"OFPTRI1\n"
+# magic, doc_size, doc_mtime_ns, размер JSON-таблицы секций, число триграмм
+_HEADER = struct.Struct("<8sQQII")
+# триграмма (3 байта в int), смещение списка секций, длина списка в байтах
+_ENTRY = struct.Struct("<IQI")
+
+
+def trigram_path_for(doc_path) -> Path:
+    """Путь к триграммному индексу рядом с документом"""
+    doc_path = Path(doc_path)
+    return doc_path.with_name(doc_path.name + TRIGRAM_SUFFIX)
+
+
+def _trigrams(data: bytes) -> set[int]:
+    """Множество триграмм текста (без учета регистра ASCII) в виде 24-битных чисел"""
+    data = data.lower()
+    # Сначала уникальные срезы, потом перевод в числа - так вдвое быстрее
+    unique = {data[i:i + 3] for i in range(len(data) - 2)}
+    return {int.from_bytes(trigram, 'big') for trigram in unique}
+
+
+def _encode_postings(ids: list[int]) -> bytes:
+    """Список номеров секций как varint-разности"""
+    out = bytearray()
+    previous = 0
+    for section_id in ids:
+        delta = section_id - previous
+        previous = section_id
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def _decode_postings(data: bytes) -> list[int]:
+    ids = []
+    current = shift = value = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += value
+        ids.append(current)
+        value = shift = 0
+    return ids
+
+
+def build_trigram_index(doc_path) -> tuple[int, int]:
+    """
+    Строит триграммный индекс документа: для каждой триграммы - номера секций, где она есть.
+    Секции читаются с диска по одной. Возвращает (число секций, число триграмм).
+    """
+    doc_path = Path(doc_path)
+    index = document.load_index(doc_path) or document.build_index(doc_path)
+    sections = [[s['path'], s['content_offset'], s['content_length']] for s in index['sections']]
+
+    postings: dict[int, list[int]] = {}
+    with open(doc_path, 'rb') as f:
+        for section_id, (_, offset, length) in enumerate(sections):
+            f.seek(offset)
+            for trigram in _trigrams(f.read(length)):
+                postings.setdefault(trigram, []).append(section_id)
+
+    doc_stat = os.stat(doc_path)
+    table = json.dumps(sections, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    trigrams = sorted(postings)
+    tri_path = trigram_path_for(doc_path)
+    partial_path = tri_path.with_name(tri_path.name + '.part')
+    with open(partial_path, 'wb') as f:
+        f.write(_HEADER.pack(TRIGRAM_MAGIC, doc_stat.st_size, doc_stat.st_mtime_ns, len(table), len(trigrams)))
+        f.write(table)
+        encoded = [_encode_postings(postings[trigram]) for trigram in trigrams]
+        offset = 0
+        for trigram, data in zip(trigrams, encoded):
+            f.write(_ENTRY.pack(trigram, offset, len(data)))
+            offset += len(data)
+        for data in encoded:
+            f.write(data)
+    os.replace(partial_path, tri_path)
+    return len(sections), len(trigrams)
+
+
+class TrigramIndex:
+    """Загруженный триграммный индекс: таблица секций и поиск кандидатов"""
+
+    def __init__(self, data: bytes):
+        magic, self.doc_size, self.doc_mtime_ns, table_size, count = _HEADER.unpack_from(data)
+        if magic != TRIGRAM_MAGIC:
+            raise ValueError("not a trigram index")
+        position = _HEADER.size
+        self.sections = json.loads(data[position:position + table_size])
+        position += table_size
+        entries = data[position:position + count * _ENTRY.size]
+        self.keys = array('I', (entry[0] for entry in _ENTRY.iter_unpack(entries)))
+        self._entries = entries
+        self._postings = data[position + count * _ENTRY.size:]
+
+    @classmethod
+    def load(cls, doc_path) -> Optional['TrigramIndex']:
+        """Загружает индекс, если он есть и соответствует документу"""
+        try:
+            with open(trigram_path_for(doc_path), 'rb') as f:
+                index = cls(f.read())
+            doc_stat = os.stat(doc_path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if index.doc_size != doc_stat.st_size or index.doc_mtime_ns != doc_stat.st_mtime_ns:
+            return None
+        return index
+
+    def postings(self, trigram: int) -> list[int]:
+        position = bisect_left(self.keys, trigram)
+        if position == len(self.keys) or self.keys[position] != trigram:
+            return []
+        _, offset, length = _ENTRY.unpack_from(self._entries, position * _ENTRY.size)
+        return _decode_postings(self._postings[offset:offset + length])
+
+    def candidates(self, literals: list[bytes]) -> list[int]:
+        """Номера секций, содержащих все триграммы обязательных подстрок"""
+        required = set()
+        for literal in literals:
+            required |= _trigrams(literal)
+        if not required:
+            return list(range(len(self.sections)))
+        result = None
+        # Начинаем с самых редких триграмм, чтобы пересечение быстро сужалось
+        for ids in sorted((self.postings(trigram) for trigram in required), key=len):
+            result = set(ids) if result is None else result.intersection(ids)
+            if not result:
+                return []
+        return sorted(result)
+
+
+# Символы, которые без учета регистра могут совпасть с не-ASCII текстом
+_CASE_UNSAFE = re.compile(r'[^\x00-\x7f]|[iksIKS]')
+
+
+def required_literals(pattern: str, flags: int = 0) -> list[bytes]:
+    """
+    Обязательные подстроки регулярного выражения: последовательности литералов
+    на верхнем уровне. Ветвления и классы символов обрывают подстроку.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return []
+
+    literals = []
+    current = []
+    for op, value in parsed:
+        if op is sre_constants.LITERAL:
+            current.append(chr(value))
+            continue
+        if op is sre_constants.AT:
+            continue
+        if current:
+            literals.append(''.join(current))
+            current = []
+    if current:
+        literals.append(''.join(current))
+    if (flags | parsed.state.flags) & re.IGNORECASE:
+        # Индекс нечувствителен к регистру только для ASCII, а i, k и s без учета регистра
+        # совпадают еще и с ı, İ, K (кельвин) и ſ - такие символы тоже обрывают подстроку
+        literals = [piece for literal in literals for piece in _CASE_UNSAFE.split(literal)]
+    return [literal.encode('utf-8') for literal in literals if len(literal.encode('utf-8')) >= 3]
+
+
+def grep_document(doc_path, regex: re.Pattern, literals: list[bytes]):
+    """
+    Ищет совпадения в документе и отдает (путь файла, номер строки, строка).
+    С триграммным индексом regex выполняется только по секциям-кандидатам.
+    """
+    tri_index = TrigramIndex.load(doc_path)
+    if tri_index is not None:
+        sections = [tri_index.sections[i] for i in tri_index.candidates(literals)]
+    else:
+        index = document.load_index(doc_path) or document.build_index(doc_path)
+        sections = [[s['path'], s['content_offset'], s['content_length']] for s in index['sections']]
+
+    with open(doc_path, 'rb') as f:
+        for rel_path, offset, length in sections:
+            f.seek(offset)
+            text = f.read(length).decode('utf-8', errors='replace')
+            if not regex.search(text):
+                continue
+            for number, line in enumerate(text.splitlines(), 1):
+                if regex.search(line):
+                    yield rel_path, number, line
@@ -0,0 +1,361 @@
+import io
+import os
+import sys
+import signal
+import json
+import time
+import socket
+import hashlib
+import contextlib
+import socketserver
+from pathlib import Path
+from collections import OrderedDict
+from typing import Optional
+import program.config_utils as cfg
+import program.config as config_module
+import program.document as document
+import program.scanner as scanner
+import program.utils as utils
+import program.commands as commands
+from program.progress import Progress, ConsoleProgress
+from program.translator import translator
+
+DEFAULT_MAX_MEMORY = 256 * 1024 * 1024
+
+RACY_NS = cfg.RACY_NS
+
+# Примерная стоимость служебных структур одной записи (словари, строки путей)
+ENTRY_OVERHEAD = 200
+
+
+def _racy(mtime_ns: int) -> bool:
+    return mtime_ns >= time.time_ns() - RACY_NS
+
+
+class WarmCache:
+    """
+    Кэш демона ofp serve, общий для всех проектов. Хранит результаты сканирования
+    (проверяются по mtime обойденных папок), готовые секции файлов (по размеру и mtime),
+    разобранные индексы документов и отпечатки записанных документов.
+    Записи вытесняются в порядке давности использования, когда их примерный
+    объем превышает max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_MEMORY):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._entries: OrderedDict[tuple, tuple[int, object]] = OrderedDict()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'unchanged_outputs': 0}
+
+    def _get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: tuple, value, size: int):
+        self._drop(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (size, value)
+        self.used_bytes += size
+        while self.used_bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.used_bytes -= evicted
+            self.counters['evictions'] += 1
+
+    def _drop(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.used_bytes -= entry[0]
+
+    def _hit(self, hit: bool):
+        self.counters['hits' if hit else 'misses'] += 1
+
+    def scan_project(self, root_path: str, config: dict, output_path: Path, progress=None,
+                     on_ignored=None, on_dir=None, changed=None, pruned_tree: bool = False, dirs=None):
+        """
+        Замена commands.scan_project: повторно использует прошлый обход, если ни одна из
+        обойденных папок не менялась. Папка с прежним (и не слишком свежим) mtime не читается;
+        папка с другим mtime перечитывается и сравнивается с запомненным содержимым после
+        фильтрации - так запись самого документа и его индекса в корень проекта не сбрасывает кэш.
+        """
+        if changed is not None or on_ignored is not None or on_dir is not None:
+            return commands.scan_project(root_path, config, output_path, progress, on_ignored, on_dir,
+                                         changed, pruned_tree, dirs)
+        scan_config = config_module.project_scan_config(config, output_path)
+        key = ('scan', os.path.abspath(root_path), config_module.config_key(scan_config))
+        cached = self._get(key)
+        if cached is not None and self._dirs_unchanged(root_path, cached[0], scan_config):
+            self._hit(True)
+            if dirs is not None:
+                dirs.update(cached[0])
+            return cached[1], cached[2]
+        self._hit(False)
+
+        scanned = {}
+        tree, files = utils.generate_file_tree(root_path, scan_config, progress, dirs=scanned)
+        if dirs is not None:
+            dirs.update(scanned)
+        size = (len(tree) + sum(len(file_info['path']) + len(file_info['rel_path']) + ENTRY_OVERHEAD
+                                for file_info in files)
+                + sum(ENTRY_OVERHEAD + sum(len(name) for name, _ in listing) for _, listing in scanned.values()))
+        self._put(key, (scanned, tree, files), size)
+        return tree, files
+
+    @staticmethod
+    def _dirs_unchanged(root_path: str, scanned: dict, scan_config: dict) -> bool:
+        """Проверяет папки прошлого обхода; у перечитанных без изменений папок обновляет mtime"""
+        for rel_dir, (mtime_ns, listing) in scanned.items():
+            try:
+                current = os.stat(os.path.join(root_path, rel_dir)).st_mtime_ns
+                if current == mtime_ns and not _racy(current):
+                    continue
+                if scanner.dir_entries(root_path, rel_dir, scan_config) != listing:
+                    return False
+            except OSError:
+                return False
+            scanned[rel_dir] = (current, listing)
+        return True
+
+    def section(self, path: str, file_stat: os.stat_result) -> Optional[tuple[str, str, dict]]:
+        """(sha256 исходных байтов, содержимое секции, ее атрибуты) неизмененного файла или None"""
+        cached = self._get(('section', path))
+        hit = cached is not None and cached[0] == file_stat.st_size and cached[1] == file_stat.st_mtime_ns
+        self._hit(hit)
+        return (cached[2], cached[3], cached[4]) if hit else None
+
+    def store_section(self, path: str, file_stat: os.stat_result, digest: str, content: str, source: dict):
+        """Запоминает прочитанную секцию; только что измененные файлы не кэшируются"""
+        if _racy(file_stat.st_mtime_ns):
+            return
+        self._put(('section', path), (file_stat.st_size, file_stat.st_mtime_ns, digest, content, source),
+                  len(content) + len(path) + ENTRY_OVERHEAD)
+
+    @staticmethod
+    def _output_signature(tree: str, files: list, stats: list) -> Optional[str]:
+        """Отпечаток входных данных документа: дерево, файлы с размерами и mtime, язык заголовков"""
+        digest = hashlib.sha256()
+        digest.update(f"{translator.translate('doc.structure_title')}\0"
+                      f"{translator.translate('doc.files_content_title')}\0{tree}\0".encode('utf-8', 'surrogateescape'))
+        for file_info, file_stat in zip(files, stats):
+            if file_stat is None or _racy(file_stat.st_mtime_ns):
+                return None
+            digest.update(f"{file_info['rel_path']}\0{file_info['language']}\0{file_stat.st_size}\0"
+                          f"{file_stat.st_mtime_ns}\0{file_stat.st_mode}\n".encode('utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _output_stamp(output_path: Path) -> Optional[tuple]:
+        try:
+            doc_stat = os.stat(output_path)
+            index_stat = os.stat(document.index_path_for(output_path))
+        except OSError:
+            return None
+        return doc_stat.st_size, doc_stat.st_mtime_ns, index_stat.st_size, index_stat.st_mtime_ns
+
+    def output_current(self, output_path: Path, tree: str, files: list, stats: list) -> bool:
+        """Документ на диске записан этим демоном из тех же данных и с тех пор не менялся"""
+        remembered = self._get(('output', os.path.abspath(output_path)))
+        if remembered is None or remembered[1] != self._output_stamp(output_path):
+            return False
+        if remembered[0] != self._output_signature(tree, files, stats):
+            return False
+        self.counters['unchanged_outputs'] += 1
+        return True
+
+    def remember_output(self, output_path: Path, tree: str, files: list, stats: list):
+        """Запоминает отпечаток только что записанного документа"""
+        key = ('output', os.path.abspath(output_path))
+        signature = self._output_signature(tree, files, stats)
+        stamp = self._output_stamp(output_path)
+        if signature is None or stamp is None:
+            self._drop(key)
+        else:
+            self._put(key, (signature, stamp), len(key[1]) + ENTRY_OVERHEAD)
+
+    def index(self, doc_path: Path) -> Optional[dict]:
+        """Замена document.load_index: индекс разбирается заново, только если документ или индекс изменились"""
+        key = ('index', os.path.abspath(doc_path))
+        stamp = self._output_stamp(doc_path)
+        cached = self._get(key)
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            self._hit(True)
+            return cached[1]
+        self._hit(False)
+        index = document.load_index(doc_path)
+        if index is None or stamp is None:
+            self._drop(key)
+        else:
+            self._put(key, (stamp, index), stamp[2] * 3)
+        return index
+
+    def status(self) -> dict:
+        """Размер кэша и счетчики попаданий для `ofp serve status`"""
+        return {'entries': len(self._entries), 'used_bytes': self.used_bytes, 'max_bytes': self.max_bytes,
+                'documents': sum(1 for key in self._entries if key[0] == 'output'), **self.counters}
+
+
+def _generate(args: list[str], cache: WarmCache):
+    """То же, что `ofp <dir>`"""
+    project_path = os.path.abspath(args[0])
+    commands.print_header()
+    config = utils.edit_config(utils.load_config(), project_path)
+    output_path = config.get('output_path', 'project_documentation.md')
+    print(commands.generate_documentation(config['project_path'], output_path, config, 'markdown',
+                                          Progress(ConsoleProgress()), cache=cache))
+    return True
+
+
+def _redo(args: list[str], cache: WarmCache):
+    commands.redo_documentation(cache)
+    return True
+
+
+def _tree(args: list[str], cache: WarmCache):
+    message = commands.show_directory_tree(args[0] if args else os.getcwd())
+    if message:
+        print(message)
+    return not message
+
+
+def _cat(args: list[str], cache: WarmCache):
+    success, text = commands.cat_section(args[0], args[1], cache)
+    if success:
+        print(text, end='')
+    else:
+        print(text)
+    return success
+
+
+HANDLERS = {'generate': _generate, 'redo': _redo, 'tree': _tree, 'cat': _cat}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Один запрос - одна строка JSON, ответ - одна строка JSON {"ok", "output"}"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        started = time.perf_counter()
+        try:
+            response = self.server.execute(json.loads(line))
+        except ValueError as e:
+            response = {'ok': False, 'output': utils.color_text(str(e), 'error') + '\n'}
+        response['seconds'] = round(time.perf_counter() - started, 6)
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8', 'surrogateescape') + b'\n')
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """
+    Демон на Unix-сокете. Запросы выполняются по одному, в рабочей папке и на языке
+    клиента, а их вывод перехватывается и отправляется клиенту целиком.
+    """
+
+    def __init__(self, socket_path: str, max_bytes: int = DEFAULT_MAX_MEMORY):
+        # Сокет доступен только владельцу: демон пишет файлы от его имени
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self.cache = WarmCache(max_bytes)
+        self.started = time.time()
+        self.requests = 0
+        self.stopping = False
+
+    def execute(self, request: dict) -> dict:
+        command = request.get('command')
+        if command == 'status':
+            return {'ok': True, 'output': '', 'status': {
+                'pid': os.getpid(), 'uptime': time.time() - self.started, 'requests': self.requests,
+                **self.cache.status()}}
+        if command == 'stop':
+            self.stopping = True
+            return {'ok': True, 'output': ''}
+        handler = HANDLERS.get(command)
+        if handler is None:
+            return {'ok': False, 'output': utils.color_text(
+                translator.translate('serve.unknown_command', command=command), 'error') + '\n'}
+
+        self.requests += 1
+        previous_dir = os.getcwd()
+        output = io.StringIO()
+        try:
+            os.chdir(request.get('cwd') or previous_dir)
+            translator.set_language(request.get('lang') or 'en')
+            with contextlib.redirect_stdout(output):
+                ok = handler(request.get('args') or [], self.cache)
+        except Exception as e:
+            output.write(utils.color_text(f"{translator.translate('common.error')}: {e}", 'error') + '\n')
+            ok = False
+        finally:
+            os.chdir(previous_dir)
+        return {'ok': bool(ok), 'output': output.getvalue()}
+
+
+def request(message: dict, socket_path: str = cfg.SOCKET_FILE) -> Optional[dict]:
+    """Отправляет запрос демону; None, если демон не запущен"""
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+    except (OSError, AttributeError):
+        return None
+    with client:
+        client.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        with client.makefile('rb') as f:
+            line = f.readline()
+    return json.loads(line) if line else None
+
+
+def serve(max_bytes: int = DEFAULT_MAX_MEMORY, socket_path: str = cfg.SOCKET_FILE) -> tuple[bool, str]:
+    """Запускает демон в текущем процессе и обслуживает запросы до `ofp serve stop`"""
+    if not hasattr(socket, 'AF_UNIX'):
+        return False, utils.color_text(translator.translate('serve.unsupported'), 'error')
+    if request({'command': 'status'}, socket_path) is not None:
+        return False, utils.color_text(translator.translate('serve.already_running', path=socket_path), 'warning')
+    if os.path.exists(socket_path):
+        # Сокет остался от демона, завершившегося аварийно
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+
+    server = DaemonServer(socket_path, max_bytes)
+    # По SIGTERM выходим через finally, чтобы убрать сокет
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(utils.color_text(translator.translate('serve.started', path=socket_path, pid=os.getpid(),
+                                                memory=utils.format_size(max_bytes)), 'success'), flush=True)
+    try:
+        while not server.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(OSError):
+            os.remove(socket_path)
+    return True, utils.color_text(translator.translate('serve.stopped', requests=server.requests), 'info')
+
+
+def stop(socket_path: str = cfg.SOCKET_FILE) -> tuple[bool, str]:
+    """Останавливает запущенный демон"""
+    if request({'command': 'stop'}, socket_path) is None:
+        return False, utils.color_text(translator.translate('serve.not_running', path=socket_path), 'warning')
+    return True, utils.color_text(translator.translate('serve.stop_requested'), 'success')
+
+
+def status(socket_path: str = cfg.SOCKET_FILE) -> tuple[bool, str]:
+    """Состояние демона и его кэша"""
+    response = request({'command': 'status'}, socket_path)
+    if response is None:
+        return False, utils.color_text(translator.translate('serve.not_running', path=socket_path), 'warning')
+    info = response['status']
+    return True, "\n".join([
+        utils.color_text(translator.translate('serve.status', pid=info['pid'], path=socket_path,
+                                              uptime=f"{info['uptime']:.0f}", requests=info['requests']), 'info'),
+        utils.color_text(translator.translate(
+            'serve.cache_status', entries=info['entries'], used=utils.format_size(info['used_bytes']),
+            max=utils.format_size(info['max_bytes']), hits=info['hits'], misses=info['misses'],
+            evictions=info['evictions'], unchanged=info['unchanged_outputs']), 'info'),
+    ])
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+from pathlib import Path
+from typing import Optional
+import program.config_utils as cfg
+
+STORE_DIR_NAME = cfg.SNAPSHOT_DIR_NAME
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    """Снимок не найден или хранилище повреждено"""
+
+
+class SnapshotStore:
+    """
+    Локальное хранилище снимков проекта с адресацией по содержимому:
+
+        objects/ab/cdef...  - сжатые zlib блобы, имя - sha256 несжатых байтов
+        snapshots/<id>.json - манифест снимка: ссылки на блоб дерева и блоб списка файлов
+
+    Одинаковое содержимое хранится один раз, поэтому хранилище растет с объемом
+    изменений, а не с числом снимков.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def has_blob(self, digest: str) -> bool:
+        return self._object_path(digest).exists()
+
+    def put_blob(self, data: bytes, digest: Optional[str] = None) -> tuple[str, int]:
+        """Сохраняет блоб, если его еще нет. Возвращает (sha256, записано байт на диск)"""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest, 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        compressed = zlib.compress(data, 6)
+        partial_path = path.with_name(f"{path.name}.{os.getpid()}.part")
+        with open(partial_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(partial_path, path)
+        return digest, len(compressed)
+
+    def get_blob(self, digest: str) -> bytes:
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            raise SnapshotError(f"{digest}: {e}")
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise SnapshotError(f"{digest}: checksum mismatch")
+        return data
+
+    def snapshots(self, project: Optional[str] = None) -> list[dict]:
+        """Манифесты снимков (без списков файлов), от старых к новым"""
+        result = []
+        if not self.snapshots_dir.is_dir():
+            return result
+        for path in self.snapshots_dir.glob("*.json"):
+            try:
+                manifest = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            if project is None or manifest.get('project_path') == project:
+                result.append(manifest)
+        return sorted(result, key=lambda manifest: (manifest['created'], manifest['id']))
+
+    def find(self, ref: str, project: Optional[str] = None) -> dict:
+        """Снимок по id, уникальному префиксу id или 'latest'"""
+        snapshots = self.snapshots(project)
+        if ref == 'latest':
+            matches = snapshots[-1:]
+        else:
+            matches = [manifest for manifest in snapshots if manifest['id'].startswith(ref)]
+        if len(matches) != 1:
+            raise SnapshotError(ref)
+        return matches[0]
+
+    def files(self, manifest: dict) -> list[dict]:
+        """Список файлов снимка: path, sha256, size, mtime_ns, mode, language"""
+        return json.loads(self.get_blob(manifest['files']))
+
+    def tree(self, manifest: dict) -> str:
+        return self.get_blob(manifest['tree']).decode('utf-8')
+
+    def save(self, project_path: str, tree: str, files_info: list[dict[str, str]], message: str = '') -> dict:
+        """
+        Записывает снимок. Файлы, у которых размер и mtime совпадают с последним снимком
+        этого проекта, не читаются: их блоб уже есть в хранилище.
+        """
+        previous = {}
+        earlier = self.snapshots(project_path)
+        if earlier:
+            previous = {entry['path']: entry for entry in self.files(earlier[-1])}
+
+        entries = []
+        stats = {'files': 0, 'bytes': 0, 'unchanged': 0, 'new_blobs': 0, 'stored_bytes': 0, 'errors': 0}
+        for file_info in files_info:
+            rel_path = file_info['rel_path']
+            try:
+                file_stat = os.stat(file_info['path'])
+            except OSError:
+                stats['errors'] += 1
+                continue
+            old = previous.get(rel_path)
+            if (old and old['size'] == file_stat.st_size and old['mtime_ns'] == file_stat.st_mtime_ns
+                    and self.has_blob(old['sha256'])):
+                digest = old['sha256']
+                stats['unchanged'] += 1
+            else:
+                try:
+                    with open(file_info['path'], 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    stats['errors'] += 1
+                    continue
+                digest, written = self.put_blob(data)
+                if written:
+                    stats['new_blobs'] += 1
+                    stats['stored_bytes'] += written
+            entries.append({
+                'path': rel_path,
+                'sha256': digest,
+                'size': file_stat.st_size,
+                'mtime_ns': file_stat.st_mtime_ns,
+                'mode': file_stat.st_mode & 0o7777,
+                'language': file_info['language'],
+            })
+            stats['files'] += 1
+            stats['bytes'] += file_stat.st_size
+
+        tree_digest, written = self.put_blob(tree.encode('utf-8'))
+        stats['stored_bytes'] += written
+        files_digest, written = self.put_blob(json.dumps(entries, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        stats['stored_bytes'] += written
+
+        created = time.time()
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'project': os.path.basename(os.path.normpath(project_path)),
+            'project_path': project_path,
+            'created': created,
+            'message': message,
+            'tree': tree_digest,
+            'files': files_digest,
+            'file_count': stats['files'],
+            'bytes': stats['bytes'],
+        }
+        digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+        manifest['id'] = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(created))}-{digest[:8]}"
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        path = self.snapshots_dir / f"{manifest['id']}.json"
+        partial_path = path.with_name(path.name + '.part')
+        partial_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(partial_path, path)
+        return {**manifest, 'stats': stats}
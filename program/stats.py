@@ -0,0 +1,89 @@
+import os
+import heapq
+from collections import Counter
+import program.document as document
+
+READ_CHUNK = 1024 * 1024
+
+
+def count_lines(path: str) -> int:
+    """Считает строки файла блоками по 1 МБ через bytes.count, не декодируя содержимое"""
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    # Последняя строка без завершающего перевода строки тоже считается
+    return lines + (last != b'\n')
+
+
+def _section_overhead(rel_path: str, language: str, size: int) -> int:
+    """Байты разметки вокруг содержимого файла в документе (как пишет DocumentWriter)"""
+    header = f"## {rel_path} <!-- ofp: bytes={size} sha256={document.EMPTY_HASH} mode=644 -->\n\n```{language}\n"
+    return len(header.encode('utf-8')) + len("\n```\n\n---\n\n") + 1
+
+
+def collect_stats(root_name: str, tree: str, files: list[dict[str, str]],
+                  with_lines: bool = True, top: int = 10) -> dict:
+    """
+    Состав проекта по результатам сканирования: файлы, байты и строки по расширениям
+    и языкам, самые большие файлы и папки, прогноз размера документации.
+    Содержимое читается только для подсчета строк (with_lines).
+    """
+    by_extension: dict[str, list[int]] = {}
+    by_language: dict[str, list[int]] = {}
+    dir_bytes = Counter()
+    sizes = []
+    total_bytes = total_lines = errors = 0
+    projected = len(document.FORMAT_MARKER) + len(tree.encode('utf-8')) + len(root_name) * 2 + 200
+    directories = set()
+
+    for file_info in files:
+        try:
+            file_stat = os.stat(file_info['path'])
+            lines = count_lines(file_info['path']) if with_lines else 0
+        except OSError:
+            errors += 1
+            continue
+        rel_path = file_info['rel_path']
+        size = file_stat.st_size
+        total_bytes += size
+        total_lines += lines
+        sizes.append((size, rel_path))
+
+        for key, groups in ((file_info['extension'].lower() or '-', by_extension), (file_info['language'], by_language)):
+            group = groups.setdefault(key, [0, 0, 0])
+            group[0] += 1
+            group[1] += size
+            group[2] += lines
+
+        for directory in document.parent_dirs(rel_path):
+            dir_bytes[directory] += size
+            directories.add(directory)
+
+        projected += size + _section_overhead(rel_path, file_info['language'], size)
+        projected += len(f"f {document.EMPTY_HASH} {size} {file_stat.st_mtime_ns} {rel_path}\n".encode('utf-8'))
+
+    projected += sum(len(f"d {document.EMPTY_HASH} {directory}\n".encode('utf-8')) for directory in directories)
+    dir_bytes.pop('.', None)
+
+    def table(groups: dict) -> list[dict]:
+        rows = [{'name': name, 'files': files_count, 'bytes': size, 'lines': lines}
+                for name, (files_count, size, lines) in groups.items()]
+        return sorted(rows, key=lambda row: (-row['bytes'], row['name']))
+
+    return {
+        'files': len(files) - errors,
+        'bytes': total_bytes,
+        'lines': total_lines if with_lines else None,
+        'errors': errors,
+        'extensions': table(by_extension),
+        'languages': table(by_language),
+        'largest_files': [{'path': path, 'bytes': size} for size, path in heapq.nlargest(top, sizes)],
+        'largest_dirs': [{'path': path, 'bytes': size} for path, size in dir_bytes.most_common(top)],
+        'projected_bytes': projected,
+    }
@@ -1,12 +1,13 @@
-import json
 import os
-import logging
-from pathlib import Path
-from typing import Dict, Any
+import marshal
 
-# Настройка логирования
-logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger('translator')
+
+def _logger():
+    """Возвращает логгер переводчика; logging импортируется только при ошибке"""
+    import logging
+    # Настройка логирования
+    logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+    return logging.getLogger('translator')
 
 
 class Translator:
@@ -14,8 +15,8 @@ class Translator:
 
     def __init__(self, locale_dir: str = "locales"):
         # Определяем абсолютный путь к папке переводов
-        script_dir = Path(__file__).parent
-        self.locale_dir = script_dir / locale_dir
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.locale_dir = os.path.join(script_dir, locale_dir)
         
         self.translations = {}
         self.current_lang = "en"
@@ -23,22 +24,71 @@ class Translator:
 
         # Создаем директорию переводов, если она не существует
         os.makedirs(self.locale_dir, exist_ok=True)
-        self.load_translations()
 
     def load_translations(self):
-        """Загружает переводы из JSON файлов"""
-        for lang_file in self.locale_dir.glob("*.json"):
-            lang = lang_file.stem
+        """Загружает переводы из всех JSON файлов"""
+        for name in os.listdir(self.locale_dir):
+            if name.endswith(".json"):
+                self._load_language(name[:-len(".json")])
+
+    def _cache_path(self, lang: str) -> str:
+        """Путь к скомпилированному каталогу языка (как .pyc - рядом с исходником в __pycache__)"""
+        return os.path.join(self.locale_dir, "__pycache__", f"{lang}.marshal-{marshal.version}")
+
+    def _load_language(self, lang: str) -> bool:
+        """
+        Загружает каталог одного языка при первом обращении к нему. Плоский каталог
+        берется из кэша marshal, если mtime и размер JSON не изменились.
+        """
+        if lang in self.translations:
+            return True
+        lang_file = os.path.join(self.locale_dir, f"{lang}.json")
+        try:
+            source_stat = os.stat(lang_file)
+        except OSError:
+            return False
+        stamp = (source_stat.st_mtime_ns, source_stat.st_size)
+
+        cache_path = self._cache_path(lang)
+        try:
+            with open(cache_path, "rb") as f:
+                cached_stamp, catalog = marshal.load(f)
+            if cached_stamp == stamp:
+                self.translations[lang] = catalog
+                return True
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        # json нужен только при промахе кэша
+        import json
+        try:
+            with open(lang_file, "r", encoding="utf-8") as f:
+                catalog = flatten_catalog(json.load(f))
+        except Exception as e:
+            _logger().error(f"Ошибка загрузки файла {lang_file}: {str(e)}")
+            return False
+        self.translations[lang] = catalog
+        self._write_cache(cache_path, stamp, catalog)
+        return True
+
+    @staticmethod
+    def _write_cache(cache_path: str, stamp: tuple, catalog: dict):
+        """Атомарно сохраняет плоский каталог; ошибки записи (например, нет прав) не критичны"""
+        partial_path = f"{cache_path}.{os.getpid()}.part"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(partial_path, "wb") as f:
+                marshal.dump((stamp, catalog), f)
+            os.replace(partial_path, cache_path)
+        except OSError:
             try:
-                with open(lang_file, "r", encoding="utf-8") as f:
-                    self.translations[lang] = json.load(f)
-                    logger.debug(f"Загружен файл локализации: {lang}")
-            except Exception as e:
-                logger.error(f"Ошибка загрузки файла {lang_file}: {str(e)}")
+                os.remove(partial_path)
+            except OSError:
+                pass
 
     def set_language(self, lang: str):
         """Устанавливает текущий язык"""
-        if lang in self.translations:
+        if self._load_language(lang):
             self.current_lang = lang
             return True
         return False
@@ -52,42 +102,38 @@ class Translator:
         if not key:
             return key
 
-        # Разбиваем ключ на части
-        parts = key.split('.')
-
-        # Получаем перевод из текущего языка
-        result = self._find_translation(self.current_lang, parts)
+        # Получаем перевод из текущего языка одним поиском по плоскому каталогу
+        result = None
+        if self._load_language(self.current_lang):
+            result = self.translations[self.current_lang].get(key)
 
         # Если перевод не найден, пробуем получить из языка по умолчанию
-        if result is None and self.current_lang != self.default_lang:
-            result = self._find_translation(self.default_lang, parts)
+        if result is None and self.current_lang != self.default_lang and self._load_language(self.default_lang):
+            result = self.translations[self.default_lang].get(key)
 
         # Если перевод все еще не найден, возвращаем последнюю часть ключа
         if result is None:
-            result = parts[-1].replace('_', ' ').capitalize()
+            result = key.rsplit('.', 1)[-1].replace('_', ' ').capitalize()
 
         # Применяем параметры форматирования
-        if kwargs and isinstance(result, str):
+        if kwargs:
             try:
                 result = result.format(**kwargs)
             except Exception as e:
-                logger.warning(f"Ошибка форматирования для {key}: {str(e)}")
+                _logger().warning(f"Ошибка форматирования для {key}: {str(e)}")
 
         return result
 
-    def _find_translation(self, lang, parts):
-        """Находит перевод по частям ключа"""
-        if lang not in self.translations:
-            return None
-
-        current = self.translations[lang]
-        for part in parts:
-            if isinstance(current, dict) and part in current:
-                current = current[part]
-            else:
-                return None
 
-        return current if isinstance(current, str) else None
+def flatten_catalog(data: dict, prefix: str = '') -> dict[str, str]:
+    """Превращает вложенный каталог переводов в словарь 'раздел.ключ' -> строка"""
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(flatten_catalog(value, f"{prefix}{key}."))
+        elif isinstance(value, str):
+            flat[f"{prefix}{key}"] = value
+    return flat
 
 
 # Создаем глобальный экземпляр переводчика
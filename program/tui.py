@@ -1,17 +1,24 @@
 from textual.app import App, ComposeResult
 from textual.widgets import (
-    Header, Footer, Button, Static, Input, TextArea, DirectoryTree
+    Header, Footer, Button, Static, Input, TextArea, DirectoryTree, ProgressBar, OptionList
 )
-from textual.containers import Container, ScrollableContainer
+from textual.containers import Container, ScrollableContainer, Horizontal
 from textual.screen import Screen
 from textual import on, events
 from pathlib import Path
+from functools import partial
+from rich.markup import escape
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from program import utils, config_utils as cfg
 
 import program.commands as commands
+import program.document as document
+from program.config import compile_config
+from program.progress import Progress
 from textual.widgets import Markdown as TextualMarkdown
 from program.translator import translator
 
@@ -313,7 +320,10 @@ class LanguageScreen(Screen):
 
 
 class MarkdownViewer(Screen):
-    """Экран для просмотра Markdown с форматированием"""
+    """
+    Экран просмотра документации: список файлов из индекса секций и показ
+    только выбранной секции, прочитанной с диска по смещению
+    """
     CSS = SHARED_CSS + """
     Screen {
         align: center middle;
@@ -326,9 +336,20 @@ class MarkdownViewer(Screen):
         align: center top;
     }
 
-    #md-viewer {
+    #md-body {
         width: 100%;
         height: 85%;
+    }
+
+    #md-files {
+        width: 30%;
+        height: 100%;
+        border: solid $accent;
+    }
+
+    #md-viewer {
+        width: 70%;
+        height: 100%;
         border: solid $accent;
         padding: 1;
     }
@@ -343,40 +364,200 @@ class MarkdownViewer(Screen):
     #close-viewer {
         width: 15%;
         margin: 1;
-        /* Отключение выделения текста не поддерживается в Textual */
-    }
-    
-    Button {
-        /* Отключение выделения текста не поддерживается в Textual */
     }
     """
-    
-    def __init__(self, content: str):
-        super().__init__()
-        self.content = self.sanitize_markdown(content)
 
-    def sanitize_markdown(self, text: str) -> str:
-        """Очистка Markdown от ANSI кодов и проблемных символов"""
-        text = text.replace("[/]", "").replace("[red]", "").replace("[green]", "")
-        return text
+    # Больше этого объема секция не рендерится целиком - Markdown-виджет на таких объемах медленный
+    MAX_VIEW_BYTES = 256 * 1024
+
+    def __init__(self, doc_path: Path):
+        super().__init__()
+        self.doc_path = Path(doc_path)
+        self.doc_file = None
+        self.sections = []
+        self.structure_offset = 0
 
     def compose(self) -> ComposeResult:
-        # Создаем контейнер для всего содержимого
         with Container(id="md-content"):
-            # Markdown в скроллируемом контейнере
-            yield ScrollableContainer(
-                TextualMarkdown(self.content),
-                id="md-viewer"
-            )
+            with Horizontal(id="md-body"):
+                yield OptionList(id="md-files")
+                yield ScrollableContainer(
+                    TextualMarkdown(translator.translate('tui.viewer_loading'), id="md-section"),
+                    id="md-viewer"
+                )
             # Отдельный контейнер для кнопки
             with Container(id="close-button-container"):
                 yield Button(translator.translate('common.cancel'), id="close-viewer")
 
+    def on_mount(self) -> None:
+        self.run_worker(self.load_index, thread=True, exclusive=True)
+
+    def load_index(self) -> None:
+        """Загружает (или строит разбором) индекс секций в рабочем потоке"""
+        try:
+            index = document.load_index(self.doc_path) or document.build_index(self.doc_path)
+            with open(self.doc_path, 'rb') as f:
+                structure_offset = document.find_structure_offset(f)
+        except Exception as e:
+            self.app.call_from_thread(self.show_error, str(e))
+            return
+        self.app.call_from_thread(self.show_index, index, structure_offset)
+
+    def show_index(self, index: dict, structure_offset: int) -> None:
+        """Заполняет список файлов и показывает структуру проекта"""
+        self.sections = index['sections']
+        self.structure_offset = structure_offset
+        self.doc_file = open(self.doc_path, 'rb')
+        file_list = self.query_one("#md-files", OptionList)
+        file_list.add_options([translator.translate('doc.structure_title')] +
+                              [section['path'] for section in self.sections])
+        file_list.highlighted = 0
+        file_list.focus()
+
+    def show_error(self, error: str) -> None:
+        self.query_one("#md-section", TextualMarkdown).update(translator.translate('tui.open_error_red', error=error))
+
+    def read_limited(self, offset: int, length: int) -> tuple[str, bool]:
+        """Читает не больше MAX_VIEW_BYTES из документа; возвращает текст и признак обрезки"""
+        self.doc_file.seek(offset)
+        data = self.doc_file.read(min(length, self.MAX_VIEW_BYTES))
+        return data.decode('utf-8', errors='replace' if len(data) == length else 'ignore'), len(data) < length
+
+    def render_section(self, number: int) -> str:
+        """Markdown одной секции (0 - структура проекта)"""
+        if number == 0:
+            end = self.sections[0]['offset'] if self.sections else os.path.getsize(self.doc_path)
+            text, truncated = self.read_limited(self.structure_offset, end - self.structure_offset)
+        else:
+            section = self.sections[number - 1]
+            content, truncated = self.read_limited(section['content_offset'], section['content_length'])
+            fence = document.make_fence(content)
+            text = f"## {section['path']}\n\n{fence}{section['language']}\n{content}\n{fence}\n"
+        if truncated:
+            text += f"\n> {translator.translate('tui.viewer_truncated', size=utils.format_size(self.MAX_VIEW_BYTES))}\n"
+        return text
+
+    @on(OptionList.OptionHighlighted, "#md-files")
+    async def on_file_highlighted(self, event: OptionList.OptionHighlighted) -> None:
+        if self.doc_file is None:
+            return
+        await self.query_one("#md-section", TextualMarkdown).update(self.render_section(event.option_index))
+        self.query_one("#md-viewer").scroll_home(animate=False)
+
+    def on_unmount(self) -> None:
+        if self.doc_file is not None:
+            self.doc_file.close()
+            self.doc_file = None
+
     @on(Button.Pressed, "#close-viewer")
     def close_viewer(self):
         self.app.pop_screen()
 
 
+class ProjectTree(DirectoryTree):
+    """
+    Дерево папок, которое читает папку только при раскрытии узла, применяет
+    правила игнорирования и показывает у папок число файлов и размер, считая их в фоне
+    """
+
+    def __init__(self, path: str, config: dict, **kwargs):
+        self.rules = compile_config(config)
+        self.dir_stats: dict[str, tuple[int, int]] = {}
+        self.waiting_nodes = {}
+        self.scheduled = set()
+        self.stop_event = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Корень разрешается один раз: пути узлов строятся от него, и rel_path сравнивает однородные пути
+        super().__init__(Path(path).resolve(), **kwargs)
+
+    def rel_path(self, path: Path) -> str:
+        return os.path.relpath(path, self.path).replace('\\', '/')
+
+    def filter_paths(self, paths):
+        """Вызывается в потоке загрузки папки: отбрасывает игнорируемое и ставит подсчет размеров"""
+        visible = []
+        for path in paths:
+            try:
+                is_dir = path.is_dir()
+            except OSError:
+                is_dir = False
+            if self.rules.ignores(path.name, self.rel_path(path), is_dir):
+                continue
+            visible.append(path)
+            if is_dir:
+                self.schedule_stats(str(path))
+        return visible
+
+    def schedule_stats(self, path: str) -> None:
+        if path not in self.scheduled and not self.stop_event.is_set():
+            self.scheduled.add(path)
+            self.executor.submit(self.compute_stats, path)
+
+    def compute_stats(self, path: str) -> None:
+        """Считает файлы и размер папки (с учетом игнорирования) и сообщает интерфейсу"""
+        try:
+            self.walk_stats(path, self.rel_path(Path(path)))
+            if not self.stop_event.is_set():
+                self.app.call_from_thread(self.stats_ready, path)
+        except RuntimeError:
+            # Экран или приложение уже закрываются
+            return
+
+    def walk_stats(self, path: str, rel_dir: str) -> tuple[int, int]:
+        """Рекурсивный подсчет; результаты вложенных папок тоже кэшируются"""
+        if path in self.dir_stats:
+            return self.dir_stats[path]
+        files = size = 0
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            entries = []
+        for entry in entries:
+            if self.stop_event.is_set():
+                raise RuntimeError()
+            rel_path = entry.name if rel_dir in ('', '.') else f"{rel_dir}/{entry.name}"
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if self.rules.ignores(entry.name, rel_path, is_dir):
+                    continue
+                if is_dir:
+                    sub_files, sub_size = self.walk_stats(entry.path, rel_path)
+                    files += sub_files
+                    size += sub_size
+                else:
+                    files += 1
+                    size += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+        self.dir_stats[path] = (files, size)
+        return files, size
+
+    def stats_ready(self, path: str) -> None:
+        node = self.waiting_nodes.pop(path, None)
+        if node is not None:
+            node.refresh()
+
+    def render_label(self, node, base_style, style):
+        label = super().render_label(node, base_style, style)
+        if node.data is None or not node.allow_expand:
+            return label
+        path = str(node.data.path)
+        stats = self.dir_stats.get(path)
+        if stats is None:
+            self.waiting_nodes[path] = node
+            if node.is_root:
+                self.schedule_stats(path)
+            return label
+        label.append(f"  {translator.translate('tui.tree_dir_stats', count=stats[0], size=utils.format_size(stats[1]))}",
+                     style="dim")
+        return label
+
+    def on_unmount(self) -> None:
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
 class TreeViewScreen(Screen):
     """Экран просмотра дерева директорий"""
     BINDINGS = [("`", "pop_screen", "Закрыть")]
@@ -427,14 +608,13 @@ class TreeViewScreen(Screen):
     #tree-output-container {
         width: 100%;
         height: 70%;
-        overflow: auto scroll;
         border: solid $accent-darken-1;
         padding: 1;
     }
     
     #tree-output {
         width: 100%;
-        height: auto;
+        height: 100%;
     }
     """
     
@@ -458,7 +638,7 @@ class TreeViewScreen(Screen):
                 id="tree-header"
             ),
             Container(
-                Static("", id="tree-output"),
+                ProjectTree(self.directory, commands.tree_view_config(), id="tree-output"),
                 id="tree-output-container"
             ),
             id="tree-container"
@@ -468,8 +648,6 @@ class TreeViewScreen(Screen):
         """При монтировании экрана показываем дерево текущей директории"""
         # Обновляем переводы кнопок
         self.update_translations()
-        # Показываем дерево директорий
-        self.show_tree()
         
     def update_translations(self):
         """Обновить все переводы в интерфейсе с защитой от ошибок"""
@@ -497,23 +675,11 @@ class TreeViewScreen(Screen):
             # Не прерываем выполнение при ошибках перевода
     
     def show_tree(self) -> None:
-        """Показать дерево директорий"""
-        try:
-            # Получаем дерево директорий как текст
-            tree_text = commands.show_directory_tree(self.directory)
-            
-            # Заменяем ANSI-коды на пустые строки
-            import re
-            # Паттерн для поиска ANSI escape-последовательностей
-            ansi_pattern = re.compile(r'\x1B\[[0-9;]*[mK]')
-            clean_text = ansi_pattern.sub('', tree_text)
-            
-            # Выводим очищенный текст
-            self.query_one("#tree-output").update(clean_text)
-        except Exception as e:
-            error_text = translator.translate('common.error') + f": {str(e)}"
-            self.query_one("#tree-output").update(error_text)
-    
+        """Показать дерево директорий: новое дерево читает только раскрываемые папки"""
+        container = self.query_one("#tree-output-container")
+        container.remove_children()
+        container.mount(ProjectTree(self.directory, commands.tree_view_config(), id="tree-output"))
+
     @on(Button.Pressed, "#show-tree")
     def on_show_tree(self) -> None:
         """Обработчик для кнопки показа дерева"""
@@ -523,7 +689,7 @@ class TreeViewScreen(Screen):
             self.show_tree()
         else:
             error_msg = translator.translate('common.error') + f": {dir_path} " + translator.translate('commands.not_directory').replace("{path}", "")
-            self.query_one("#tree-output").update(error_msg)
+            self.notify(error_msg, severity="error")
     
     @on(Button.Pressed, "#close-tree")
     def on_close_tree(self) -> None:
@@ -577,12 +743,35 @@ class OFPTUI(App):
         background: $boost;
         color: $text;
         overflow: auto;
+    }
+
+    #generation {
+        display: none;
+        width: 95%;
+        height: auto;
+        margin: 0 1;
+    }
+    #generation.running {
+        display: block;
+    }
+    #generation-row {
+        layout: horizontal;
+        height: auto;
+    }
+    #gen-progress {
+        width: 1fr;
+    }
+    #cancel-generate {
+        width: auto;
     } """
     
     BINDINGS = [
         ("q", "quit", "Exit"),
     ]
 
+    # Событие отмены текущей фоновой генерации (None, если генерация не идет)
+    cancel_event = None
+
     def compose(self) -> ComposeResult:
         # Создаем Header и Footer без параметров, а затем настраиваем их
         yield Header(id="header", name="header")
@@ -604,6 +793,12 @@ class OFPTUI(App):
                 yield Button(translator.translate('tui.tree_button'), id="tree-view")
                 yield Button(translator.translate('tui.language_button'), id="change-lang")
                 
+        with Container(id="generation"):
+            yield Static("", id="gen-status")
+            with Container(id="generation-row"):
+                yield ProgressBar(id="gen-progress", show_eta=True)
+                yield Button(translator.translate('common.cancel'), id="cancel-generate", variant="error")
+
         yield Static(translator.translate('tui.app_title'), id="content")
         
     def on_mount(self) -> None:
@@ -621,6 +816,9 @@ class OFPTUI(App):
         footer.highlight_name = translator.translate('ui.footer_help')
 
     def action_quit(self):
+        # Останавливаем фоновую генерацию, чтобы она не оставила временных файлов
+        if self.cancel_event is not None:
+            self.cancel_event.set()
         self.exit()
 
     @on(Button.Pressed, "#generate")
@@ -652,23 +850,65 @@ class OFPTUI(App):
                     return
 
                 content.update(translator.translate('tui.generation_started'))
-                try:
-                    result = commands.generate_documentation(project_path, output_path)
-                    clean_result = commands.ansi_to_textual(result)
-                    content.update(translator.translate('tui.generation_complete', result=clean_result))
-
-                    config = utils.load_config()
-                    config['project_path'] = project_path
-                    config['output_path'] = output_path
-                    utils.save_config(config)
-
-                except Exception as e:
-                    content.update(translator.translate('tui.generation_error', error=str(e)))
+                self.start_generation(project_path, output_path)
 
             self.push_screen(output_screen, handle_output_path)
 
         self.push_screen(project_screen, handle_project_path)
 
+    def start_generation(self, project_path: str, output_path: str) -> None:
+        """Запускает генерацию в рабочем потоке, не блокируя интерфейс"""
+        self.cancel_event = threading.Event()
+        self.query_one("#generate").disabled = True
+        self.query_one("#cancel-generate").disabled = False
+        self.query_one("#gen-progress", ProgressBar).update(total=None, progress=0)
+        self.query_one("#gen-status").update(translator.translate('tui.generation_scanning'))
+        self.query_one("#generation").add_class("running")
+        self.run_worker(partial(self.generate_in_thread, project_path, output_path, self.cancel_event),
+                        thread=True, exclusive=True, group="generate")
+
+    def generate_in_thread(self, project_path: str, output_path: str, cancel_event: threading.Event) -> None:
+        """Выполняется в рабочем потоке; интерфейс обновляется только через call_from_thread"""
+        progress = Progress(lambda snapshot: self.call_from_thread(self.show_progress, snapshot), cancel_event)
+        try:
+            result = commands.generate_documentation(project_path, output_path, progress=progress)
+            if cancel_event.is_set():
+                text = commands.ansi_to_textual(result)
+            else:
+                text = translator.translate('tui.generation_complete', result=commands.ansi_to_textual(result))
+        except Exception as e:
+            text = translator.translate('tui.generation_error', error=str(e))
+        self.call_from_thread(self.finish_generation, text)
+
+    def show_progress(self, snapshot: dict) -> None:
+        """Обновляет полосу прогресса по снимку из рабочего потока"""
+        if snapshot['phase'] != 'write':
+            return
+        self.query_one("#gen-progress", ProgressBar).update(total=snapshot['files_total'] or None,
+                                                           progress=snapshot['files_done'])
+        self.query_one("#gen-status").update(translator.translate(
+            'tui.generation_progress',
+            done=snapshot['files_done'], total=snapshot['files_total'],
+            size=utils.format_size(snapshot['bytes_done']),
+            speed=utils.format_size(snapshot['bytes_per_second']),
+            path=escape(snapshot['path'])
+        ))
+
+    def finish_generation(self, text: str) -> None:
+        """Скрывает прогресс и показывает результат генерации"""
+        self.cancel_event = None
+        self.query_one("#generation").remove_class("running")
+        self.query_one("#generate").disabled = False
+        self.query_one("#content").update(text)
+
+    @on(Button.Pressed, "#cancel-generate")
+    def on_cancel_generate(self) -> None:
+        """Отмена фоновой генерации"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.query_one("#cancel-generate").disabled = True
+            self.query_one("#gen-status").update(translator.translate('tui.generation_canceling'))
+
     @on(Button.Pressed, "#open_doc")
     async def open_documentation(self) -> None:
         """Открытие документации"""
@@ -737,9 +977,7 @@ class OFPTUI(App):
                 return
 
             if path and os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    await self.push_screen(MarkdownViewer(content))
+                await self.push_screen(MarkdownViewer(path))
         except Exception as e:
             error_msg = str(e).replace("[", "").replace("]", "")
             self.notify(translator.translate('tui.open_error_red', error=error_msg), severity="error")
@@ -1,12 +1,15 @@
 import os
 import json
-import subprocess
-import platform
 from pathlib import Path
 from typing import Tuple, Optional
-import fnmatch
-from colorama import init, Style
+from colorama import init
 import program.config_utils as cfg
+import program.config as config_module
+import program.scanner as scanner
+import program.profiling as profiling
+# Преобразования содержимого живут в document, здесь - для существующих вызовов utils.*
+from program.document import extract_code_blocks, decode_content, content_from_bytes, section_content
+from program.scanner import get_language
 from program.translator import translator
 
 init(autoreset=True)
@@ -58,69 +61,78 @@ def load_latest_paths() -> dict:
 
 def color_text(text: str, color_type: str) -> str:
     """Возвращает цветной текст для консоли"""
-    return f"{cfg.COLORS.get(color_type, '')}{text}{Style.RESET_ALL}"
+    return f"{cfg.COLORS.get(color_type, '')}{text}{cfg.RESET_COLOR}"
 
 
-def load_config() -> dict:
-    """Загружает конфигурацию без рекурсии"""
-    try:
-        config_path = Path(cfg.CONFIG_FILE)
-        if config_path.exists():
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                if config.get('project_path'):
-                    project_config_path = Path(config['project_path']) / cfg.CONFIG_FILE
-                    if not project_config_path.exists():
-                        project_config_path.parent.mkdir(parents=True, exist_ok=True)
-                        with open(project_config_path, 'w', encoding='utf-8') as pf:
-                            json.dump(config, pf, indent=2)
-                        config_path.unlink()
-                return {**cfg.DEFAULT_CONFIG, **config}
+def format_size(size: float) -> str:
+    """Форматирует размер в байтах в человекочитаемый вид (B, KB, MB, GB)"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
 
-        project_config_path = Path(cfg.DEFAULT_CONFIG['project_path']) / cfg.CONFIG_FILE if cfg.DEFAULT_CONFIG['project_path'] else None
-        if project_config_path and project_config_path.exists():
-            with open(project_config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return {**cfg.DEFAULT_CONFIG, **config}
 
-        return cfg.DEFAULT_CONFIG.copy()
+def migrate_config() -> Optional[Path]:
+    """
+    Переносит конфиг из текущей папки в папку его проекта, если там конфига еще нет.
+    Вызывается явно перед генерацией; возвращает путь перенесенного конфига или None.
+    """
+    config_path = Path(cfg.CONFIG_FILE)
+    try:
+        config = config_module.read_config_file(config_path)
+        if config is None or not config.get('project_path'):
+            return None
+        project_config_path = Path(config['project_path']) / cfg.CONFIG_FILE
+        if project_config_path.exists() or project_config_path.resolve() == config_path.resolve():
+            return None
+        project_config_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(project_config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        config_path.unlink()
+        return project_config_path
     except Exception as e:
         print(color_text(translator.translate('utils.error_loading_config', error=str(e)), 'error'))
-        return cfg.DEFAULT_CONFIG.copy()
+        return None
 
 
-def should_ignore(path: str, rel_path: str, config: dict) -> bool:
-    """Проверяет нужно ли игнорировать файл/папку"""
-    name = os.path.basename(path)
-    rel_path = rel_path.replace('\\', '/')
-    is_dir = os.path.isdir(path)
+def load_config() -> dict:
+    """
+    Загружает конфигурацию без рекурсии и без побочных эффектов: файлы только читаются
+    (заново - лишь при изменении). Перенос конфига в папку проекта - migrate_config.
+    """
+    try:
+        config = config_module.read_config_file(Path(cfg.CONFIG_FILE))
+        if config is not None:
+            return {**config_module.default_config(), **config}
 
-    if config.get('whitelist_paths') and config['whitelist_paths']:
-        match_found = False
-        for pattern in config['whitelist_paths']:
-            norm_pattern = pattern.replace('\\', '/').rstrip('/') + '/'
-            if rel_path.startswith(norm_pattern) or norm_pattern.startswith(rel_path + '/'):
-                match_found = True
-                break
-        if not match_found:
-            return True
+        project_config_path = Path(cfg.DEFAULT_CONFIG['project_path']) / cfg.CONFIG_FILE if cfg.DEFAULT_CONFIG['project_path'] else None
+        if project_config_path:
+            config = config_module.read_config_file(project_config_path)
+            if config is not None:
+                return {**config_module.default_config(), **config}
 
-    if not config['show_hidden'] and name.startswith('.'):
-        return True
+        return config_module.default_config()
+    except Exception as e:
+        print(color_text(translator.translate('utils.error_loading_config', error=str(e)), 'error'))
+        return config_module.default_config()
 
-    for ignore_pattern in config['ignore_paths']:
-        if fnmatch.fnmatch(rel_path, ignore_pattern):
-            return True
 
-    if is_dir:
-        return any(ignore in rel_path.split('/') for ignore in config['ignore_folders'])
+def load_project_config(project_path: str, overrides: Optional[dict] = None) -> dict:
+    """Загружает конфигурацию конкретного проекта без побочных эффектов"""
+    config = config_module.default_config()
+    config.update(config_module.read_config_file(Path(project_path) / cfg.CONFIG_FILE) or {})
+    if overrides:
+        config.update(config_module.validate_config(overrides))
+    config['project_path'] = project_path
+    return config
 
-    return any(fnmatch.fnmatch(name, pattern) for pattern in config['ignore_files'])
 
+def should_ignore(path: str, rel_path: str, config) -> bool:
+    """Проверяет нужно ли игнорировать файл/папку"""
+    return config_module.compile_config(config).ignores(
+        os.path.basename(path), rel_path.replace('\\', '/'), os.path.isdir(path))
 
-def get_language(extension: str) -> str:
-    """Определяет язык для подсветки синтаксиса"""
-    return cfg.LANGUAGE_MAPPING.get(extension.lower(), 'text')
 
 def get_config_path(config: Optional[dict] = None) -> Path:
     """Возвращает путь к файлу конфигурации"""
@@ -160,92 +172,41 @@ def get_input(prompt: str, default: Optional[str] = None) -> str:
 
 
 
-def generate_file_tree(root_path: str, config: dict, current_path: str = None, prefix: str = '') -> Tuple[ str, list[dict[str, str]]]:
+def generate_file_tree(root_path: str, config, progress=None, on_ignored=None,
+                       on_dir=None, dirs: Optional[dict] = None) -> Tuple[str, list[dict[str, str]]]:
     """Генерирует дерево файлов"""
-    if current_path is None:
-        current_path = root_path
-
-    files_info = []
-    tree = []
-
-    if not os.path.isdir(current_path):
-        return '', files_info
-
-    contents = sorted(os.listdir(current_path))
-    pointers = ['├── '] * (len(contents) - 1) + ['└── ']
-
-    for pointer, name in zip(pointers, contents):
-        full_path = os.path.join(current_path, name)
-        rel_path = os.path.relpath(full_path, start=root_path).replace('\\', '/')
-
-        if should_ignore(full_path, rel_path, config):
-            continue
-
-        if os.path.isdir(full_path):
-            tree.append(f"{prefix}{pointer}{name}/")
-            subtree, sub_files = generate_file_tree(root_path, config, full_path,
-                                                    prefix + ('│   ' if pointer == '├── ' else '    '))
-            tree.append(subtree)
-            files_info.extend(sub_files)
-        else:
-            tree.append(f"{prefix}{pointer}{name}")
-            file_ext = os.path.splitext(name)[1]
-            files_info.append({
-                'path': full_path,
-                'rel_path': rel_path,
-                'extension': file_ext,
-                'language': get_language(file_ext)
-            })
-
-    return '\n'.join(tree), files_info
-
-
-
-def extract_code_blocks(content: str) -> str:
-    """Извлекает блоки кода из Markdown"""
-    lines = content.split('\n')
-    result = []
-    in_block = False
-    lang = ''
-    block = []
-
-    for line in lines:
-        if line.startswith('```') and not in_block:
-            in_block = True
-            lang = line[3:].strip()
-        elif line.startswith('```') and in_block:
-            in_block = False
-            if lang:
-                result.append(f"```{lang}")
-                result.extend(block)
-                result.append("```\n")
-            block = []
-            lang = ''
-        elif in_block:
-            block.append(line)
-        else:
-            result.append(line)
-
-    return '\n'.join(result)
+    return scanner.scan(root_path, config, progress, on_ignored, on_dir, dirs)
+
+
+def read_file_data(file_info: dict[str, str]) -> Tuple[Optional[bytes], str, dict]:
+    """
+    Читает файл один раз: исходные байты (None при ошибке), текст секции документации
+    и ее атрибуты из document.section_content
+    """
+    try:
+        with profiling.phase('read'):
+            with open(file_info['path'], 'rb') as f:
+                raw = f.read()
+    except Exception as e:
+        return None, f"Error reading file: {str(e)}", {}
+    profiling.count('files_read')
+    profiling.count('bytes_read', len(raw))
+    # Байты читаются как есть, поэтому переводы строк сохраняются и распаковка дает тот же файл
+    with profiling.phase('transform'):
+        return (raw, *section_content(raw, file_info['extension']))
+
+
+def read_file_content(file_info: dict[str, str]) -> str:
+    """Читает содержимое файла в том виде, в котором оно попадает в документацию (base64 - раскодированным)"""
+    raw, content, attrs = read_file_data(file_info)
+    return decode_content(raw) if attrs.get('encoding') == 'base64' else content
 
 
 def get_file_contents(files_info: list[dict[str, str]]) -> str:
     """Получает содержимое файлов"""
     contents = []
     for file_info in files_info:
-        try:
-            with open(file_info['path'], 'r', encoding='utf-8') as f:
-                content = f.read()
-                if file_info['extension'] == '.md':
-                    content = extract_code_blocks(content)
-        except UnicodeDecodeError:
-            try:
-                with open(file_info['path'], 'r', encoding='latin-1') as f:
-                    content = f.read()
-            except:
-                content = "Binary file or unsupported encoding"
-        except Exception as e:
-            content = f"Error reading file: {str(e)}"
+        content = read_file_content(file_info)
 
         contents.append(
             f"## {file_info['rel_path']}\n\n"
@@ -0,0 +1,47 @@
+import subprocess
+from program.translator import translator
+
+# Метка для новых файлов, еще не добавленных в git (как '??' в git status)
+UNTRACKED = '?'
+
+
+class GitError(Exception):
+    """Ошибка вызова git (git не установлен, не репозиторий, неизвестная ревизия)"""
+
+
+def _git(project_path: str, *args: str) -> bytes:
+    try:
+        proc = subprocess.run(['git', '-C', project_path, *args], capture_output=True, check=False)
+    except FileNotFoundError:
+        raise GitError(translator.translate('vcs.git_not_found'))
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.decode('utf-8', errors='replace').strip())
+    return proc.stdout
+
+
+def changed_files(project_path: str, rev: str, include_untracked: bool = True) -> dict[str, str]:
+    """
+    Файлы, измененные с ревизии rev (включая незакоммиченные правки), через локальный
+    `git diff --name-status`: путь относительно project_path -> статус (A, M, D, R, C, T, ?).
+    Переименованный файл попадает под новым путем со статусом R. Сеть не нужна.
+    """
+    output = _git(project_path, 'diff', '--name-status', '-z', '--relative', '-M', rev, '--')
+    tokens = output.decode('utf-8', errors='surrogateescape').split('\0')
+    changes = {}
+    position = 0
+    while position < len(tokens) and tokens[position]:
+        status = tokens[position][0]
+        if status in 'RC':
+            # Для переименований и копий git выводит старый и новый путь
+            changes[tokens[position + 2]] = status
+            position += 3
+        else:
+            changes[tokens[position + 1]] = status
+            position += 2
+
+    if include_untracked:
+        output = _git(project_path, 'ls-files', '--others', '--exclude-standard', '-z')
+        for rel_path in output.decode('utf-8', errors='surrogateescape').split('\0'):
+            if rel_path:
+                changes.setdefault(rel_path, UNTRACKED)
+    return changes
@@ -0,0 +1,41 @@
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import program.document as document  # noqa: E402
+
+
+def run_ofp(*args, cwd=None, text=True):
+    """Запускает main.py как ofp без демона и возвращает CompletedProcess (text=False - вывод в байтах)"""
+    env = {**os.environ, 'OFP_NO_DAEMON': '1', 'OFP_SOCKET': os.devnull + '.sock'}
+    return subprocess.run([sys.executable, str(ROOT / 'main.py'), *args, '-en'], cwd=cwd, env=env,
+                          capture_output=True, text=text, timeout=60)
+
+
+def write_doc(path: Path, sections: dict, root_name: str = 'project') -> Path:
+    """Пишет документ из секций {путь: текст} через DocumentWriter вместе с индексом"""
+    writer = document.DocumentWriter(path, root_name)
+    try:
+        writer.write_header('Project Structure', 'Files Content', '\n'.join(sections),
+                            [(rel_path, len(content.encode('utf-8')), 0) for rel_path, content in sections.items()])
+        for rel_path, content in sections.items():
+            writer.write_section(rel_path, 'text', content, 0o644)
+        writer.write_footer()
+    finally:
+        writer.close()
+    writer.write_index(document.index_path_for(path))
+    return path
+
+
+@pytest.fixture
+def doc(tmp_path):
+    return write_doc(tmp_path / 'doc.md', {
+        'info': 'section named info\n',
+        'src/redo.py': 'print("version update reset")\n',
+    })
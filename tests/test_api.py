@@ -0,0 +1,72 @@
+import sys
+import json
+import subprocess
+
+import pytest
+
+from conftest import ROOT
+
+# Проверки глобального состояния идут в отдельном процессе: другие тесты уже могли наполнить кэши
+CHECK_SIDE_EFFECTS = r"""
+import sys, json
+sys.path.insert(0, sys.argv[1])
+import program.config as config_module
+from program.translator import translator
+from program.api import iter_sections
+
+records = list(iter_sections(sys.argv[2], {'show_hidden': False}))
+try:
+    list(iter_sections(sys.argv[2], {'show_hidden': 'yes'}))
+    error = None
+except config_module.ConfigError as e:
+    error = str(e)
+print(json.dumps({
+    'records': len(records),
+    'compiled_cache': len(config_module._compiled_cache),
+    'file_cache': len(config_module._file_cache),
+    'translations': sorted(translator.translations),
+    'colorama': 'colorama' in sys.modules,
+    'error': error,
+}))
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src').mkdir(parents=True)
+    (root / 'src' / 'main.py').write_bytes(b'print("hi")\r\n')
+    (root / 'notes.txt').write_bytes(b'caf\xe9\n')
+    (root / 'project_documenter_config.json').write_text(json.dumps({'ignore_files': ['*.md', 'project_documenter_config.json']}))
+    return root
+
+
+def test_iter_sections_has_no_global_side_effects(project):
+    before = {path: path.stat().st_mtime_ns for path in project.rglob('*')}
+    result = subprocess.run([sys.executable, '-c', CHECK_SIDE_EFFECTS, str(ROOT), str(project)],
+                            capture_output=True, text=True, check=True)
+    state = json.loads(result.stdout)
+    assert state == {
+        'records': 3,
+        'compiled_cache': 0,
+        'file_cache': 0,
+        'translations': [],
+        'colorama': False,
+        'error': "Config options: 'show_hidden' must be bool",
+    }
+    assert {path: path.stat().st_mtime_ns for path in project.rglob('*')} == before
+
+
+def test_iter_sections_records(project):
+    from program.api import iter_sections
+
+    options = {'ignore_folders': ['build']}
+    records = list(iter_sections(str(project), options))
+    assert options == {'ignore_folders': ['build']}
+    tree, *files = records
+    assert tree['type'] == 'tree' and tree['files'] == 2
+    by_path = {record['path']: record for record in files}
+    assert set(by_path) == {'src/main.py', 'notes.txt'}
+    assert by_path['src/main.py']['content'] == 'print("hi")\r\n'
+    assert by_path['src/main.py']['size'] == 13
+    assert by_path['notes.txt']['error'] is None
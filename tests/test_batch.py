@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+import program.commands as commands
+from conftest import run_ofp
+
+
+def _slow_job(job, lang, conn):
+    """Задание, которое не успевает уложиться в таймаут"""
+    open(job['output'] + '.part', 'w').close()
+    time.sleep(30)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    project = tmp_path / 'project'
+    project.mkdir()
+    (project / 'a.py').write_text('x = 1\n')
+    path = tmp_path / 'jobs.json'
+    path.write_text(json.dumps([{'project': 'project', 'output': 'out.md'}]))
+    return path
+
+
+@pytest.mark.parametrize('option, value', [
+    ('--timeout', '0'), ('--timeout', '-1'), ('--timeout', 'soon'), ('--timeout', 'nan'), ('--timeout', 'inf'),
+    ('--workers', '0'), ('--workers', 'many'),
+])
+def test_bad_batch_options_fail_with_message(manifest, option, value):
+    result = run_ofp('batch', str(manifest), option, value)
+    assert result.returncode == 1
+    assert f'{option} expects a positive number' in result.stdout
+    assert 'Traceback' not in result.stderr
+    assert not (manifest.parent / 'out.md').exists()
+
+
+def test_batch_timeout_option_is_applied(manifest):
+    result = run_ofp('batch', str(manifest), '--timeout', '30', '--workers', '1')
+    assert result.returncode == 0, result.stdout
+    assert (manifest.parent / 'out.md').exists()
+
+
+def test_job_past_timeout_is_terminated(manifest, monkeypatch):
+    monkeypatch.setattr(commands, '_run_batch_job', _slow_job)
+    report = manifest.parent / 'report.json'
+
+    started = time.perf_counter()
+    success, _ = commands.batch_generate(str(manifest), workers=1, timeout=0.5, report_path=str(report))
+
+    assert not success
+    assert time.perf_counter() - started < 10
+    job = json.loads(report.read_text(encoding='utf-8'))['jobs'][0]
+    assert job['status'] == 'timeout'
+    assert not (manifest.parent / 'out.md.part').exists()
@@ -0,0 +1,36 @@
+import json
+
+import program.config_utils as cfg
+import program.config as config_module
+import program.utils as utils
+
+
+def _write_local_config(tmp_path, monkeypatch):
+    project = tmp_path / 'project'
+    project.mkdir()
+    local = tmp_path / cfg.CONFIG_FILE
+    local.write_text(json.dumps({'project_path': str(project), 'ignore_files': ['*.log']}), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    config_module.clear_caches()
+    return project, local
+
+
+def test_load_config_has_no_side_effects(tmp_path, monkeypatch):
+    project, local = _write_local_config(tmp_path, monkeypatch)
+    before = sorted(path.name for path in tmp_path.rglob('*'))
+
+    config = utils.load_config()
+    assert config['project_path'] == str(project)
+    assert config['ignore_files'] == ['*.log']
+    assert config['ignore_folders'] == config_module.default_config()['ignore_folders']
+    assert sorted(path.name for path in tmp_path.rglob('*')) == before
+    assert local.exists()
+
+
+def test_migrate_config_moves_local_config_once(tmp_path, monkeypatch):
+    project, local = _write_local_config(tmp_path, monkeypatch)
+
+    assert utils.migrate_config() == project / cfg.CONFIG_FILE
+    assert not local.exists()
+    assert json.loads((project / cfg.CONFIG_FILE).read_text(encoding='utf-8'))['ignore_files'] == ['*.log']
+    assert utils.migrate_config() is None
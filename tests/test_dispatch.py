@@ -0,0 +1,38 @@
+import pytest
+
+from conftest import run_ofp, write_doc
+
+# Аргументы совпадают с именами подкоманд (проект update, документ reset, манифест redo, секция info):
+# команда определяется только первым аргументом, остальные передаются ей как есть.
+# Поведение самих команд проверяется в их модулях тестов.
+CASES = [
+    (('grep', 'version', 'reset'), 0, 'info:1:print("version update reset")'),
+    (('cat', 'reset', 'info'), 0, 'print("version update reset")'),
+    (('status', 'reset', 'update'), 1, 'Changed: 1'),
+    (('diff', 'reset', 'update'), 0, 'Documentation is up to date: reset'),
+    (('stats', 'update'), 0, 'Project stats:'),
+    (('batch', 'redo'), 0, 'Batch finished: 1/1'),
+    (('snapshot', 'update', '-m', 'reset info', '--store', 'store'), 0, 'Snapshot saved:'),
+    (('index', 'reset'), 0, 'Search index saved: reset.tri'),
+    (('tree', 'update'), 0, 'update/\n└── info'),
+    (('unpack', 'reset', '--only', 'info', 'open'), 0, 'successfully unpacked in: open'),
+]
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    (tmp_path / 'update').mkdir()
+    (tmp_path / 'update' / 'info').write_text('print("version update reset")\n')
+    write_doc(tmp_path / 'reset', {'info': 'print("version update reset")\n'}, 'update')
+    (tmp_path / 'redo').write_text('[{"project": "update", "output": "out/doc.md"}]')
+    return tmp_path
+
+
+@pytest.mark.parametrize('args, code, expected', CASES, ids=[case[0][0] for case in CASES])
+def test_command_words_in_arguments_do_not_change_the_command(workspace, args, code, expected):
+    result = run_ofp(*args, cwd=workspace)
+    assert result.returncode == code, result.stdout + result.stderr
+    assert expected in result.stdout
+    # Ни справка, ни генерация документации (баннер) не запускались
+    assert 'Usage:' not in result.stdout and 'OFP v' not in result.stdout
+    assert not (workspace / 'update' / 'project_documentation.md').exists()
@@ -0,0 +1,192 @@
+import hashlib
+
+import pytest
+
+import program.document as document
+
+from conftest import run_ofp, write_doc
+
+
+def _write_sources(path, files: dict):
+    """Пишет документ из исходных байтов {путь: байты} так же, как генерация"""
+    writer = document.DocumentWriter(path, 'project')
+    try:
+        writer.write_header('Project Structure', 'Files Content', '\n'.join(files),
+                            [(rel_path, len(raw), 0) for rel_path, raw in files.items()])
+        for rel_path, raw in files.items():
+            content, source = document.section_content(raw, '.' + rel_path.rsplit('.', 1)[-1])
+            writer.write_section(rel_path, 'text', content, 0o644,
+                                 {**source, 'sha256': hashlib.sha256(raw).hexdigest()})
+        writer.write_footer()
+    finally:
+        writer.close()
+    writer.write_index(document.index_path_for(path))
+    return path
+
+
+def _read_sources(f):
+    for section in document.DocumentReader(f).sections():
+        yield section.path, section.read_source(), section.sha256, section.size
+
+
+def test_non_utf8_section_round_trips(tmp_path):
+    raw = b'caf\xe9 \x00\xff\r\n'
+    doc = _write_sources(tmp_path / 'doc.md', {'src/c.dat': raw})
+    assert b'encoding=base64' in doc.read_bytes()
+
+    with open(doc, 'rb') as f:
+        [section] = list(_read_sources(f))
+    assert section == ('src/c.dat', raw, hashlib.sha256(raw).hexdigest(), len(raw))
+
+    index = document.load_index(doc)
+    with open(doc, 'rb') as f:
+        assert document.read_section_source(f, index['sections'][0]) == raw
+
+
+def test_markdown_with_extracted_code_is_lossy():
+    raw = b'# T\n\ntext\n```py\nx=1\n```\n'
+    content, source = document.section_content(raw, '.md')
+    assert source == {'size': len(raw), 'lossy': 1}
+    assert 'text' in content
+    assert document.section_content(b'plain notes\n', '.md') == ('plain notes\n', {})
+
+
+def test_generate_and_unpack_keep_non_utf8_bytes(tmp_path):
+    project = tmp_path / 'project'
+    (project / 'src').mkdir(parents=True)
+    raw = bytes(range(256))
+    (project / 'src' / 'c.dat').write_bytes(raw)
+    (project / 'a.py').write_bytes(b'print(1)\r\n')
+
+    assert run_ofp(str(project)).returncode == 0
+    doc = project / 'project_documentation.md'
+    result = run_ofp('unpack', str(doc), str(tmp_path / 'out'))
+    assert result.returncode == 0, result.stdout
+    assert (tmp_path / 'out' / 'src' / 'c.dat').read_bytes() == raw
+    assert (tmp_path / 'out' / 'a.py').read_bytes() == b'print(1)\r\n'
+
+
+TRICKY = {
+    'plain.txt': 'hello\n',
+    'fences.md': '```py\ncode\n```\n\n````\nfour\n````\n',
+    'ends-with-fence.txt': 'text\n```\n\n---\n\n## not a section\n',
+    'no-newline.txt': 'last line',
+    'empty.txt': '',
+    'dir with space/ünï.txt': 'ünïcode ```` ``` `\n',
+}
+
+
+def test_writer_reader_round_trip(tmp_path):
+    doc = write_doc(tmp_path / 'doc.md', TRICKY)
+    with open(doc, 'rb') as f:
+        reader = document.DocumentReader(f)
+        sections = [(s.path, s.language, s.read().decode('utf-8'), s.sha256, s.mode) for s in reader.sections()]
+    assert reader.root_name == 'project'
+    assert reader.format_version == document.FORMAT_VERSION
+    assert sections == [(rel_path, 'text', content, hashlib.sha256(content.encode('utf-8')).hexdigest(), 0o644)
+                        for rel_path, content in TRICKY.items()]
+
+
+def test_fence_is_longer_than_any_backtick_run(tmp_path):
+    assert document.make_fence('no backticks') == '```'
+    assert document.make_fence('a ``` b') == '````'
+    assert document.make_fence('`````` x ``') == '```````'
+
+    doc = write_doc(tmp_path / 'doc.md', TRICKY)
+    text = doc.read_text(encoding='utf-8')
+    assert '\n`````text\nünïcode' in text
+    assert '\n````text\ntext\n```\n' in text
+
+
+def test_footer_section_count_detects_damage(tmp_path):
+    doc = write_doc(tmp_path / 'doc.md', TRICKY)
+    data = doc.read_bytes()
+    assert data.endswith(f'<!-- ofp-end: sections={len(TRICKY)} -->\n'.encode('ascii'))
+
+    def read_all(path):
+        with open(path, 'rb') as f:
+            return [section.path for section in document.DocumentReader(f).sections()]
+
+    miscounted = tmp_path / 'miscounted.md'
+    miscounted.write_bytes(data.replace(f'sections={len(TRICKY)}'.encode('ascii'), b'sections=99'))
+    with pytest.raises(ValueError, match='expected 99'):
+        read_all(miscounted)
+
+    truncated = tmp_path / 'truncated.md'
+    truncated.write_bytes(data[:data.rindex(b'<!-- ofp-end')])
+    with pytest.raises(ValueError, match='end marker'):
+        read_all(truncated)
+
+    cut = tmp_path / 'cut.md'
+    cut.write_bytes(data[:data.index(b'four')])
+    with pytest.raises(ValueError):
+        read_all(cut)
+
+
+def test_index_offsets_point_at_sections(tmp_path):
+    doc = write_doc(tmp_path / 'doc.md', TRICKY)
+    index = document.load_index(doc)
+    assert index is not None
+    data = doc.read_bytes()
+    for section, (rel_path, content) in zip(index['sections'], TRICKY.items()):
+        assert section['path'] == rel_path
+        start, end = section['content_offset'], section['content_offset'] + section['content_length']
+        assert data[start:end] == content.encode('utf-8')
+        assert data[section['offset']:].startswith(f'## {rel_path} <!-- ofp: '.encode('utf-8'))
+        assert data[section['offset'] + section['length'] - 6:section['offset'] + section['length']] == b'\n---\n\n'
+        with open(doc, 'rb') as f:
+            assert document.read_section_bytes(f, section) == content.encode('utf-8')
+
+    rebuilt = document.build_index(doc)
+    assert rebuilt['sections'] == index['sections']
+
+    doc.write_bytes(data + b'\n')
+    assert document.load_index(doc) is None
+
+
+def test_format1_paths_drop_root_prefix(tmp_path):
+    # Документы без метки формата писали путь с именем корня и могли содержать символы дерева
+    doc = tmp_path / 'old.md'
+    doc.write_text(
+        "# Project Structure: app\n\n```\napp/\n└── src\n```\n\n# Files Content\n\n"
+        "## app/src/a.py\n\n```python\nprint(1)\n```\n\n---\n\n\n"
+        "## │ b.py\n\n```python\nprint(2)\n```\n\n---\n\n",
+        encoding='utf-8')
+    with open(doc, 'rb') as f:
+        reader = document.DocumentReader(f)
+        sections = [(s.path, s.read()) for s in reader.sections()]
+    assert reader.format_version == 1
+    assert sections == [('src/a.py', b'print(1)'), ('b.py', b'print(2)')]
+
+
+def test_subfolder_named_like_project_round_trips(tmp_path):
+    project = tmp_path / 'app'
+    (project / 'app').mkdir(parents=True)
+    (project / 'main.py').write_bytes(b'top = 1\n')
+    (project / 'app' / 'main.py').write_bytes(b'nested = 1\n')
+    assert run_ofp(str(project)).returncode == 0
+    doc = project / 'project_documentation.md'
+
+    with open(doc, 'rb') as f:
+        paths = [section.path for section in document.DocumentReader(f).sections()]
+    assert 'app/main.py' in paths and 'main.py' in paths
+    assert [s['path'] for s in document.build_index(doc)['sections']] == paths
+
+    result = run_ofp('unpack', str(doc), str(tmp_path / 'out'))
+    assert result.returncode == 0, result.stdout
+    assert (tmp_path / 'out' / 'main.py').read_bytes() == b'top = 1\n'
+    assert (tmp_path / 'out' / 'app' / 'main.py').read_bytes() == b'nested = 1\n'
+
+
+@pytest.mark.parametrize('with_index', [True, False])
+def test_cat_reads_one_section(doc, with_index):
+    if not with_index:
+        document.index_path_for(doc).unlink()
+    for rel_path in ('src/redo.py', 'src\\redo.py', '/src/redo.py'):
+        result = run_ofp('cat', str(doc), rel_path)
+        assert result.returncode == 0
+        assert result.stdout == 'print("version update reset")\n'
+
+    result = run_ofp('cat', str(doc), 'src/missing.py')
+    assert result.returncode == 1
+    assert 'src/missing.py' in result.stdout
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import sqlite3
+
+import pytest
+
+from conftest import run_ofp
+
+FILES = {
+    'a.py': 'print("привет")\n',
+    'src/b.js': 'let b = 1;\n',
+    'src/c.txt': 'plain\n',
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    for rel_path, content in FILES.items():
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel_path).write_text(content, encoding='utf-8')
+    return root
+
+
+def _export(project, output_format):
+    result = run_ofp(str(project), '--format', output_format)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'files processed: 3' in result.stdout
+
+
+def _expected(rel_path):
+    raw = FILES[rel_path].encode('utf-8')
+    return len(raw), hashlib.sha256(raw).hexdigest()
+
+
+def test_jsonl_has_project_record_then_one_record_per_file(project):
+    _export(project, 'jsonl')
+    assert not (project / 'project_documentation.md').exists()
+
+    with open(project / 'project_documentation.jsonl', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert records[0]['type'] == 'project' and records[0]['name'] == 'project'
+    assert 'b.js' in records[0]['tree']
+
+    files = {record['path']: record for record in records[1:]}
+    assert set(files) == set(FILES)
+    for rel_path, record in files.items():
+        assert record['type'] == 'file'
+        assert (record['size'], record['hash']) == _expected(rel_path)
+        assert record['content'] == FILES[rel_path]
+    assert files['a.py']['language'] == 'python' and files['a.py']['extension'] == '.py'
+
+
+def test_sqlite_rows_match_files_and_columns_are_indexed(project):
+    _export(project, 'sqlite')
+
+    connection = sqlite3.connect(project / 'project_documentation.sqlite')
+    try:
+        name, tree = connection.execute("SELECT name, tree FROM project").fetchone()
+        rows = connection.execute("SELECT path, extension, size, hash, content FROM files").fetchall()
+        indexes = {row[1] for row in connection.execute("PRAGMA index_list(files)")}
+        plan = connection.execute("EXPLAIN QUERY PLAN SELECT path FROM files WHERE hash = ?", ('x',)).fetchall()
+        by_extension = connection.execute("SELECT path FROM files WHERE extension = '.js'").fetchall()
+    finally:
+        connection.close()
+
+    assert name == 'project' and 'c.txt' in tree
+    assert {row[0]: (row[2], row[3]) for row in rows} == {rel_path: _expected(rel_path) for rel_path in FILES}
+    assert {row[0]: row[4] for row in rows} == FILES
+    assert {'files_extension', 'files_hash'} <= indexes
+    assert any('files_hash' in str(step) for step in plan)
+    assert by_extension == [('src/b.js',)]
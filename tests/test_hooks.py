@@ -0,0 +1,125 @@
+import importlib.metadata
+import sys
+import types
+
+import pytest
+
+import program.commands as commands
+import program.config as config_module
+import program.hooks as hooks
+
+
+class Recorder:
+    """Плагин, записывающий события в общий список"""
+
+    def __init__(self):
+        self.events = []
+
+    def on_dir_enter(self, rel_dir):
+        self.events.append(('dir', rel_dir))
+        return rel_dir != 'skipped'
+
+    def on_file_skipped(self, rel_path, reason):
+        self.events.append(('skip', rel_path, reason))
+
+    def on_file_read(self, rel_path, size, seconds):
+        self.events.append(('read', rel_path, size))
+
+    def on_section_written(self, rel_path, section):
+        self.events.append(('section', rel_path, section['sha256']))
+
+    def on_run_done(self, stats):
+        self.events.append(('done', stats['files']))
+
+
+@pytest.fixture(autouse=True)
+def isolated_hooks(monkeypatch):
+    monkeypatch.setattr(hooks, '_registered', {})
+    monkeypatch.setattr(hooks, '_entry_point_plugins', [])
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'skipped').mkdir(parents=True)
+    (root / 'a.py').write_text('x = 1\n')
+    (root / 'b.log').write_text('log\n')
+    (root / 'skipped' / 'c.py').write_text('y = 2\n')
+    return root
+
+
+def _generate(project, run_hooks=None, **overrides):
+    config = {**config_module.default_config(), 'ignore_files': ['*.log'], **overrides}
+    return commands.write_documentation(str(project), str(project / 'doc.md'), config, run_hooks=run_hooks)
+
+
+def test_register_rejects_unknown_hook():
+    with pytest.raises(ValueError):
+        hooks.register('on_everything', print)
+
+
+def test_registered_handler_runs_until_unregistered():
+    seen = []
+    hooks.register('on_file_read', lambda *args: seen.append(args))
+    hooks.load().on_file_read('a.py', 1, 0.0)
+    hooks.unregister('on_file_read', hooks._registered['on_file_read'][0])
+    assert seen == [('a.py', 1, 0.0)]
+    assert hooks.load().on_file_read is None
+    assert not hooks.load().active()
+
+
+def test_events_arrive_in_run_order(project):
+    recorder = Recorder()
+    files = _generate(project, hooks.RunHooks({name: [getattr(recorder, name)] for name in hooks.HOOK_NAMES}))
+
+    assert [file_info['rel_path'] for file_info in files] == ['a.py']
+    events = recorder.events
+    assert events[0] == ('dir', '')
+    assert ('dir', 'skipped') in events and ('read', 'skipped/c.py', 6) not in events
+    assert ('skip', 'b.log', 'ignore_files: *.log') in events
+    assert ('skip', 'skipped', 'hook') in events
+    read, section = events.index(('read', 'a.py', 6)), [e[0] for e in events].index('section')
+    assert events.index(('dir', '')) < read < section
+    assert events[-1] == ('done', 1)
+
+
+def test_plugins_from_config_and_entry_points(project, monkeypatch, capsys):
+    module = types.ModuleType('ofp_test_plugin')
+    module.Recorder = Recorder
+    monkeypatch.setitem(sys.modules, 'ofp_test_plugin', module)
+    from_entry_point = Recorder()
+    entry_point = types.SimpleNamespace(value='ofp_test_ep:plugin', load=lambda: from_entry_point)
+    broken = types.SimpleNamespace(value='ofp_test_ep:broken', load=lambda: 1 / 0)
+    monkeypatch.setattr(importlib.metadata, 'entry_points',
+                        lambda group: [entry_point, broken] if group == hooks.ENTRY_POINT_GROUP else [])
+    monkeypatch.setattr(hooks, '_entry_point_plugins', None)
+
+    run_hooks = hooks.load({'hooks': ['ofp_test_plugin:Recorder', 'no_such_module_ofp']})
+    _generate(project, run_hooks)
+
+    handlers = run_hooks._handlers['on_run_done']
+    assert [handler.__self__ for handler in handlers][0] is from_entry_point
+    assert len(handlers) == 2 and isinstance(handlers[1].__self__, Recorder)
+    for handler in handlers:
+        assert handler.__self__.events[0] == ('dir', '') and handler.__self__.events[-1] == ('done', 1)
+    err = capsys.readouterr().err
+    assert 'ofp_test_ep:broken' in err and 'no_such_module_ofp' in err
+
+
+def test_failing_hook_is_disabled_and_generation_continues(project, capsys):
+    calls = []
+
+    def broken(rel_path, size, seconds):
+        calls.append(rel_path)
+        raise RuntimeError('boom')
+
+    (project / 'd.py').write_text('z = 3\n')
+    recorder = Recorder()
+    run_hooks = hooks.RunHooks({'on_file_read': [broken, recorder.on_file_read]})
+    files = _generate(project, run_hooks)
+
+    assert [file_info['rel_path'] for file_info in files] == ['a.py', 'd.py', 'skipped/c.py']
+    assert calls == ['a.py']
+    assert [event[1] for event in recorder.events] == ['a.py', 'd.py', 'skipped/c.py']
+    assert 'boom' in capsys.readouterr().err
+    assert (project / 'doc.md').exists()
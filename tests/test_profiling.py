@@ -0,0 +1,69 @@
+import json
+import pstats
+
+import pytest
+
+import program.profiling as profiling
+from conftest import run_ofp
+
+REPORT_KEYS = {'command', 'argv', 'time', 'python', 'platform', 'wall_seconds', 'cpu_seconds', 'phases',
+               'counters', 'peak_rss_bytes', 'tracemalloc_peak_bytes', 'cprofile'}
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src').mkdir(parents=True)
+    (root / 'a.py').write_text('a = 1\n')
+    (root / 'src' / 'b.py').write_text('b = 2\n' * 10)
+    return root
+
+
+def _run_profiled(*args, report):
+    result = run_ofp(*args, '--profile-report', str(report))
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Run profile:' in result.stderr
+    return json.loads(report.read_text(encoding='utf-8'))
+
+
+def test_generation_report_has_phases_counters_and_memory(project, tmp_path):
+    prof_path = tmp_path / 'prof' / 'run.prof'
+    report = _run_profiled(str(project), '--profile-prof', str(prof_path), report=tmp_path / 'report.json')
+
+    assert set(report) == REPORT_KEYS
+    assert report['command'] == 'generate'
+    assert {'scan', 'match', 'read', 'transform', 'write'} <= set(report['phases'])
+    for values in report['phases'].values():
+        assert set(values) == {'wall_seconds', 'cpu_seconds', 'calls'} and values['calls'] > 0
+    counters = report['counters']
+    assert counters['dirs_listed'] == 2 and counters['files_read'] == 2
+    assert counters['bytes_read'] == (project / 'a.py').stat().st_size + (project / 'src' / 'b.py').stat().st_size
+    assert report['wall_seconds'] > 0 and report['tracemalloc_peak_bytes'] > 0
+    assert report['peak_rss_bytes'] is None or report['peak_rss_bytes'] > 0
+    assert report['cprofile'] == str(prof_path)
+    assert pstats.Stats(str(prof_path)).total_calls > 0
+
+
+def test_unpack_is_profiled_as_its_own_command(project, tmp_path):
+    assert run_ofp(str(project)).returncode == 0
+    report = _run_profiled('unpack', str(project / 'project_documentation.md'), str(tmp_path / 'out'),
+                           report=tmp_path / 'report.json')
+    assert report['command'] == 'unpack'
+    assert report['counters']['files_written'] == 2
+    assert report['cprofile'] is None
+
+
+def test_profiling_is_off_by_default():
+    assert profiling.active() is None
+    with profiling.phase('scan') as phase:
+        profiling.count('dirs_listed')
+    assert profiling.active() is None and not hasattr(phase, 'wall')
+
+    profile = profiling.start('generate', trace_memory=False)
+    try:
+        with profiling.phase('scan'):
+            profiling.count('dirs_listed', 3)
+    finally:
+        assert profiling.stop() is profile
+    assert profile.phases['scan'].calls == 1 and profile.counters == {'dirs_listed': 3}
+    assert profile.report()['tracemalloc_peak_bytes'] is None
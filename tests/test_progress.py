@@ -0,0 +1,154 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+
+import program.commands as commands
+import program.config as config_module
+import program.hooks as hooks
+from program.progress import Progress, ConsoleProgress, GenerationCanceled, format_duration
+from conftest import run_ofp
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src').mkdir(parents=True)
+    for number in range(5):
+        (root / 'src' / f'm{number}.py').write_text(f'x = {number}\n' * 100)
+    (root / 'a.py').write_text('a = 1\n')
+    return root
+
+
+def _generate(project, progress):
+    config = config_module.default_config()
+    return commands.write_documentation(str(project), str(project / 'doc.md'), config, progress=progress)
+
+
+def test_progress_reports_scan_then_write_with_totals(project):
+    snapshots = []
+    files = _generate(project, Progress(snapshots.append, interval=0))
+
+    phases = [snapshot['phase'] for snapshot in snapshots]
+    assert phases[0] == 'scan' and phases[-1] == 'done'
+    assert phases.index('write') > phases.index('scan')
+    scan_total = [s for s in snapshots if s['phase'] == 'scan' and s['final']][-1]
+    assert (scan_total['dirs_done'], scan_total['files_done']) == (2, 6)
+
+    writes = [s for s in snapshots if s['phase'] in ('write', 'done')]
+    assert all(s['files_total'] == len(files) == 6 for s in writes)
+    total_bytes = sum((project / f['rel_path']).stat().st_size for f in files)
+    assert writes[-1]['files_done'] == 6 and writes[-1]['bytes_done'] == writes[-1]['bytes_total'] == total_bytes
+    assert [s['files_done'] for s in writes] == sorted(s['files_done'] for s in writes)
+
+
+def test_cancel_keeps_previous_document(project):
+    (project / 'doc.md').write_text('previous\n')
+    cancel_event = threading.Event()
+
+    def on_progress(snapshot):
+        if snapshot['phase'] == 'write' and snapshot['files_done'] == 2:
+            cancel_event.set()
+
+    with pytest.raises(GenerationCanceled):
+        _generate(project, Progress(on_progress, cancel_event, interval=0))
+    assert (project / 'doc.md').read_text() == 'previous\n'
+    assert sorted(path.name for path in project.iterdir()) == ['a.py', 'doc.md', 'src']
+
+
+def test_generate_documentation_reports_cancel(project):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    result = commands.generate_documentation(str(project), str(project / 'doc.md'),
+                                             config_module.default_config(), progress=Progress(None, cancel_event))
+    assert 'canceled' in result
+    assert not (project / 'doc.md').exists()
+
+
+def test_tui_generation_runs_in_worker_and_can_be_canceled(project, monkeypatch):
+    from program.tui import OFPTUI
+
+    reading = threading.Event()
+    resume = threading.Event()
+
+    def slow_read(rel_path, size, seconds):
+        reading.set()
+        resume.wait(10)
+
+    monkeypatch.setattr(hooks, '_registered', {'on_file_read': [slow_read]})
+    monkeypatch.setattr(hooks, '_entry_point_plugins', [])
+
+    async def scenario():
+        app = OFPTUI()
+        async with app.run_test() as pilot:
+            app.start_generation(str(project), str(project / 'doc.md'))
+            deadline = time.monotonic() + 10
+            while not reading.is_set() and time.monotonic() < deadline:
+                await pilot.pause(0.05)
+            # Интерфейс отвечает, пока рабочий поток ждет
+            assert app.query_one('#generation').has_class('running')
+            assert app.query_one('#generate').disabled
+
+            await pilot.click('#cancel-generate')
+            resume.set()
+            while app.cancel_event is not None and time.monotonic() < deadline:
+                await pilot.pause(0.05)
+            assert not app.query_one('#generation').has_class('running')
+            assert not app.query_one('#generate').disabled
+            return str(app.query_one('#content').render())
+
+    text = asyncio.run(scenario())
+    assert 'canceled' in text
+    assert not (project / 'doc.md').exists() and not list(project.glob('*.part'))
+
+
+class _Stream(io.StringIO):
+    def __init__(self, tty):
+        super().__init__()
+        self.tty = tty
+
+    def isatty(self):
+        return self.tty
+
+
+def test_format_duration():
+    assert [format_duration(seconds) for seconds in (0, 59.9, 61, 3600, 3725)] == [
+        '0:00', '0:59', '1:01', '1:00:00', '1:02:05']
+
+
+def test_console_progress_without_tty_logs_periodically_and_phase_totals(project):
+    stream = _Stream(tty=False)
+    console = ConsoleProgress(stream, log_interval=3600)
+    _generate(project, Progress(console, interval=0))
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[0] == 'Scanning: 2 dirs, 6 files'
+    assert lines[1].startswith('Writing: 6/6 files, ')
+    assert '\r' not in stream.getvalue()
+
+
+def test_console_progress_on_tty_rewrites_one_line_and_clears_it(project):
+    stream = _Stream(tty=True)
+    _generate(project, Progress(ConsoleProgress(stream), interval=0))
+
+    output = stream.getvalue()
+    assert '\n' not in output
+    assert output.count('\r') > 6 and 'Writing: 6/6 files' in output
+    assert output.endswith('\r\033[K')
+
+
+def test_eta_is_shown_while_writing():
+    snapshot = Progress().snapshot()
+    snapshot.update(phase='write', files_done=1, files_total=4, bytes_done=100, bytes_total=400,
+                    bytes_per_second=50.0, files_per_second=0.5, eta=6.0)
+    assert ConsoleProgress(_Stream(tty=False)).describe(snapshot).endswith(', ETA 0:06')
+
+
+def test_cli_prints_progress_lines_when_not_a_tty(project):
+    result = run_ofp(str(project))
+    assert result.returncode == 0
+    assert 'Scanning: 2 dirs, 6 files' in result.stdout
+    assert 'Writing: 6/6 files' in result.stdout
@@ -0,0 +1,84 @@
+import os
+import sys
+
+import pytest
+
+import program.config as config_module
+import program.scanner as scanner
+from conftest import run_ofp
+
+
+def _config(**overrides):
+    return {**config_module.default_config(), **overrides}
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    for rel_path in ('b.py', 'notes.mdx', 'readme.md', 'testXmd', 'z/inner.py', 'a/x.py', 'a/sub/y.py',
+                     'node_modules/dep.js', '.hidden/secret.py'):
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel_path).write_text('x\n')
+    return root
+
+
+def test_iter_tree_matches_generation_tree(project):
+    config = _config(ignore_folders=['node_modules'], ignore_files=['*.md', 'test.md'])
+    tree, files = scanner.scan(str(project), config)
+    assert list(scanner.iter_tree(str(project), config, dirs_first=False)) == tree.split('\n')
+    assert 'notes.mdx' in tree and 'testXmd' in tree and 'readme.md' not in tree
+    assert 'node_modules' not in tree and '.hidden' not in tree
+
+
+def test_iter_tree_lists_folders_first_with_matching_pointers(project):
+    config = _config(ignore_folders=['node_modules'], ignore_files=['*.md'])
+    assert list(scanner.iter_tree(str(project), config)) == [
+        '├── a/',
+        '│   ├── sub/',
+        '│   │   └── y.py',
+        '│   └── x.py',
+        '├── z/',
+        '│   └── inner.py',
+        '├── b.py',
+        '├── notes.mdx',
+        '└── testXmd',
+    ]
+
+
+@pytest.fixture
+def deep_dir(tmp_path):
+    """Цепочка папок d/d/...; глубже предела рекурсии, поэтому создается и удаляется циклом"""
+    depth = sys.getrecursionlimit() + 50
+    paths = [str(tmp_path / 'deep')]
+    for _ in range(depth):
+        paths.append(os.path.join(paths[-1], 'd'))
+    for path in paths:
+        os.mkdir(path)
+    yield paths[0], depth
+    # shutil.rmtree (и очистка tmp_path в pytest) рекурсивны и на такой глубине падают
+    for path in reversed(paths):
+        os.rmdir(path)
+
+
+def test_iter_tree_streams_and_handles_deep_trees(deep_dir, monkeypatch):
+    path, depth = deep_dir
+    listed = []
+    list_dir = scanner._list_dir
+    monkeypatch.setattr(scanner, '_list_dir', lambda current_path, *args: listed.append(current_path) or
+                        list_dir(current_path, *args))
+    lines = scanner.iter_tree(path, _config())
+    assert next(lines) == '└── d/'
+    assert len(listed) == 1
+
+    rest = list(lines)
+    assert len(rest) == depth - 1
+    assert rest[-1] == '    ' * (depth - 1) + '└── d/'
+
+
+def test_ofp_tree_prints_the_same_tree(project):
+    result = run_ofp('tree', str(project))
+    assert result.returncode == 0
+    lines = result.stdout.splitlines()
+    start = lines.index('project/')
+    assert lines[start + 1:start + 4] == ['├── a/', '│   ├── sub/', '│   │   └── y.py']
+    assert '.hidden' not in result.stdout and 'readme.md' not in result.stdout
@@ -0,0 +1,87 @@
+import re
+import random
+
+import pytest
+
+import program.search as search
+
+from conftest import run_ofp, write_doc
+
+SECTIONS = {
+    'a.py': 'def Istanbul():\n    return "KELVIN"\n',
+    'b.txt': 'ıstanbul and İstanbul\n',
+    'c.txt': 'temperature 5 Kelvin\n',
+    'd.txt': 'ſtop the ſpell\n',
+    'e.txt': 'привет, мир\n',
+    'f.txt': 'end of line$\nnext ```` fence\n',
+}
+
+
+@pytest.fixture
+def docs(tmp_path):
+    """Один и тот же документ с триграммным индексом и без него"""
+    indexed = write_doc(tmp_path / 'indexed.md', SECTIONS)
+    search.build_trigram_index(indexed)
+    assert search.TrigramIndex.load(indexed) is not None
+    return indexed, write_doc(tmp_path / 'plain.md', SECTIONS)
+
+
+def _grep(doc, pattern: str, flags: int) -> list:
+    regex = re.compile(pattern, flags)
+    return list(search.grep_document(doc, regex, search.required_literals(pattern, flags)))
+
+
+@pytest.mark.parametrize('pattern,flags', [
+    ('istanbul', re.IGNORECASE),
+    ('kelvin', re.IGNORECASE),
+    ('stop', re.IGNORECASE),
+    ('spell', re.IGNORECASE),
+    ('(?i)ПРИВЕТ', 0),
+    ('ПРИВЕТ', re.IGNORECASE),
+    ('привет', 0),
+    ('return "KELVIN"', 0),
+    (r'line\$', 0),
+    ('next `+ fence', 0),
+    (r'def \w+\(\)', 0),
+])
+def test_prefilter_has_no_false_negatives(docs, pattern, flags):
+    indexed, plain = docs
+    assert _grep(plain, pattern, flags)
+    assert _grep(indexed, pattern, flags) == _grep(plain, pattern, flags)
+
+
+def test_prefilter_random_substrings(docs):
+    indexed, plain = docs
+    rng = random.Random(29)
+    for _ in range(300):
+        content = rng.choice(list(SECTIONS.values()))
+        start = rng.randrange(len(content))
+        literal = content[start:start + rng.randint(1, 8)]
+        for flags in (0, re.IGNORECASE):
+            pattern = re.escape(literal)
+            assert _grep(indexed, pattern, flags) == _grep(plain, pattern, flags), (literal, flags)
+
+
+def test_required_literals_split_at_case_unsafe_characters():
+    assert search.required_literals('kelvin', re.IGNORECASE) == [b'elv']
+    assert search.required_literals('(?i)ПРИВЕТ world') == [b' world']
+    assert search.required_literals('abc|def') == []
+    assert search.required_literals('fooba[rz]') == [b'fooba']
+
+
+def test_ofp_index_and_grep_print_matches_and_exit_codes(docs):
+    indexed, plain = docs
+    index = run_ofp('index', str(plain))
+    assert index.returncode == 0 and 'plain.md.tri' in index.stdout
+
+    result = run_ofp('grep', 'kelvin', str(indexed), str(plain))
+    assert result.returncode == 1 and result.stdout == ''
+
+    result = run_ofp('grep', '-i', 'kelvin', str(indexed), str(plain))
+    assert result.returncode == 0
+    assert result.stdout.splitlines() == [
+        f'{doc}:{line}' for doc in (indexed, plain)
+        for line in ('a.py:2:    return "KELVIN"', f"c.txt:1:{SECTIONS['c.txt'].strip()}")]
+    assert run_ofp('grep', '-i', 'kelvin', str(plain)).stdout.splitlines()[0] == 'a.py:2:    return "KELVIN"'
+
+    assert run_ofp('grep', '(', str(indexed)).returncode == 1
@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+import pytest
+
+import program.config as config_module
+import program.server as server
+from program.server import WarmCache, ENTRY_OVERHEAD
+
+from conftest import ROOT, write_doc
+
+
+def test_config_caches_are_bounded(tmp_path):
+    config_module.clear_caches()
+    for i in range(config_module.CACHE_LIMIT + 10):
+        config_module.compile_config({**config_module.default_config(), 'project_path': f'/p{i}'})
+        path = tmp_path / f'c{i}.json'
+        path.write_text(json.dumps({'show_hidden': False}), encoding='utf-8')
+        config_module.read_config_file(path)
+    assert len(config_module._compiled_cache) == config_module.CACHE_LIMIT
+    assert len(config_module._file_cache) == config_module.CACHE_LIMIT
+    assert next(iter(config_module._compiled_cache))[0] == '/p10'
+    config_module.clear_caches()
+
+
+def test_remembered_outputs_count_against_cap(tmp_path):
+    doc = write_doc(tmp_path / 'doc.md', {'a.txt': 'a\n'})
+    cache = WarmCache(max_bytes=10 * ENTRY_OVERHEAD)
+    cache.remember_output(doc, 'tree', [], [])
+    assert cache.status()['documents'] == 1
+    assert cache.used_bytes == len(os.path.abspath(doc)) + ENTRY_OVERHEAD
+    assert cache.output_current(doc, 'tree', [], [])
+
+    for i in range(20):
+        cache._put(('section', f'f{i}'), (0, 0, '', ''), ENTRY_OVERHEAD)
+    assert cache.used_bytes <= cache.max_bytes
+    assert cache.status()['documents'] == 0
+    assert not cache.output_current(doc, 'tree', [], [])
+
+
+@pytest.fixture
+def daemon():
+    """Запущенный `ofp serve` на временном сокете; путь к сокету"""
+    socket_dir = tempfile.mkdtemp(prefix='ofp')
+    socket_path = os.path.join(socket_dir, 's.sock')
+    env = {**os.environ, 'OFP_SOCKET': socket_path}
+    process = subprocess.Popen([sys.executable, str(ROOT / 'main.py'), 'serve', '-en'], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while server.request({'command': 'status'}, socket_path) is None:
+        assert time.time() < deadline and process.poll() is None, 'daemon did not start'
+        time.sleep(0.05)
+    yield socket_path
+    server.request({'command': 'stop'}, socket_path)
+    process.wait(timeout=10)
+    shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+def test_second_daemon_request_hits_warm_cache(tmp_path, daemon):
+    project = tmp_path / 'project'
+    (project / 'src').mkdir(parents=True)
+    (project / 'src' / 'a.py').write_text('a = 1\n')
+    (project / 'b.py').write_text('b = 2\n')
+    # Только что измененные файлы демон не кэширует - делаем их старыми; папки остаются свежими
+    for path in (project / 'src' / 'a.py', project / 'b.py'):
+        os.utime(path, ns=(1_577_836_800_000_000_000,) * 2)
+    message = {'command': 'generate', 'args': [str(project)], 'cwd': str(tmp_path), 'lang': 'en'}
+
+    assert server.request(message, daemon)['ok']
+    first = server.request({'command': 'status'}, daemon)['status']
+    assert server.request(message, daemon)['ok']
+    second = server.request({'command': 'status'}, daemon)['status']
+
+    # Документ и индекс записаны в корень проекта, но обход берется из кэша,
+    # а документ признается неизменным без перезаписи
+    assert second['hits'] == first['hits'] + 1
+    assert second['misses'] == first['misses']
+    assert second['unchanged_outputs'] == first['unchanged_outputs'] + 1
+
+    (project / 'src' / 'c.py').write_text('c = 3\n')
+    assert server.request(message, daemon)['ok']
+    third = server.request({'command': 'status'}, daemon)['status']
+    assert third['misses'] > second['misses']
+    assert '## src/c.py ' in (project / 'project_documentation.md').read_text(encoding='utf-8')
@@ -0,0 +1,67 @@
+import os
+import re
+
+import pytest
+
+import program.snapshots as snapshots
+from conftest import run_ofp
+
+OLD_NS = 1_577_836_800_000_000_000
+
+
+def _strip_manifest(text):
+    """Документ без строк манифеста, которые снимок не хранит (правила и mtime папок)"""
+    return re.sub(r'^[rdD] .*\n', '', text, flags=re.MULTILINE)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src').mkdir(parents=True)
+    (root / 'a.py').write_text('x = 1\n')
+    (root / 'src' / 'b.txt').write_text('shared\n')
+    (root / 'src' / 'copy.txt').write_text('shared\n')
+    for path in (root / 'a.py', root / 'src' / 'b.txt', root / 'src' / 'copy.txt'):
+        os.utime(path, ns=(OLD_NS, OLD_NS))
+    return root
+
+
+def _ofp(*args):
+    result = run_ofp(*args)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_two_snapshots_share_blobs_and_rebuild_identically(project, tmp_path):
+    store = tmp_path / 'store'
+    assert run_ofp(str(project)).returncode == 0
+    generated = (project / 'project_documentation.md').read_text(encoding='utf-8')
+
+    _ofp('snapshot', str(project), '-m', 'first', '--store', str(store))
+    (project / 'a.py').write_text('x = 2\n')
+    saved = _ofp('snapshot', str(project), '-m', 'second', '--store', str(store))
+    assert '2 unchanged and not read, 1 new blobs' in saved
+
+    listing = _ofp('snapshot', 'list', str(project), '--store', str(store))
+    ids = re.findall(r'^\S*?(\d{8}-\d{6}-[0-9a-f]{8})', listing, flags=re.MULTILINE)
+    assert len(ids) == 2
+    assert listing.index('first') < listing.index('second')
+
+    first, again, latest = (tmp_path / name for name in ('first.md', 'again.md', 'latest.md'))
+    _ofp('snapshot', 'build', ids[0], str(first), str(project), '--store', str(store))
+    _ofp('snapshot', 'build', ids[0], str(again), str(project), '--store', str(store))
+    _ofp('snapshot', 'build', 'latest', str(latest), str(project), '--store', str(store))
+    assert first.read_bytes() == again.read_bytes()
+    assert _strip_manifest(first.read_text(encoding='utf-8')) == _strip_manifest(generated)
+    assert 'x = 2' in latest.read_text(encoding='utf-8') and 'x = 2' not in generated
+
+    store_obj = snapshots.SnapshotStore(store)
+    manifests = store_obj.snapshots(str(project))
+    first_files, second_files = ({entry['path']: entry['sha256'] for entry in store_obj.files(manifest)}
+                                 for manifest in manifests)
+    assert first_files['src/b.txt'] == first_files['src/copy.txt'] == second_files['src/b.txt']
+    assert first_files['a.py'] != second_files['a.py']
+    referenced = set(first_files.values()) | set(second_files.values())
+    referenced |= {manifest[key] for manifest in manifests for key in ('tree', 'files')}
+    stored = {path.parent.name + path.name for path in (store / 'objects').glob('*/*')}
+    assert stored == referenced
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import program.config as config_module
+import program.scanner as scanner
+import program.stats as stats
+from conftest import run_ofp
+
+
+@pytest.mark.parametrize('content, lines', [
+    (b'', 0), (b'a', 1), (b'a\n', 1), (b'a\nb', 2), (b'\n\n', 2), (b'ab\ncd\nef', 3),
+])
+def test_count_lines_across_chunk_boundaries(tmp_path, monkeypatch, content, lines):
+    monkeypatch.setattr(stats, 'READ_CHUNK', 2)
+    path = tmp_path / 'f.txt'
+    path.write_bytes(content)
+    assert stats.count_lines(str(path)) == lines
+
+
+def test_ignore_reason_names_the_rule():
+    rules = config_module.compile_config({
+        **config_module.default_config(),
+        'ignore_folders': ['node_modules'], 'ignore_files': ['*.log', 'secret.txt'],
+        'ignore_paths': ['build/*'], 'whitelist_paths': [],
+    })
+    assert rules.ignore_reason('a.py', 'src/a.py', False) is None
+    assert rules.ignore_reason('.env', '.env', False) == 'show_hidden'
+    assert rules.ignore_reason('out.js', 'build/out.js', False) == 'ignore_paths: build/*'
+    assert rules.ignore_reason('node_modules', 'web/node_modules', True) == 'ignore_folders: node_modules'
+    assert rules.ignore_reason('x.log', 'src/x.log', False) == 'ignore_files: *.log'
+    assert rules.ignore_reason('secret.txt', 'secret.txt', False) == 'ignore_files: secret.txt'
+
+    whitelisted = config_module.compile_config({**config_module.default_config(), 'whitelist_paths': ['src']})
+    assert whitelisted.ignore_reason('b.py', 'lib/b.py', False) == 'whitelist_paths'
+    assert whitelisted.ignore_reason('src', 'src', True) is None
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src' / 'deep').mkdir(parents=True)
+    (root / '.git').mkdir()
+    (root / 'a.py').write_bytes(b'a\nb\nc')
+    (root / 'src' / 'big.txt').write_bytes(b'line\n' * 300)
+    (root / 'src' / 'deep' / 'c.py').write_bytes(b'x\n')
+    (root / '.git' / 'HEAD').write_bytes(b'ref\n')
+    (root / '.env').write_bytes(b'KEY=1\n')
+    (root / 'README.md').write_bytes(b'# readme\n')
+    return root
+
+
+def test_collect_stats_groups_sizes_and_lines(project):
+    tree, files = scanner.scan(str(project), config_module.default_config())
+    result = stats.collect_stats('project', tree, files, top=2)
+
+    assert (result['files'], result['bytes'], result['lines'], result['errors']) == (3, 1507, 304, 0)
+    assert result['languages'] == [
+        {'name': 'text', 'files': 1, 'bytes': 1500, 'lines': 300},
+        {'name': 'python', 'files': 2, 'bytes': 7, 'lines': 4},
+    ]
+    assert [row['name'] for row in result['extensions']] == ['.txt', '.py']
+    assert result['largest_files'] == [{'path': 'src/big.txt', 'bytes': 1500}, {'path': 'a.py', 'bytes': 5}]
+    assert result['largest_dirs'] == [{'path': 'src', 'bytes': 1502}, {'path': 'src/deep', 'bytes': 2}]
+    assert stats.collect_stats('project', tree, files, with_lines=False)['lines'] is None
+
+
+def test_ofp_stats_reports_ignored_rules_and_projects_doc_size(project):
+    result = run_ofp('stats', str(project), '--top', '1')
+    assert result.returncode == 0, result.stdout
+    out = result.stdout
+    assert '3 files, 1.5 KB, 304 lines' in out
+    assert '1.5 KB  src/big.txt' in out and '5 B  a.py' not in out
+    assert '2  show_hidden\n         1  ignore_files: *.md\n' in out
+    projected = float(out.split('Projected documentation size: ~')[1].split()[0])
+
+    assert run_ofp(str(project)).returncode == 0
+    actual = os.path.getsize(project / 'project_documentation.md') / 1024
+    assert abs(projected - actual) <= actual * 0.1
+
+    assert run_ofp('stats', str(project), '--top', '0').returncode == 1
+    no_lines = run_ofp('stats', str(project), '--no-lines').stdout
+    assert '3 files, 1.5 KB, - lines' in no_lines and 'lines\n' not in no_lines
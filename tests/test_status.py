@@ -0,0 +1,94 @@
+import os
+import json
+
+import pytest
+
+import program.commands as commands
+import program.document as document
+
+from conftest import run_ofp
+
+OLD_NS = 1_577_836_800_000_000_000
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src' / 'deep').mkdir(parents=True)
+    (root / 'empty').mkdir()
+    (root / 'a.py').write_text('a\n')
+    (root / 'src' / 'b.py').write_text('b\n')
+    (root / 'src' / 'deep' / 'c.py').write_text('c\n')
+    # Старые mtime: свежие папки манифест не считает надежными и всегда перечитывает
+    for path in [root, *root.rglob('*')]:
+        os.utime(path, ns=(OLD_NS, OLD_NS))
+    assert run_ofp(str(root)).returncode == 0
+    return root
+
+
+def _compare(root):
+    return commands.compare_with_manifest(root / 'project_documentation.md', str(root))
+
+
+def test_manifest_records_every_scanned_folder(project):
+    manifest = document.read_manifest(project / 'project_documentation.md')
+    assert manifest['dir_mtimes'] == {'.': OLD_NS, 'empty': OLD_NS, 'src': OLD_NS, 'src/deep': OLD_NS}
+    assert manifest['rules'] is not None
+    assert set(manifest['files']) == {'a.py', 'src/b.py', 'src/deep/c.py'}
+
+
+def test_unchanged_folders_are_not_listed(project):
+    result = _compare(project)
+    # Корень перечитывается: в него записан сам документ
+    assert result['dirs_skipped'] == 3
+    assert (result['added'], result['removed'], result['changed']) == ([], [], [])
+
+
+def test_changes_are_found_in_listed_and_new_folders(project):
+    (project / 'a.py').unlink()
+    (project / 'src' / 'b.py').write_text('bigger\n')
+    os.utime(project / 'src' / 'b.py', ns=(OLD_NS, OLD_NS))
+    os.utime(project / 'src', ns=(OLD_NS, OLD_NS))
+    (project / 'src' / 'deep' / 'd.py').write_text('d\n')
+    (project / 'empty' / 'new').mkdir()
+    (project / 'empty' / 'new' / 'e.py').write_text('e\n')
+
+    result = _compare(project)
+    assert result['removed'] == ['a.py']
+    assert result['changed'] == ['src/b.py']
+    assert result['added'] == ['empty/new/e.py', 'src/deep/d.py']
+    assert result['dirs_skipped'] == 1
+
+    status = run_ofp('status', str(project / 'project_documentation.md'), str(project))
+    assert status.returncode == 1
+    assert {'M src/b.py', 'A src/deep/d.py', 'A empty/new/e.py', 'D a.py'} <= set(status.stdout.splitlines())
+
+
+def test_changed_rules_fall_back_to_full_scan(project):
+    config_path = project / 'project_documenter_config.json'
+    config = json.loads(config_path.read_text(encoding='utf-8'))
+    config['ignore_folders'] = config['ignore_folders'] + ['deep']
+    config_path.write_text(json.dumps(config), encoding='utf-8')
+
+    result = _compare(project)
+    assert result['dirs_skipped'] == 0
+    assert result['removed'] == ['src/deep/c.py']
+
+
+def test_diff_shows_changes_against_the_document(project):
+    doc = str(project / 'project_documentation.md')
+    diff = run_ofp('diff', doc, str(project))
+    assert diff.returncode == 0
+    assert 'Documentation is up to date' in diff.stdout
+
+    (project / 'src' / 'b.py').write_text('b2\n')
+    (project / 'a.py').unlink()
+    (project / 'new.py').write_text('new\n')
+    diff = run_ofp('diff', doc, str(project))
+    assert diff.returncode == 1
+    lines = diff.stdout.splitlines()
+    for expected in (['--- a/a.py', '+++ /dev/null', '@@ -1 +0,0 @@', '-a'],
+                     ['--- /dev/null', '+++ b/new.py', '@@ -0,0 +1 @@', '+new'],
+                     ['--- a/src/b.py', '+++ b/src/b.py', '@@ -1 +1 @@', '-b', '+b2']):
+        start = lines.index(expected[0])
+        assert lines[start:start + len(expected)] == expected
@@ -0,0 +1,74 @@
+import json
+import os
+import re
+import string
+
+import pytest
+
+from program.translator import Translator, flatten_catalog
+
+
+def _write(locale_dir, lang, catalog):
+    (locale_dir / f'{lang}.json').write_text(json.dumps(catalog, ensure_ascii=False), encoding='utf-8')
+
+
+@pytest.fixture
+def locale_dir(tmp_path):
+    _write(tmp_path, 'en', {'common': {'hello': 'Hello, {name}', 'only_en': 'English'}, 'top': 'Top'})
+    _write(tmp_path, 'ru', {'common': {'hello': 'Привет, {name}'}})
+    return tmp_path
+
+
+def test_flatten_catalog_joins_nested_keys():
+    assert flatten_catalog({'a': {'b': {'c': 'x'}, 'd': 'y'}, 'e': 'z', 'skip': 1}) == {
+        'a.b.c': 'x', 'a.d': 'y', 'e': 'z'}
+
+
+def test_only_active_language_is_loaded(locale_dir):
+    translator = Translator(str(locale_dir))
+    assert translator.translations == {}
+    assert translator.set_language('ru')
+    assert set(translator.translations) == {'ru'}
+    assert translator.translate('common.hello', name='Мир') == 'Привет, Мир'
+
+    assert translator.translate('common.only_en') == 'English'
+    assert set(translator.translations) == {'ru', 'en'}
+    assert translator.translate('missing.some_key') == 'Some key'
+    assert not translator.set_language('de') and translator.current_lang == 'ru'
+
+
+def test_compiled_catalog_is_reused_until_source_changes(locale_dir, monkeypatch):
+    Translator(str(locale_dir)).set_language('ru')
+    assert (locale_dir / '__pycache__').is_dir()
+
+    def no_json(*args, **kwargs):
+        raise AssertionError('catalog was parsed again')
+
+    monkeypatch.setattr(json, 'load', no_json)
+    translator = Translator(str(locale_dir))
+    assert translator.set_language('ru') and translator.translate('common.hello', name='x') == 'Привет, x'
+
+    monkeypatch.undo()
+    _write(locale_dir, 'ru', {'common': {'hello': 'Здравствуй, {name}'}})
+    stat = os.stat(locale_dir / 'ru.json')
+    os.utime(locale_dir / 'ru.json', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    translator = Translator(str(locale_dir))
+    translator.set_language('ru')
+    assert translator.translate('common.hello', name='x') == 'Здравствуй, x'
+
+
+def _placeholders(text):
+    return {name for _, name, _, _ in string.Formatter().parse(text) if name}
+
+
+def test_shipped_catalogs_have_the_same_keys_and_placeholders():
+    locales = os.path.join(os.path.dirname(__file__), '..', 'program', 'locales')
+    catalogs = {}
+    for lang in ('en', 'ru'):
+        with open(os.path.join(locales, f'{lang}.json'), encoding='utf-8') as f:
+            catalogs[lang] = flatten_catalog(json.load(f))
+
+    assert set(catalogs['en']) == set(catalogs['ru'])
+    mismatched = [key for key, text in catalogs['en'].items()
+                  if _placeholders(text) != _placeholders(catalogs['ru'][key])]
+    assert mismatched == []
@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+import program.document as document
+from program import utils
+from program.translator import translator
+from conftest import write_doc
+
+pytest.importorskip('textual')
+from textual.widgets import OptionList  # noqa: E402
+
+from program.tui import OFPTUI, MarkdownViewer  # noqa: E402
+
+
+async def _wait_for(pilot, condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await pilot.pause(0.05)
+    assert condition()
+
+
+def _run_viewer(doc_path, steps, monkeypatch):
+    """Открывает MarkdownViewer и выполняет steps(pilot, screen, rendered); rendered - номера и текст секций"""
+    rendered = []
+    render_section = MarkdownViewer.render_section
+
+    def recording(self, number):
+        text = render_section(self, number)
+        rendered.append((number, text))
+        return text
+
+    monkeypatch.setattr(MarkdownViewer, 'render_section', recording)
+
+    async def scenario():
+        app = OFPTUI()
+        async with app.run_test() as pilot:
+            screen = MarkdownViewer(doc_path)
+            await app.push_screen(screen)
+            await steps(pilot, screen, rendered)
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def big_doc(tmp_path):
+    return write_doc(tmp_path / 'doc.md', {
+        'a.py': 'a = 1\n',
+        'src/big.txt': 'line\n' * 2000,
+        'src/c.txt': 'c\n',
+    })
+
+
+@pytest.mark.parametrize('with_index', [True, False])
+def test_viewer_lists_sections_and_renders_only_the_selected_one(big_doc, monkeypatch, with_index):
+    if not with_index:
+        document.index_path_for(big_doc).unlink()
+
+    async def steps(pilot, screen, rendered):
+        file_list = screen.query_one('#md-files', OptionList)
+        await _wait_for(pilot, lambda: file_list.option_count == 4 and rendered)
+        assert [str(file_list.get_option_at_index(i).prompt) for i in range(1, 4)] == ['a.py', 'src/big.txt', 'src/c.txt']
+        assert rendered[0][0] == 0 and 'src/big.txt' in rendered[0][1]
+
+        file_list.highlighted = 3
+        await _wait_for(pilot, lambda: rendered[-1][0] == 3)
+        assert rendered[-1][1].startswith('## src/c.txt\n') and '\nc\n' in rendered[-1][1]
+        assert 'line\n' not in rendered[-1][1]
+        assert {number for number, _ in rendered} == {0, 3}
+
+    _run_viewer(big_doc, steps, monkeypatch)
+
+
+def test_viewer_truncates_large_sections(big_doc, monkeypatch):
+    monkeypatch.setattr(MarkdownViewer, 'MAX_VIEW_BYTES', 100)
+
+    async def steps(pilot, screen, rendered):
+        file_list = screen.query_one('#md-files', OptionList)
+        await _wait_for(pilot, lambda: file_list.option_count == 4)
+        file_list.highlighted = 2
+        await _wait_for(pilot, lambda: rendered and rendered[-1][0] == 2)
+        text = rendered[-1][1]
+        assert text.count('line\n') == 20
+        assert text.endswith(f"> {translator.translate('tui.viewer_truncated', size=utils.format_size(100))}\n")
+
+    _run_viewer(big_doc, steps, monkeypatch)
+
+
+def test_viewer_reports_unreadable_document(tmp_path, monkeypatch):
+    missing = tmp_path / 'missing.md'
+
+    async def steps(pilot, screen, rendered):
+        await pilot.pause(0.2)
+        assert screen.doc_file is None and rendered == []
+        assert screen.query_one('#md-files', OptionList).option_count == 0
+
+    _run_viewer(missing, steps, monkeypatch)
+
+
+@pytest.fixture
+def tree_project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src' / 'deep').mkdir(parents=True)
+    (root / 'node_modules').mkdir()
+    (root / 'a.py').write_text('a = 1\n')
+    (root / 'skip.log').write_text('log\n' * 100)
+    (root / 'node_modules' / 'dep.js').write_text('dep\n' * 100)
+    (root / 'src' / 'b.py').write_text('b = 2\n')
+    (root / 'src' / 'deep' / 'c.py').write_text('c = 3\n')
+    return root
+
+
+def test_project_tree_lists_folders_on_expand_and_counts_in_background(tree_project):
+    from rich.style import Style
+    from textual.app import App
+    from program import config as config_module
+    from program.tui import ProjectTree
+
+    config = {**config_module.default_config(), 'ignore_folders': ['node_modules'], 'ignore_files': ['*.log']}
+
+    class TreeApp(App):
+        def compose(self):
+            # Путь с '..' - корень и пути узлов должны совпасть после разрешения
+            yield ProjectTree(str(tree_project / 'src' / '..'), config, id='tree')
+
+    def names(node):
+        return [child.data.path.name for child in node.children]
+
+    async def scenario():
+        app = TreeApp()
+        async with app.run_test() as pilot:
+            tree = app.query_one('#tree', ProjectTree)
+            await _wait_for(pilot, lambda: len(tree.root.children) == 2)
+            assert tree.path == tree_project.resolve()
+            assert names(tree.root) == ['src', 'a.py']
+            src = tree.root.children[0]
+            assert names(src) == [] and str(src.data.path) in tree.scheduled
+
+            await _wait_for(pilot, lambda: str(tree_project.resolve()) in tree.dir_stats
+                            and str(src.data.path) in tree.dir_stats)
+            assert tree.dir_stats[str(tree_project.resolve())] == (3, 18)
+            assert tree.dir_stats[str(src.data.path)] == (2, 12)
+            label = str(tree.render_label(src, Style(), Style()))
+            assert translator.translate('tui.tree_dir_stats', count=2, size=utils.format_size(12)) in label
+
+            src.expand()
+            await _wait_for(pilot, lambda: len(src.children) == 2)
+            assert names(src) == ['deep', 'b.py']
+            assert tree.rel_path(src.children[0].data.path) == 'src/deep'
+
+    asyncio.run(scenario())
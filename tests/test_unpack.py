@@ -0,0 +1,122 @@
+import io
+import os
+import sys
+import stat
+import hashlib
+import tarfile
+import zipfile
+
+import pytest
+
+import program.document as document
+
+from conftest import run_ofp
+
+
+def _write(path, sections):
+    """Документ из секций (путь, байты, права, атрибуты исходника)"""
+    writer = document.DocumentWriter(path, 'project')
+    try:
+        writer.write_header('Project Structure', 'Files Content', '', None)
+        for rel_path, content, mode, source in sections:
+            writer.write_section(rel_path, 'text', content, mode, source)
+        writer.write_footer()
+    finally:
+        writer.close()
+    return path
+
+
+@pytest.mark.parametrize('rel_path', ['../evil.txt', 'a/../../evil.txt', '/tmp/evil.txt'])
+def test_unpack_rejects_paths_outside_target(tmp_path, rel_path):
+    doc = _write(tmp_path / 'doc.md', [('ok.txt', 'ok\n', 0o644, None), (rel_path, 'evil\n', 0o644, None)])
+    target = tmp_path / 'deep' / 'out'
+    result = run_ofp('unpack', str(doc), str(target))
+    assert result.returncode == 1
+    assert 'outside the target folder' in result.stdout
+    assert (target / 'ok.txt').read_text() == 'ok\n'
+    assert not (tmp_path / 'deep' / 'evil.txt').exists() and not (tmp_path / 'evil.txt').exists()
+
+    result = run_ofp('unpack', str(doc), '--to-archive', str(tmp_path / 'out.tar'))
+    assert result.returncode == 1
+    assert not (tmp_path / 'out.tar').exists()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='POSIX permissions')
+def test_unpack_keeps_only_permission_bits(tmp_path):
+    doc = _write(tmp_path / 'doc.md', [('run.sh', 'echo\n', 0o104755, None)])
+    assert run_ofp('unpack', str(doc), str(tmp_path / 'out')).returncode == 0
+    assert os.stat(tmp_path / 'out' / 'run.sh').st_mode & 0o7777 == 0o755
+
+
+def test_unpack_checks_source_hash_and_warns_on_lossy_sections(tmp_path):
+    raw = b'# Notes\n\n```py\nx = 1\n```\n'
+    content, source = document.section_content(raw, '.md')
+    source['sha256'] = hashlib.sha256(raw).hexdigest()
+    doc = _write(tmp_path / 'doc.md', [('notes.md', content, 0o644, source),
+                                       ('a.txt', 'changed\n', 0o644, {'sha256': hashlib.sha256(b'a\n').hexdigest()})])
+
+    result = run_ofp('unpack', str(doc), str(tmp_path / 'out'))
+    assert result.returncode == 1
+    assert 'Checksum mismatch: a.txt' in result.stdout
+    assert 'without checksum check: notes.md' in result.stdout
+    assert 'Checksum mismatch: notes.md' not in result.stdout
+
+
+ARCHIVE_FILES = {
+    'a.py': b'x = 1\n',
+    'src/data.dat': bytes(range(256)),
+    'src/run.sh': b'echo run\n',
+}
+
+
+@pytest.fixture
+def generated_doc(tmp_path):
+    project = tmp_path / 'project'
+    for rel_path, raw in ARCHIVE_FILES.items():
+        (project / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (project / rel_path).write_bytes(raw)
+    os.chmod(project / 'src' / 'run.sh', 0o755)
+    assert run_ofp(str(project)).returncode == 0
+    return project / 'project_documentation.md'
+
+
+def _archive_members(name, data):
+    """Содержимое и права файлов архива"""
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return {info.filename: (archive.read(info), stat.S_IMODE(info.external_attr >> 16))
+                    for info in archive.infolist()}
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        return {info.name: (archive.extractfile(info).read(), info.mode) for info in archive.getmembers()}
+
+
+@pytest.mark.parametrize('name', ['out.tar', 'out.tar.gz', 'out.tar.xz', 'out.zip', '-'])
+def test_unpack_to_archive_keeps_bytes_and_modes(generated_doc, tmp_path, name):
+    archive_path = '-' if name == '-' else str(tmp_path / name)
+    result = run_ofp('unpack', str(generated_doc), '--to-archive', archive_path, text=False)
+    assert result.returncode == 0, result.stderr
+    data = result.stdout if name == '-' else (tmp_path / name).read_bytes()
+
+    members = _archive_members(name, data)
+    assert {rel_path: raw for rel_path, (raw, _) in members.items()} == ARCHIVE_FILES
+    if sys.platform != 'win32':
+        assert members['src/run.sh'][1] == 0o755 and members['a.py'][1] & 0o111 == 0
+    assert not list(tmp_path.glob('*.part'))
+
+
+def test_unpack_to_archive_only_and_unknown_type(generated_doc, tmp_path):
+    result = run_ofp('unpack', str(generated_doc), '--to-archive', str(tmp_path / 'out.zip'), '--only', 'src/*')
+    assert result.returncode == 0
+    assert set(_archive_members('out.zip', (tmp_path / 'out.zip').read_bytes())) == {'src/data.dat', 'src/run.sh'}
+
+    result = run_ofp('unpack', str(generated_doc), '--to-archive', str(tmp_path / 'out.rar'))
+    assert result.returncode == 1
+    assert not (tmp_path / 'out.rar').exists()
+
+
+def test_unpack_only_writes_matching_sections(generated_doc, tmp_path):
+    result = run_ofp('unpack', str(generated_doc), '--only', 'src/*', str(tmp_path / 'out'))
+    assert result.returncode == 0, result.stdout
+    assert sorted(str(path.relative_to(tmp_path / 'out')) for path in (tmp_path / 'out').rglob('*')) == [
+        'src', 'src/data.dat', 'src/run.sh']
+    assert (tmp_path / 'out' / 'src' / 'data.dat').read_bytes() == ARCHIVE_FILES['src/data.dat']
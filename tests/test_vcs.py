@@ -0,0 +1,99 @@
+import shutil
+import subprocess
+
+import pytest
+
+import program.document as document
+import program.vcs as vcs
+from conftest import run_ofp
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+
+def _git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+                   check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    project = tmp_path / 'repo' / 'project dir'
+    (project / 'src').mkdir(parents=True)
+    (project / 'src' / 'old name.py').write_text('x = 1\n' * 20)
+    (project / 'keep.txt').write_text('keep\n')
+    (project / 'gone.txt').write_text('gone\n')
+    (project / 'tab\there.txt').write_text('tab\n')
+    (tmp_path / 'repo' / 'outside.txt').write_text('outside\n')
+    _git(tmp_path / 'repo', 'init', '-q')
+    _git(tmp_path / 'repo', 'add', '-A')
+    _git(tmp_path / 'repo', 'commit', '-q', '-m', 'init')
+    return project
+
+
+def test_changed_files_parses_renames_and_paths_with_spaces(repo):
+    _git(repo, 'mv', 'src/old name.py', 'src/new name.py')
+    (repo / 'keep.txt').write_text('changed\n')
+    (repo / 'tab\there.txt').write_text('changed\n')
+    (repo / 'gone.txt').unlink()
+    (repo / 'new file.txt').write_text('new\n')
+    (repo / 'новый.txt').write_text('new\n')
+    (repo.parent / 'outside.txt').write_text('changed\n')
+
+    assert vcs.changed_files(str(repo), 'HEAD') == {
+        'src/new name.py': 'R',
+        'keep.txt': 'M',
+        'tab\there.txt': 'M',
+        'gone.txt': 'D',
+        'new file.txt': vcs.UNTRACKED,
+        'новый.txt': vcs.UNTRACKED,
+    }
+    assert 'new file.txt' not in vcs.changed_files(str(repo), 'HEAD', include_untracked=False)
+
+
+def test_changed_files_reports_git_errors(repo):
+    with pytest.raises(vcs.GitError):
+        vcs.changed_files(str(repo), 'no-such-revision')
+
+
+def _generate_since(repo, *options):
+    result = run_ofp(str(repo), '--since', 'HEAD', *options, cwd=repo.parent)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Changed since HEAD' in result.stdout
+    doc_path = repo / 'project_documentation.md'
+    with open(doc_path, 'rb') as f:
+        paths = [section.path for section in document.DocumentReader(f).sections()]
+    return doc_path.read_text(encoding='utf-8').split('\n## ')[0], paths
+
+
+def _change_files(repo):
+    _git(repo, 'mv', 'src/old name.py', 'src/new name.py')
+    (repo / 'keep.txt').write_text('changed\n')
+    (repo / 'gone.txt').unlink()
+    (repo / 'new file.txt').write_text('new\n')
+
+
+def test_since_documents_only_changed_files_in_marked_tree(repo):
+    _change_files(repo)
+    tree, paths = _generate_since(repo)
+
+    assert sorted(paths) == ['keep.txt', 'new file.txt', 'src/new name.py']
+    assert 'keep.txt  [M]' in tree
+    assert 'new name.py  [R]' in tree
+    assert f'new file.txt  [{vcs.UNTRACKED}]' in tree
+    assert 'tab\there.txt\n' in tree
+    assert 'gone.txt' not in tree
+
+
+def test_since_with_pruned_tree_lists_only_changed_paths(repo):
+    _change_files(repo)
+    tree, paths = _generate_since(repo, '--pruned-tree')
+
+    assert sorted(paths) == ['keep.txt', 'new file.txt', 'src/new name.py']
+    assert 'src/' in tree and 'new name.py  [R]' in tree
+    assert 'tab\there.txt' not in tree
+
+
+def test_since_with_unknown_revision_reports_error(repo):
+    result = run_ofp(str(repo), '--since', 'no-such-revision', cwd=repo.parent)
+    assert 'Could not list changes since no-such-revision' in result.stdout
+    assert not (repo / 'project_documentation.md').exists()